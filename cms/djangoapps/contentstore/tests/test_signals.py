@@ -1,14 +1,16 @@
 import ddt
+from django.core.cache.backends.locmem import LocMemCache
 from mock import patch, Mock
 
 from cms.djangoapps.contentstore.signals.handlers import (
     GRADING_POLICY_COUNTDOWN_SECONDS,
     handle_grading_policy_changed
 )
+from openedx.core.lib.xblock_utils import get_course_fragment_generation
 from student.models import CourseEnrollment, anonymous_id_for_user
 from student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 
 @ddt.ddt
@@ -37,3 +39,21 @@ class LockedTest(ModuleStoreTestCase):
         self.assertEqual(lock_available, compute_grades_async_mock.called)
         if lock_available:
             add_mock.assert_called_once_with(cache_key, "true", GRADING_POLICY_COUNTDOWN_SECONDS)
+
+
+class FragmentGenerationTest(ModuleStoreTestCase):
+    """
+    Test that publishing a course in Studio invalidates the course's
+    rendered fragments cached by the LMS.
+    """
+    ENABLED_SIGNALS = ['course_published']
+
+    @patch('openedx.core.lib.xblock_utils.cache', LocMemCache('fragment_generation', {}))
+    def test_generation_reset_on_publish(self):
+        course = CourseFactory.create()
+        html = ItemFactory.create(category='html', parent_location=course.location)
+        generation = get_course_fragment_generation(course.id)
+        self.assertEqual(get_course_fragment_generation(course.id), generation)
+
+        self.store.publish(html.location, self.user.id)
+        self.assertNotEqual(get_course_fragment_generation(course.id), generation)
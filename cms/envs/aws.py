@@ -122,6 +122,11 @@ if STATIC_ROOT_BASE:
     STATIC_ROOT = path(STATIC_ROOT_BASE) / EDX_PLATFORM_REVISION
     WEBPACK_LOADER['DEFAULT']['STATS_FILE'] = STATIC_ROOT / "webpack-stats.json"
 
+# MAKO_MODULE_DIR specifies the directory where compiled Mako templates are
+# stored.  It can be shared by all processes, and populated when deploying with
+# the compile_mako_templates management command.
+MAKO_MODULE_DIR = ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR)
+
 EMAIL_BACKEND = ENV_TOKENS.get('EMAIL_BACKEND', EMAIL_BACKEND)
 EMAIL_FILE_PATH = ENV_TOKENS.get('EMAIL_FILE_PATH', None)
 
@@ -152,6 +157,18 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+CONTENTSERVER_SPILL_CACHE_DIR = ENV_TOKENS.get('CONTENTSERVER_SPILL_CACHE_DIR', CONTENTSERVER_SPILL_CACHE_DIR)
+CONTENTSERVER_SPILL_CACHE_MIN_HITS = ENV_TOKENS.get(
+    'CONTENTSERVER_SPILL_CACHE_MIN_HITS', CONTENTSERVER_SPILL_CACHE_MIN_HITS
+)
+CONTENTSERVER_SPILL_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'CONTENTSERVER_SPILL_CACHE_MAX_SIZE', CONTENTSERVER_SPILL_CACHE_MAX_SIZE
+)
+
+COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE', COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE
+)
+
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_COOKIE_HTTPONLY = ENV_TOKENS.get('SESSION_COOKIE_HTTPONLY', True)
 SESSION_ENGINE = ENV_TOKENS.get('SESSION_ENGINE', SESSION_ENGINE)
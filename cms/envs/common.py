@@ -438,6 +438,7 @@ MIDDLEWARE_CLASSES = [
     'django.middleware.locale.LocaleMiddleware',
 
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'capa.safe_exec.django_integration.ConfigureSandboxPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -462,6 +463,22 @@ X_FRAME_OPTIONS = 'ALLOW'
 # Platform for Privacy Preferences header
 P3P_HEADER = 'CP="Open EdX does not have a P3P policy."'
 
+############################### Contentserver ##################################
+
+# Directory on local disk in which frequently requested course assets that are
+# too large to be cached in memory are stored, and served from, instead of being
+# read from the contentstore for every request.  Files are named by the digest of
+# their asset.  Disabled if None.
+CONTENTSERVER_SPILL_CACHE_DIR = None
+
+# Maximum total size, in bytes, of the files in the spill cache.  The least
+# recently served files are removed to stay within it.
+CONTENTSERVER_SPILL_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+# Number of requests for an asset, within an hour, after which it is stored in
+# the spill cache.
+CONTENTSERVER_SPILL_CACHE_MIN_HITS = 3
+
 ############# XBlock Configuration ##########
 
 # Import after sys.path fixup
@@ -519,6 +536,12 @@ MODULESTORE = {
     }
 }
 
+# Maximum total size, in bytes, of the uncompressed pickles of the split
+# modulestore course structures cached in each process in front of the
+# course_structure_cache.  Each read unpickles a copy of the structure.
+# 0 disables the per-process cache.
+COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE = 0
+
 # Modulestore-level field override providers. These field override providers don't
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
@@ -536,6 +559,14 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of pre-warmed sandboxed Python processes.
+    'pool': {
+        # How many sandboxed processes each server process keeps?  0 disables the pool.
+        'size': 0,
+        # How many executions before a sandboxed process is replaced?
+        'max_executions': 100,
+    },
 }
 
 ############################ DJANGO_BUILTINS ################################
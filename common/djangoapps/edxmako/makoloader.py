@@ -1,4 +1,5 @@
 import logging
+import os
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -35,26 +36,20 @@ class MakoLoader(object):
 
         self.module_directory = module_directory
 
+        # Map of the file path of each loaded mako template to its modification
+        # time and compiled Template, so that the template's module is not
+        # reloaded from the module directory on every render.
+        self._mako_templates = {}
+
     def __call__(self, template_name, template_dirs=None):
         return self.load_template(template_name, template_dirs)
 
     def load_template(self, template_name, template_dirs=None):
         source, file_path = self.load_template_source(template_name, template_dirs)
 
-        # In order to allow dynamic template overrides, we need to cache templates based on their absolute paths
-        # rather than relative paths, overriding templates would have same relative paths.
-        module_directory = self.module_directory.rstrip("/") + "/{dir_hash}/".format(dir_hash=hash(file_path))
-
         if source.startswith("## mako\n"):
             # This is a mako template
-            template = Template(filename=file_path,
-                                module_directory=module_directory,
-                                input_encoding='utf-8',
-                                output_encoding='utf-8',
-                                default_filters=['decode.utf8'],
-                                encoding_errors='replace',
-                                uri=template_name)
-            return template, None
+            return self._get_mako_template(template_name, file_path), None
         else:
             # This is a regular template
             try:
@@ -71,11 +66,35 @@ class MakoLoader(object):
                 # not exist.
                 return source, file_path
 
+    def _get_mako_template(self, template_name, file_path):
+        """
+        Returns the compiled mako Template for the given file, which is only
+        recompiled if the file was modified since it was last loaded.
+        """
+        mtime = os.path.getmtime(file_path)
+        cached = self._mako_templates.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        # In order to allow dynamic template overrides, we need to cache templates based on their absolute paths
+        # rather than relative paths, overriding templates would have same relative paths.
+        module_directory = self.module_directory.rstrip("/") + "/{dir_hash}/".format(dir_hash=hash(file_path))
+        template = Template(filename=file_path,
+                            module_directory=module_directory,
+                            input_encoding='utf-8',
+                            output_encoding='utf-8',
+                            default_filters=['decode.utf8'],
+                            encoding_errors='replace',
+                            uri=template_name)
+        self._mako_templates[file_path] = (mtime, template)
+        return template
+
     def load_template_source(self, template_name, template_dirs=None):
         # Just having this makes the template load as an instance, instead of a class.
         return self.base_loader.load_template_source(template_name, template_dirs)
 
     def reset(self):
+        self._mako_templates.clear()
         self.base_loader.reset()
 
 
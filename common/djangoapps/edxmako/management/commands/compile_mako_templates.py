@@ -0,0 +1,33 @@
+"""
+Management command to compile all Mako templates into the MAKO_MODULE_DIR.
+
+Run this when deploying, with the MAKO_MODULE_DIR shared by all processes
+of the service, so that no process needs to compile templates on first use.
+
+    ./manage.py lms compile_mako_templates
+    ./manage.py cms compile_mako_templates
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from edxmako.paths import compile_all_templates
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Compiles all Mako templates of the service and its themes.
+    """
+    help = 'Compile all Mako templates of the service and its themes into the MAKO_MODULE_DIR.'
+
+    def handle(self, *args, **options):
+        for namespace, (compiled, failed) in sorted(compile_all_templates().items()):
+            log.info(u'Compiled %d templates in the "%s" namespace.', len(compiled), namespace)
+            if failed:
+                # Not all files in the template directories are Mako templates.
+                log.info(
+                    u'Could not compile %d files in the "%s" namespace: %s',
+                    len(failed), namespace, u', '.join(sorted(failed)),
+                )
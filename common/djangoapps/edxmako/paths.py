@@ -12,7 +12,12 @@ from mako.exceptions import TopLevelLookupException
 from mako.lookup import TemplateLookup
 
 from openedx.core.djangoapps.theming.helpers import get_template as themed_template
-from openedx.core.djangoapps.theming.helpers import get_template_path_with_theme, strip_site_theme_templates_path
+from openedx.core.djangoapps.theming.helpers import (
+    get_current_site_theme,
+    get_template_path_with_theme,
+    get_themes,
+    strip_site_theme_templates_path
+)
 
 from . import LOOKUP
 
@@ -26,6 +31,10 @@ class DynamicTemplateLookup(TemplateLookup):
         super(DynamicTemplateLookup, self).__init__(*args, **kwargs)
         self.__original_module_directory = self.template_args['module_directory']
 
+        # Map of (site theme directory name, uri) to the uri of the template
+        # that was found for it, in either the theme or the default directories.
+        self._resolved_uris = {}
+
     def __repr__(self):
         return "<{0.__class__.__name__} {0.directories}>".format(self)
 
@@ -49,6 +58,7 @@ class DynamicTemplateLookup(TemplateLookup):
         # Also clear the internal caches. Ick.
         self._collection.clear()
         self._uri_cache.clear()
+        self._resolved_uris.clear()
 
     def get_template(self, uri):
         """
@@ -67,15 +77,78 @@ class DynamicTemplateLookup(TemplateLookup):
         # if microsite template is not present or request is not in microsite then
         # let mako find and serve a template
         if not template:
+            # Resolving the theme and probing its directories is relatively expensive,
+            # so the resolved uri is remembered for the site's theme.  In DEBUG, it is
+            # resolved every time, so that newly added theme templates are picked up.
+            site_theme = get_current_site_theme()
+            resolved_uri_key = (site_theme.theme_dir_name if site_theme else None, uri)
+            resolved_uri = self._resolved_uris.get(resolved_uri_key)
+            if resolved_uri is not None:
+                return super(DynamicTemplateLookup, self).get_template(resolved_uri)
+
             try:
                 # Try to find themed template, i.e. see if current theme overrides the template
-                template = super(DynamicTemplateLookup, self).get_template(get_template_path_with_theme(uri))
+                resolved_uri = get_template_path_with_theme(uri)
+                template = super(DynamicTemplateLookup, self).get_template(resolved_uri)
             except TopLevelLookupException:
                 # strip off the prefix path to theme and look in default template dirs
-                template = super(DynamicTemplateLookup, self).get_template(strip_site_theme_templates_path(uri))
+                resolved_uri = strip_site_theme_templates_path(uri)
+                template = super(DynamicTemplateLookup, self).get_template(resolved_uri)
+
+            if not settings.DEBUG:
+                self._resolved_uris[resolved_uri_key] = resolved_uri
 
         return template
 
+    def compile_templates(self, directory, templates_root=None):
+        """
+        Compiles all templates in the given lookup directory, or only those
+        below its `templates_root` subdirectory, into the module directory,
+        and returns the lists of the compiled uris and of the uris that
+        failed to compile.
+        """
+        compiled, failed = [], []
+        for root, _, filenames in os.walk(templates_root or directory):
+            for filename in filenames:
+                uri = os.path.relpath(os.path.join(root, filename), directory)
+                try:
+                    super(DynamicTemplateLookup, self).get_template(uri)
+                except Exception:  # pylint: disable=broad-except
+                    # Not every file in the template directories is a valid Mako template.
+                    failed.append(uri)
+                else:
+                    compiled.append(uri)
+        return compiled, failed
+
+
+def compile_all_templates():
+    """
+    Compiles the templates in the directories of all namespaces into their
+    module directories, so that processes sharing the module directories
+    don't need to compile them on first use.
+
+    Only the template directories of the themes in a theme base directory
+    are compiled, under the uris by which themed templates are looked up.
+
+    Returns a dict mapping each namespace to its lists of compiled uris and
+    of uris that failed to compile.
+    """
+    theme_template_dirs = {}
+    for theme in get_themes():
+        theme_template_dirs.setdefault(os.path.normpath(theme.themes_base_dir), []).extend(theme.template_dirs)
+
+    results = {}
+    for namespace, lookup in LOOKUP.items():
+        compiled, failed = [], []
+        for directory in lookup.directories:
+            templates_roots = theme_template_dirs.get(directory, [None])
+            for templates_root in templates_roots:
+                directory_compiled, directory_failed = lookup.compile_templates(directory, templates_root)
+                compiled.extend(directory_compiled)
+                failed.extend(directory_failed)
+        results[namespace] = (compiled, failed)
+    return results
+
 
 def clear_lookups(namespace):
     """
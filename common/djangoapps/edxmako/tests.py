@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 import ddt
@@ -10,6 +13,7 @@ from django.test.utils import override_settings
 from mock import Mock, patch
 
 from edxmako import LOOKUP, add_lookup
+from edxmako.paths import DynamicTemplateLookup, compile_all_templates
 from edxmako.request_context import get_template_request_context
 from edxmako.shortcuts import is_any_marketing_link_set, is_marketing_link_set, marketing_link, render_to_string
 from request_cache.middleware import RequestCache
@@ -76,6 +80,68 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+class DynamicTemplateLookupTests(TestCase):
+    """
+    Test the resolution and compilation of templates by `DynamicTemplateLookup`.
+    """
+    def setUp(self):
+        super(DynamicTemplateLookupTests, self).setUp()
+        self.template_dir = tempfile.mkdtemp()
+        self.module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir)
+        self.addCleanup(shutil.rmtree, self.module_dir)
+
+        self.write_template('valid.html', u'${1 + 1}')
+        self.write_template('nested/valid.html', u'<%include file="/valid.html"/>')
+        self.write_template('invalid.html', u'<%def name="unclosed()">')
+
+        self.lookup = DynamicTemplateLookup(module_directory=self.module_dir)
+        self.lookup.add_directory(self.template_dir)
+
+    def write_template(self, uri, source):
+        """
+        Writes a template with the given source at the given uri in the template directory.
+        """
+        path = os.path.join(self.template_dir, uri)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as template_file:
+            template_file.write(source)
+
+    def test_resolved_uri_memoized(self):
+        with patch('edxmako.paths.get_template_path_with_theme', side_effect=lambda uri: uri) as mock_get_path:
+            self.assertEqual(self.lookup.get_template('valid.html').render().strip(), '2')
+            self.assertEqual(self.lookup.get_template('valid.html').render().strip(), '2')
+        self.assertEqual(mock_get_path.call_count, 1)
+
+        # Adding a directory may change the template that is found.
+        self.lookup.add_directory(self.template_dir)
+        with patch('edxmako.paths.get_template_path_with_theme', side_effect=lambda uri: uri) as mock_get_path:
+            self.lookup.get_template('valid.html')
+        self.assertEqual(mock_get_path.call_count, 1)
+
+    @override_settings(DEBUG=True)
+    def test_resolved_uri_not_memoized_in_debug(self):
+        with patch('edxmako.paths.get_template_path_with_theme', side_effect=lambda uri: uri) as mock_get_path:
+            self.lookup.get_template('valid.html')
+            self.lookup.get_template('valid.html')
+        self.assertEqual(mock_get_path.call_count, 2)
+
+    def test_compile_all_templates(self):
+        with patch('edxmako.paths.LOOKUP', {'test': self.lookup}):
+            results = compile_all_templates()
+
+        compiled, failed = results['test']
+        self.assertEqual(sorted(compiled), ['nested/valid.html', 'valid.html'])
+        self.assertEqual(failed, ['invalid.html'])
+        compiled_modules = [
+            filename
+            for __, __, filenames in os.walk(self.lookup.template_args['module_directory'])
+            for filename in filenames
+        ]
+        self.assertEqual(sorted(compiled_modules), ['valid.html.py', 'valid.html.py'])
+
+
 class MakoRequestContextTest(TestCase):
     """
     Test MakoMiddleware.
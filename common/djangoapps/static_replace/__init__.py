@@ -4,14 +4,19 @@ import re
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
+from django.utils.lru_cache import lru_cache
 
 from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
+from openedx.core.djangoapps.theming.helpers import get_current_theme
 
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# Maximum number of staticfiles_storage lookups that are memoized.
+STATICFILES_LOOKUP_CACHE_SIZE = 4096
+
 
 def _url_replace_regex(prefix):
     """
@@ -29,13 +34,66 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+@lru_cache(maxsize=64)
+def _compiled_url_replace_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex for the given prefix.
+    """
+    return re.compile(_url_replace_regex(prefix))
+
+
+def _static_url_prefix(data_dir):
+    """
+    Returns the prefix of the static urls that are replaced, excluding the
+    urls that already include the given data directory.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
+@lru_cache(maxsize=STATICFILES_LOOKUP_CACHE_SIZE)
+def _storage_exists(storage, path):
+    """
+    Returns whether the given path exists in the given storage.
+    """
+    return storage.exists(path)
+
+
+@lru_cache(maxsize=STATICFILES_LOOKUP_CACHE_SIZE)
+def _storage_url(storage, theme_dir_name, path):  # pylint: disable=unused-argument
+    """
+    Returns the url of the given path in the given storage.  The url of a
+    themed storage depends on the current theme, so it is part of the key.
+    """
+    return storage.url(path)
+
+
+def staticfiles_exists(path):
+    """
+    Returns whether the given path exists in staticfiles_storage.  The
+    result is memoized, since static files don't change while running.
+    """
+    return _storage_exists(staticfiles_storage, path)
+
+
+def staticfiles_url(path):
+    """
+    Returns the url of the given path in staticfiles_storage.  The result
+    is memoized for the current theme.
+    """
+    theme = get_current_theme()
+    return _storage_url(staticfiles_storage, theme.theme_dir_name if theme else None, path)
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
     a dead link instead of raising an exception.
     """
     try:
-        url = staticfiles_storage.url(path)
+        url = staticfiles_url(path)
     except Exception as err:
         log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
             path, str(err)))
@@ -70,7 +128,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -90,7 +148,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -108,26 +166,25 @@ def process_static_urls(text, replacement_function, data_dir=None):
         quote = match.group('quote')
         rest = match.group('rest')
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
-
-        starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        if _is_xblock_resource_url(prefix + rest):
             return original
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(_static_url_prefix(data_dir)).sub(wrap_part_extraction, text)
+
+
+def _is_xblock_resource_url(full_url):
+    """
+    Returns whether the given static url is an XBlock resource link, which
+    must not be rewritten.
+    """
+    # Probably wasn't a good idea that /static works for actual static assets
+    # and for magical course asset URLs....
+    starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
+    starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
+    return starts_with_prefix or (starts_with_static_url and contains_prefix)
 
 
 def make_static_urls_absolute(request, html):
@@ -164,54 +221,98 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         """
         Replace a single matched url.
         """
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            return original
+        return _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path)
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                # Import is placed here to avoid model import at project startup.
-                from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
-
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
-
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+
+
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path=''):
+    """
+    Replace the urls that replace_static_urls, replace_course_urls and replace_jump_to_id_urls
+    replace, in that order, in a single scan of the text.
+
+    text: The source text to do the substitution in
+    course_id: The course identifier used to distinguish static content for this course in studio
+    jump_to_id_base_url: The base of the jump_to_id handler url, to which the <id> is appended
+    data_directory: The directory in which course data is stored
+    static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+    """
+    course_url_base = '/courses/' + course_id.to_deprecated_string() + '/'
+
+    def replace_url(match):
+        """
+        Replace a single matched url of any kind.
+        """
+        original = match.group(0)
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if match.group('static_prefix') is not None:
+            if _is_xblock_resource_url(prefix + rest):
+                return original
+            return _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path)
+        elif match.group('course_prefix') is not None:
+            return "".join([quote, course_url_base, rest, quote])
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+            return "".join([quote, jump_to_id_base_url + rest, quote])
 
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+    regex = _compiled_url_replace_regex(u'(?P<static_prefix>{static_prefix})|(?P<course_prefix>/course/)|/jump_to_id/'.format(
+        static_prefix=_static_url_prefix(static_asset_path or data_directory),
+    ))
+    return regex.sub(replace_url, text)
 
-        return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+def _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path):
+    """
+    Replace a single static url matched by process_static_urls.  See replace_static_urls.
+    """
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        return original
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return original
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) and course_id:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            # Import is placed here to avoid model import at project startup.
+            from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+            base_url = AssetBaseUrlConfig.get_base_url()
+            excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+            url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_exists(rest):
+                url = staticfiles_url(rest)
+            else:
+                url = staticfiles_url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+
+    return "".join([quote, url, quote])
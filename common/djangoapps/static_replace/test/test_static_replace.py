@@ -19,7 +19,9 @@ from static_replace import (
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
-    replace_static_urls
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
 )
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
@@ -115,6 +117,35 @@ def test_storage_url_not_exists(mock_storage):
     mock_storage.url.assert_called_once_with('data_dir/file.png')
 
 
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_storage_lookups_memoized(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.png'
+
+    for __ in range(2):
+        assert_equals('"/static/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    mock_storage.exists.assert_called_once_with('file.png')
+    mock_storage.url.assert_called_once_with('file.png')
+
+
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls(mock_storage):
+    mock_storage.exists.return_value = False
+    mock_storage.url.side_effect = lambda path: '/static/' + path
+
+    text = '<img src="/static/file.png"/><a href=\'/course/info\'/><a href="/jump_to_id/abc"/>"/static/file.png?raw"'
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(
+            replace_static_urls(text, course_id=COURSE_KEY, static_asset_path=DATA_DIRECTORY),
+            COURSE_KEY,
+        ),
+        COURSE_KEY,
+        jump_to_id_base_url,
+    )
+    assert_equals(expected, replace_urls(text, COURSE_KEY, jump_to_id_base_url, static_asset_path=DATA_DIRECTORY))
+
+
 @patch('static_replace.StaticContent', autospec=True)
 @patch('xmodule.modulestore.django.modulestore', autospec=True)
 @patch('static_replace.models.AssetBaseUrlConfig.get_base_url')
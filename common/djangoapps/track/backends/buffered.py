@@ -0,0 +1,192 @@
+"""
+Event tracker backend that buffers events and sends them to another
+backend in batches, from a background thread.
+
+This takes the write of each event off the critical path of the request
+that emits it.  For example, to buffer the events sent to MongoDB::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {
+                      'database': 'track',
+                  }
+              },
+              'max_queue_size': 10000,
+              'flush_size': 100,
+              'flush_interval': 1.0,
+              'drop_policy': 'newest',
+          }
+      }
+  }
+
+Buffered events that have not been sent when the process exits are sent
+by an exit handler, but they are lost if the process is killed.
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+
+from django.db import close_old_connections
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+log = logging.getLogger(__name__)
+
+# Drop policies, for events sent while the queue is full.
+DROP_NEWEST = 'newest'
+DROP_OLDEST = 'oldest'
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events, and sends them to the
+    wrapped backend in batches from a background thread.
+    """
+
+    def __init__(
+            self,
+            backend,
+            max_queue_size=10000,
+            flush_size=100,
+            flush_interval=1.0,
+            drop_policy=DROP_NEWEST,
+            **kwargs
+    ):
+        """
+        Configure the wrapped backend and the buffering.
+
+        :Parameters:
+
+          - `backend`: configuration of the wrapped backend, with the same
+            `ENGINE` and `OPTIONS` keys as in TRACKING_BACKENDS.
+          - `max_queue_size`: maximum number of events that are buffered.
+          - `flush_size`: maximum number of events sent in a single batch.
+          - `flush_interval`: maximum number of seconds that a batch waits
+            for more events before it is sent.
+          - `drop_policy`: which event is dropped when an event is sent
+            while the queue is full: the `newest` one, which is the event
+            being sent, or the `oldest` queued one.
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError('Invalid drop policy for the buffered event track backend: %s' % drop_policy)
+
+        # Imported here since the tracker instantiates the configured backends on import.
+        from track.tracker import _instantiate_backend_from_name
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+
+        self.queue = Queue.Queue(maxsize=max_queue_size)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+
+        self._worker_lock = threading.Lock()
+        self._worker_pid = None
+
+        atexit.register(self.flush)
+
+    def send(self, event):
+        """Queue the event to be sent by the background thread."""
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(event)
+        except Queue.Full:
+            self._drop(event)
+
+    def flush(self):
+        """Send all queued events from the calling thread."""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except Queue.Empty:
+                break
+            if len(events) == self.flush_size:
+                self._send_batch(events)
+                events = []
+        if events:
+            self._send_batch(events)
+
+    def _drop(self, event):
+        """Drop an event, according to the drop policy, since the queue is full."""
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(event)
+            except (Queue.Empty, Queue.Full):
+                # The queue was drained or filled up by another thread in the meantime.
+                pass
+        dog_stats_api.increment('track.send.buffered.dropped')
+        log.warning('Dropped an event since the buffered event track backend queue is full')
+
+    def _ensure_worker(self):
+        """
+        Start the background thread, if it isn't running in this process.
+
+        Threads do not survive a fork, so the thread is started in each
+        process that sends events, rather than when the backend is created.
+        """
+        if self._worker_pid == os.getpid():
+            return
+        with self._worker_lock:
+            if self._worker_pid != os.getpid():
+                self._start_worker()
+                self._worker_pid = os.getpid()
+
+    def _start_worker(self):
+        """Start the background thread that sends the queued events."""
+        worker = threading.Thread(target=self._run, name='track-buffered-backend')
+        worker.daemon = True
+        worker.start()
+
+    def _run(self):
+        """Send the queued events in batches, forever."""
+        while True:
+            events = self._next_batch()
+            # Django only closes the database connections that are broken or
+            # past their CONN_MAX_AGE around requests, which this thread
+            # never handles, so they are closed around each batch instead.
+            close_old_connections()
+            self._send_batch(events)
+            close_old_connections()
+
+    def _next_batch(self):
+        """
+        Wait for an event to be queued, and return it along with the events
+        queued in the following flush_interval, up to flush_size events.
+        """
+        events = [self.queue.get()]
+        deadline = time.time() + self.flush_interval
+        while len(events) < self.flush_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self.queue.get(timeout=remaining))
+            except Queue.Empty:
+                break
+        return events
+
+    def _send_batch(self, events):
+        """Send the events to the wrapped backend."""
+        dog_stats_api.histogram('track.send.buffered.queue_depth', self.queue.qsize())
+        dog_stats_api.histogram('track.send.buffered.batch_size', len(events))
+        try:
+            with dog_stats_api.timer('track.send.buffered.batch'):
+                self.backend.send_batch(events)
+        except Exception:  # pylint: disable=broad-except
+            # The background thread must keep running, so the events are lost.
+            log.exception('Error sending a batch of %d events from the buffered event track backend', len(events))
@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+
+import threading
+
+import ddt
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.buffered import DROP_NEWEST, DROP_OLDEST, BufferedBackend
+
+
+class InMemoryBackend(BaseBackend):
+    """Backend that stores the batches of events it is sent."""
+    def __init__(self, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.batches = []
+        self.batch_sent = threading.Event()
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.batches.append(events)
+        self.batch_sent.set()
+
+
+@ddt.ddt
+class TestBufferedBackend(TestCase):
+    def create_backend(self, **options):
+        return BufferedBackend(
+            backend={'ENGINE': 'track.backends.tests.test_buffered.InMemoryBackend'},
+            **options
+        )
+
+    @patch.object(BufferedBackend, '_start_worker')
+    def test_flush_in_batches(self, mock_start_worker):
+        backend = self.create_backend(flush_size=2)
+        for i in range(5):
+            backend.send({'test': i})
+        mock_start_worker.assert_called_once_with()
+
+        backend.flush()
+        self.assertEqual(
+            backend.backend.batches,
+            [[{'test': 0}, {'test': 1}], [{'test': 2}, {'test': 3}], [{'test': 4}]],
+        )
+
+    @ddt.data(
+        (DROP_NEWEST, [0, 1]),
+        (DROP_OLDEST, [1, 2]),
+    )
+    @ddt.unpack
+    @patch.object(BufferedBackend, '_start_worker')
+    def test_drop_policy(self, drop_policy, expected_events, _mock_start_worker):
+        backend = self.create_backend(max_queue_size=2, drop_policy=drop_policy)
+        with patch('track.backends.buffered.dog_stats_api') as mock_dog_stats_api:
+            for i in range(3):
+                backend.send({'test': i})
+        mock_dog_stats_api.increment.assert_called_once_with('track.send.buffered.dropped')
+
+        backend.flush()
+        self.assertEqual(backend.backend.batches, [[{'test': i} for i in expected_events]])
+
+    def test_invalid_drop_policy(self):
+        with self.assertRaises(ValueError):
+            self.create_backend(drop_policy='random')
+
+    def test_background_thread(self):
+        backend = self.create_backend(flush_size=2, flush_interval=10)
+        backend.send({'test': 0})
+        backend.send({'test': 1})
+
+        # The batch is sent as soon as it is full, before the flush interval.
+        self.assertTrue(backend.backend.batch_sent.wait(5))
+        self.assertEqual(backend.backend.batches, [[{'test': 0}, {'test': 1}]])
+
+    @patch('track.backends.buffered.close_old_connections')
+    def test_background_thread_closes_old_connections(self, mock_close_old_connections):
+        backend = self.create_backend(flush_size=1)
+        backend.send({'test': 0})
+
+        self.assertTrue(backend.backend.batch_sent.wait(5))
+        mock_close_old_connections.assert_called_with()
+
+    @patch('track.backends.buffered.close_old_connections')
+    @patch.object(BufferedBackend, '_start_worker')
+    def test_flush_keeps_connections(self, _mock_start_worker, mock_close_old_connections):
+        backend = self.create_backend()
+        backend.send({'test': 0})
+
+        # Flushing from a request must not close the request's connections.
+        backend.flush()
+        self.assertFalse(mock_close_old_connections.called)
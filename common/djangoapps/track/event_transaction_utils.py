@@ -2,6 +2,7 @@
 Helper functions to access and update the id and type
 used in event tracking.
 """
+from contextlib import contextmanager
 from uuid import UUID, uuid4
 
 from request_cache import get_cache
@@ -49,3 +50,19 @@ def set_event_transaction_type(action_type):
     as the user action type.
     """
     get_cache('event_transaction')['type'] = action_type
+
+
+@contextmanager
+def event_transaction(transaction_id, transaction_type):
+    """
+    Within this context, the event transaction id and type
+    are the given ones, which may be None.  The previous id
+    and type are restored upon exiting the context.
+    """
+    cache = get_cache('event_transaction')
+    previous_id, previous_type = cache.get('id', None), cache.get('type', None)
+    cache['id'], cache['type'] = transaction_id, transaction_type
+    try:
+        yield
+    finally:
+        cache['id'], cache['type'] = previous_id, previous_type
@@ -1,10 +1,16 @@
 import re
 
 from django.conf import settings
+from django.core.cache import caches
+
+from capa.safe_exec.result_cache import SafeExecResultCache
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+# Name of the cache, in CACHES, that stores the results of sandboxed code.
+SAFE_EXEC_CACHE_NAME = "safe_exec"
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -39,3 +45,15 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def get_safe_exec_cache():
+    """
+    Return the cache for the results of sandboxed code, configured by the
+    SAFE_EXEC_CACHE setting.
+
+    Results are stored in the `safe_exec` cache if it is configured in
+    CACHES, else in the default cache.
+    """
+    cache_name = SAFE_EXEC_CACHE_NAME if SAFE_EXEC_CACHE_NAME in settings.CACHES else 'default'
+    return SafeExecResultCache(caches[cache_name], **getattr(settings, 'SAFE_EXEC_CACHE', {}))
@@ -2,12 +2,13 @@
 Tests for sandboxing.py in util app
 """
 
+from django.core.cache import caches
 from django.test import TestCase
 from django.test.utils import override_settings
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
 
-from util.sandboxing import can_execute_unsafe_code
+from util.sandboxing import can_execute_unsafe_code, get_safe_exec_cache
 
 
 class SandboxingTest(TestCase):
@@ -38,3 +39,13 @@ class SandboxingTest(TestCase):
         self.assertFalse(can_execute_unsafe_code(CourseLocator('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(CourseLocator('edX', 'full', '2013_Spring')))
         self.assertFalse(can_execute_unsafe_code(LibraryLocator('edX', 'test_bank')))
+
+    @override_settings(SAFE_EXEC_CACHE={'max_entry_size': 100, 'compress_threshold': 10})
+    def test_safe_exec_cache(self):
+        """
+        Test that the safe_exec cache is configured from the settings, over the default cache
+        """
+        cache = get_safe_exec_cache()
+        self.assertIs(cache.cache, caches['default'])
+        self.assertEqual(cache.max_entry_size, 100)
+        self.assertEqual(cache.compress_threshold, 10)
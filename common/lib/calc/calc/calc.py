@@ -7,6 +7,8 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import numbers
 import operator
+import threading
+from collections import OrderedDict
 
 import numpy
 import scipy.constants
@@ -86,6 +88,9 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# Maximum number of parsed expressions kept by compile_expression.
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
+
 
 class UndefinedVariable(Exception):
     """
@@ -214,18 +219,59 @@ def eval_product(parse_result):
     return prod
 
 
+# The following functions are the counterparts of the evaluation actions above
+# that handle numpy arrays of values, as used by `batch_evaluator`.
+
+def eval_atom_array(parse_result):
+    """
+    Return the value or array of values wrapped by the atom.
+    """
+    return next(k for k in parse_result if not isinstance(k, basestring))
+
+
+def eval_power_array(parse_result):
+    """
+    Take a list of values or arrays of values and exponentiate them, right to left.
+    """
+    parse_result = reversed(
+        [k for k in parse_result
+         if not isinstance(k, basestring)]  # Ignore the '^' marks.
+    )
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_array(parse_result):
+    """
+    Compute values or arrays of values according to the parallel resistors operator.
+
+    Unlike `eval_parallel`, a zero among the inputs is a division by zero.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    reciprocals = [1. / e for e in parse_result
+                   if not isinstance(e, basestring)]
+    return 1. / sum(reciprocals)
+
+
+# Lowercase versions of the defaults, for case-insensitive evaluation.
+LOWER_DEFAULT_FUNCTIONS = lower_dict(DEFAULT_FUNCTIONS)
+LOWER_DEFAULT_VARIABLES = lower_dict(DEFAULT_VARIABLES)
+
+
 def add_defaults(variables, functions, case_sensitive):
     """
     Create dictionaries with both the default and user-defined variables.
     """
-    all_variables = dict(DEFAULT_VARIABLES)
-    all_functions = dict(DEFAULT_FUNCTIONS)
-    all_variables.update(variables)
-    all_functions.update(functions)
-
-    if not case_sensitive:
-        all_variables = lower_dict(all_variables)
-        all_functions = lower_dict(all_functions)
+    if case_sensitive:
+        all_variables = dict(DEFAULT_VARIABLES)
+        all_functions = dict(DEFAULT_FUNCTIONS)
+        all_variables.update(variables)
+        all_functions.update(functions)
+    else:
+        all_variables = dict(LOWER_DEFAULT_VARIABLES)
+        all_functions = dict(LOWER_DEFAULT_FUNCTIONS)
+        all_variables.update(lower_dict(variables))
+        all_functions.update(lower_dict(functions))
 
     return (all_variables, all_functions)
 
@@ -238,38 +284,170 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+def batch_evaluator(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each dictionary of variables in `variables_list`,
+    and return the list of results.
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    The results, and any exception raised, are the same as if `evaluator` was
+    called for each dictionary of variables.
+    """
+    return compile_expression(math_expr, case_sensitive).evaluate_batch(variables_list, functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+_COMPILED_EXPRESSIONS = OrderedDict()
+_COMPILED_EXPRESSIONS_LOCK = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the `CompiledExpression` for a math expression string.
+
+    The most recently used expressions are cached, so that an expression that
+    is evaluated repeatedly, e.g. when grading, is only parsed once.
+    """
+    key = (math_expr, case_sensitive)
+    with _COMPILED_EXPRESSIONS_LOCK:
+        compiled_expression = _COMPILED_EXPRESSIONS.pop(key, None)
+        if compiled_expression is not None:
+            # Move it to the end, as the most recently used.
+            _COMPILED_EXPRESSIONS[key] = compiled_expression
+            return compiled_expression
+
+    # Parse outside of the lock; expressions that fail to parse are not cached.
+    compiled_expression = CompiledExpression(math_expr, case_sensitive)
+
+    with _COMPILED_EXPRESSIONS_LOCK:
+        _COMPILED_EXPRESSIONS[key] = compiled_expression
+        while len(_COMPILED_EXPRESSIONS) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _COMPILED_EXPRESSIONS.popitem(last=False)
+    return compiled_expression
+
+
+class CompiledExpression(object):
+    """
+    A parsed math expression, which can be evaluated for any variables.
+
+    It is not modified by evaluation, so it can be shared between threads.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse the math expression, raising a `pyparsing.ParseException` if it
+        is invalid.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self.math_interpreter = None
+
+        # Empty expressions evaluate to NaN.
+        if math_expr.strip() != "":
+            self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+            self.math_interpreter.parse_algebra()
+
+    def casify(self, name):
+        """
+        Return the name by which a variable or function is looked up.
+        """
+        return name if self.case_sensitive else name.lower()  # Lowercase for case insens.
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions,
+        as described in `evaluator`.
+        """
+        # No need to go further.
+        if self.math_interpreter is None:
+            return float('nan')
+
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        # Create a recursion to evaluate the tree.
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[self.casify(x[0])],
+            'function': lambda x: all_functions[self.casify(x[0])](x[1]),
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+
+        return self.math_interpreter.reduce_tree(evaluate_actions)
+
+    def evaluate_batch(self, variables_list, functions):
+        """
+        Evaluate the expression for each dictionary of variables in
+        `variables_list`, as described in `batch_evaluator`.
+
+        Where possible, the expression is evaluated only once, for numpy
+        arrays holding the values of each variable in all dictionaries.
+        """
+        if self.math_interpreter is None:
+            return [float('nan')] * len(variables_list)
+
+        results = None
+        if len(variables_list) > 1 and not functions:
+            results = self._evaluate_arrays(variables_list)
+        if results is None:
+            results = [self.evaluate(variables, functions) for variables in variables_list]
+        return results
+
+    def _evaluate_arrays(self, variables_list):
+        """
+        Evaluate the expression for numpy arrays of the values of each
+        variable in `variables_list`, and return the list of results.
+
+        Return None if the expression cannot be evaluated for arrays in the
+        same way as for each of the variables.  That is the case if the
+        dictionaries in `variables_list` don't have the same variables, if a
+        function doesn't accept arrays, or if the evaluation would raise an
+        error or produce a special value, such as for a division by zero.
+        """
+        names = set(variables_list[0])
+        if any(set(variables) != names for variables in variables_list):
+            return None
+
+        variable_arrays = {
+            name: numpy.array([variables[name] for variables in variables_list])
+            for name in names
+        }
+        if any(array.dtype.kind not in 'ifc' for array in variable_arrays.itervalues()):
+            return None
+
+        all_variables, all_functions = add_defaults(variable_arrays, {}, self.case_sensitive)
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[self.casify(x[0])],
+            'function': lambda x: all_functions[self.casify(x[0])](x[1]),
+            'atom': eval_atom_array,
+            'power': eval_power_array,
+            'parallel': eval_parallel_array,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+
+        # Python numbers raise errors, and numpy functions of python numbers
+        # produce special values, where numpy arrays would only warn.
+        try:
+            with numpy.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+                result = numpy.asarray(self.math_interpreter.reduce_tree(evaluate_actions))
+                if result.shape != (len(variables_list),):
+                    # The result doesn't depend on the variables.
+                    result = result + numpy.zeros(len(variables_list))
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+        return list(result)
 
 
 class ParseAugmenter(object):
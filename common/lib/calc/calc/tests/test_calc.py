@@ -559,3 +559,75 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class BatchEvaluatorTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and calc.batch_evaluator
+    """
+
+    def setUp(self):
+        super(BatchEvaluatorTest, self).setUp()
+        self.variables_list = [{'x': x, 'y': y} for x, y in [(1.0, 2.0), (-0.5, 3.5), (2.5, -1.0)]]
+
+    def assert_batch_equals_evaluator(self, math_expr, variables_list=None, case_sensitive=False):
+        """
+        Check that `batch_evaluator` gives the results of `evaluator` for each of the variables.
+        """
+        variables_list = variables_list or self.variables_list
+        expected = [
+            calc.evaluator(variables, {}, math_expr, case_sensitive=case_sensitive)
+            for variables in variables_list
+        ]
+        results = calc.batch_evaluator(variables_list, {}, math_expr, case_sensitive=case_sensitive)
+        self.assertEqual(len(results), len(expected))
+        for result, expected_result in zip(results, expected):
+            if numpy.isnan(expected_result):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertAlmostEqual(result, expected_result, delta=1e-12)
+
+    def test_compiled_expression_cached(self):
+        compiled_expression = calc.compile_expression('x^2 + y', case_sensitive=False)
+        self.assertIs(calc.compile_expression('x^2 + y', case_sensitive=False), compiled_expression)
+        self.assertIsNot(calc.compile_expression('x^2 + y', case_sensitive=True), compiled_expression)
+        self.assertEqual(compiled_expression.evaluate({'x': 3.0, 'y': 1.0}, {}), 10.0)
+        self.assertEqual(compiled_expression.evaluate({'x': 2.0, 'y': 1.0}, {}), 5.0)
+
+    def test_compiled_expression_cache_bounded(self):
+        calc.compile_expression('x + 1')
+        for i in range(calc.COMPILED_EXPRESSION_CACHE_SIZE):
+            calc.compile_expression('x + {}'.format(i + 2))
+        self.assertLessEqual(len(calc.calc._COMPILED_EXPRESSIONS), calc.COMPILED_EXPRESSION_CACHE_SIZE)
+        self.assertNotIn(('x + 1', False), calc.calc._COMPILED_EXPRESSIONS)
+
+    def test_invalid_expression_raises(self):
+        with self.assertRaises(ParseException):
+            calc.batch_evaluator(self.variables_list, {}, '1 + * 2')
+
+    def test_batch_matches_evaluator(self):
+        self.assert_batch_equals_evaluator('x^2 + 3*y - 1')
+        self.assert_batch_equals_evaluator('sin(x) * exp(y) / (1 + x^2)')
+        self.assert_batch_equals_evaluator('sqrt(x^2 + y^2) + 5k')
+        self.assert_batch_equals_evaluator('x || y + 1||2')
+        self.assert_batch_equals_evaluator('i * x + pi')
+        self.assert_batch_equals_evaluator('2^3^2')
+        self.assert_batch_equals_evaluator('X + Y', case_sensitive=False)
+        self.assert_batch_equals_evaluator('')
+
+    def test_batch_falls_back_on_errors(self):
+        # The parallel resistor operator gives NaN for a zero input.
+        self.assert_batch_equals_evaluator('x || 1', [{'x': 0.0}, {'x': 1.0}])
+        # numpy functions of python numbers give NaN outside of their domain.
+        self.assert_batch_equals_evaluator('sqrt(x)', [{'x': 4.0}, {'x': -1.0}])
+        # Factorial doesn't accept arrays.
+        self.assert_batch_equals_evaluator('fact(x)', [{'x': 3.0}, {'x': 4.0}])
+
+        with self.assertRaises(ZeroDivisionError):
+            calc.batch_evaluator([{'x': 1.0}, {'x': 0.0}], {}, '1/x')
+        with self.assertRaises(ValueError):
+            calc.batch_evaluator([{'x': 1.0}, {'x': -1.0}], {}, 'fact(x)')
+
+    def test_batch_undefined_vars(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.batch_evaluator(self.variables_list, {}, 'x + z')
@@ -16,6 +16,7 @@ This is used by capa_module.
 import logging
 import os.path
 import re
+import threading
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
@@ -69,8 +70,41 @@ html_problem_semantics = [
     "openendedrubric",
 ]
 
+# maximum number of parsed problem trees kept in memory, see _get_cached_problem_tree
+PROBLEM_TREE_CACHE_SIZE = 256
+
 log = logging.getLogger(__name__)
 
+_problem_trees = OrderedDict()
+_problem_trees_lock = threading.Lock()
+
+
+def _get_cached_problem_tree(problem_text):
+    """
+    Return a copy of the cached (problem_text, tree) for the given problem
+    text, as prepared by LoncapaProblem before any seed-dependent processing,
+    or None if it is not cached.
+    """
+    with _problem_trees_lock:
+        cached = _problem_trees.pop(problem_text, None)
+        if cached is None:
+            return None
+        # Move it to the end, as the most recently used.
+        _problem_trees[problem_text] = cached
+    converted_text, tree = cached
+    return converted_text, deepcopy(tree)
+
+
+def _cache_problem_tree(problem_text, converted_text, tree):
+    """
+    Cache a copy of the given tree, for the given problem text.
+    """
+    tree = deepcopy(tree)
+    with _problem_trees_lock:
+        _problem_trees[problem_text] = (converted_text, tree)
+        while len(_problem_trees) > PROBLEM_TREE_CACHE_SIZE:
+            _problem_trees.popitem(last=False)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -171,18 +205,13 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # Parsing the problem doesn't depend on the seed nor the student, so
+        # the parsed tree is cached and copied for each instance.
+        cached = _get_cached_problem_tree(problem_text)
+        if cached is not None:
+            self.problem_text, self.tree = cached
+        else:
+            self._parse_problem_text(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -214,6 +243,27 @@ class LoncapaProblem(object):
 
             self.extracted_tree = self._extract_html(self.tree)
 
+    def _parse_problem_text(self, problem_text):
+        """
+        Parse the problem text into self.tree, and cache the tree unless it
+        includes other files, which may change independently of the problem.
+        """
+        # Convert startouttext and endouttext to proper <text></text>
+        converted_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        converted_text = re.sub(r"endouttext\s*/", "/text", converted_text)
+        self.problem_text = converted_text
+
+        # parse problem XML file into an element tree
+        self.tree = etree.XML(converted_text)
+
+        self.make_xml_compatible(self.tree)
+
+        if self.tree.find('.//include') is None:
+            _cache_problem_tree(problem_text, converted_text, self.tree)
+        else:
+            # handle any <include file="foo"> tags
+            self._process_includes()
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -729,6 +779,12 @@ class LoncapaProblem(object):
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
 
+            # Code that doesn't refer to the student's id is executed without it, so
+            # that its cached results are shared by all students with the same seed.
+            uses_student_id = 'anonymous_student_id' in all_code
+            if not uses_student_id:
+                del context['anonymous_student_id']
+
             try:
                 safe_exec(
                     all_code,
@@ -745,6 +801,9 @@ class LoncapaProblem(object):
                 msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
                 raise responsetypes.LoncapaProblemError(msg)
 
+            if not uses_student_id:
+                context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
         context['python_path'] = python_path
@@ -0,0 +1,19 @@
+"""
+Django integration for the pool of sandboxed Python processes.
+"""
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .pool import configure_pool
+
+
+class ConfigureSandboxPoolMiddleware(object):
+    """
+    Configure the pool of sandboxed Python processes from the `pool` entry of
+    the CODE_JAIL setting, once, when Django starts.
+    """
+    def __init__(self):
+        pool = getattr(settings, 'CODE_JAIL', {}).get('pool', {})
+        configure_pool(pool.get('size', 0), pool.get('max_executions', 100))
+        raise MiddlewareNotUsed
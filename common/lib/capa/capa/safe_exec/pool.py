@@ -0,0 +1,451 @@
+"""
+A pool of pre-warmed sandbox processes for executing Python code.
+
+Executing code with codejail starts a new sandboxed Python process each
+time, which then imports the libraries that the code uses.  Instead, each
+worker of the pool starts a sandboxed Python process once, which imports
+the libraries and then waits for code to execute.  For each execution, the
+sandboxed process forks a child, which applies the codejail limits, executes
+the code and exits.  The code therefore never runs in the long-lived process,
+and can't affect later executions.
+
+A worker is replaced after a number of executions, and whenever its sandboxed
+process fails to respond.  Replacement workers are started in the background,
+so that executions don't wait for their sandboxed process to import the
+libraries.  Executions that the pool can't handle, such as those that need
+files from the host on their Python path, are handed to codejail.
+
+The pool is disabled until `configure_pool` is called with a positive size.
+"""
+
+import json
+import logging
+import os
+import select
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+
+log = logging.getLogger(__name__)
+
+# Seconds allowed, beyond the REALTIME limit of an execution, for a worker
+# to respond before it is considered broken.
+WORKER_RESPONSE_GRACE_PERIOD = 5
+
+# The code run by the sandboxed process of a worker.  It reads requests from
+# stdin, and writes responses to stdout, each framed by its length.
+WORKER_CODE = r'''
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+for module_name in json.loads(sys.argv[1]):
+    try:
+        __import__(module_name)
+    except Exception:
+        pass
+
+requests = os.fdopen(os.dup(0), "rb")
+responses = os.fdopen(os.dup(1), "wb")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(devnull, 1)
+
+
+def read_frame(stream):
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    length, = struct.unpack(">I", header)
+    return stream.read(length)
+
+
+def write_frame(stream, data):
+    stream.write(struct.pack(">I", len(data)) + data)
+    stream.flush()
+
+
+def jsonable(value):
+    if not isinstance(value, (type(None), bool, int, long, float, str, unicode, list, tuple, dict)):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
+def run_child(request, result_fd):
+    """Execute the requested code, in the forked child."""
+    os.setsid()
+    requests.close()
+    responses.close()
+
+    import random
+    random.seed()
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed()
+
+    home = tempfile.mkdtemp()
+    try:
+        os.chdir(home)
+        for name, content in request["extra_files"]:
+            with open(name, "wb") as extra_file:
+                extra_file.write(content.decode("base64"))
+        for path in request["python_path"]:
+            sys.path.insert(0, os.path.join(home, path))
+
+        limits = request["limits"]
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        if limits.get("CPU"):
+            resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+        if limits.get("VMEM"):
+            resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits.get("FSIZE", 0), limits.get("FSIZE", 0)))
+
+        globals_dict = request["globals_dict"]
+        try:
+            exec request["code"] in globals_dict
+        except Exception:
+            result = {"error": traceback.format_exc()}
+        else:
+            result = {"globals_dict": dict(
+                (key, value) for key, value in globals_dict.iteritems()
+                if key != "__builtins__" and jsonable(value)
+            )}
+        data = json.dumps(result)
+        while data:
+            data = data[os.write(result_fd, data):]
+    finally:
+        os.chdir("/")
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def execute(request):
+    """Execute the request in a forked child, and return the response."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            run_child(request, write_fd)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+
+    output = []
+    deadline = time.time() + request["limits"].get("REALTIME", 1)
+    timed_out = False
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+            timed_out = True
+            break
+        data = os.read(read_fd, 65536)
+        if not data:
+            break
+        output.append(data)
+    os.close(read_fd)
+
+    if timed_out:
+        os.killpg(pid, signal.SIGKILL)
+    _, status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(status):
+        return {"status": -os.WTERMSIG(status)}
+    if timed_out:
+        return {"status": -signal.SIGKILL}
+    if not output:
+        return {"status": 1, "error": "The code exited without a result"}
+    result = json.loads("".join(output))
+    result["status"] = 1 if "error" in result else 0
+    return result
+
+
+while True:
+    request = read_frame(requests)
+    if request is None:
+        break
+    write_frame(responses, json.dumps(execute(json.loads(request))))
+'''
+
+
+class SandboxWorkerError(Exception):
+    """
+    The sandboxed process of a worker failed to respond.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A sandboxed Python process, which imports the given modules, and then
+    forks a child to execute each request.
+    """
+    def __init__(self, preloaded_modules):
+        command = jail_code.COMMANDS["python"]
+        cmd = []
+        if command.get("user"):
+            cmd.extend(["sudo", "-u", command["user"]])
+        cmd.extend(command["cmdline_start"])
+        cmd.extend(["-c", WORKER_CODE, json.dumps(preloaded_modules)])
+
+        # As with codejail, the sandbox can only write to a tmp directory
+        # in a codejail-* directory.
+        self.home = tempfile.mkdtemp(prefix="codejail-")
+        os.chmod(self.home, 0o775)
+        os.mkdir(os.path.join(self.home, "tmp"))
+        os.chmod(os.path.join(self.home, "tmp"), 0o777)
+
+        with open(os.devnull, "wb") as devnull:
+            self.process = subprocess.Popen(
+                cmd,
+                cwd=self.home,
+                # As with the code prolog of safe_exec, BLAS libraries must
+                # not start threads (see TNL-6456), which the forked children
+                # can't do once RLIMIT_NPROC is applied.
+                env={"TMPDIR": "tmp", "OPENBLAS_NUM_THREADS": "1", "OMP_NUM_THREADS": "1"},
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull,
+                close_fds=True,
+                preexec_fn=os.setsid,
+            )
+        self.executions = 0
+
+    def execute(self, request, timeout):
+        """
+        Send the request to the sandboxed process, and return its response.
+        """
+        self.executions += 1
+        try:
+            data = json.dumps(request)
+            self.process.stdin.write(struct.pack(">I", len(data)) + data)
+            self.process.stdin.flush()
+            header = self._read(4, timeout)
+            length, = struct.unpack(">I", header)
+            return json.loads(self._read(length, timeout))
+        except (IOError, OSError, ValueError) as err:
+            raise SandboxWorkerError(err)
+
+    def _read(self, size, timeout):
+        """
+        Read size bytes from the sandboxed process, within the timeout.
+        """
+        deadline = time.time() + timeout
+        stdout = self.process.stdout.fileno()
+        chunks = []
+        while size > 0:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not select.select([stdout], [], [], remaining)[0]:
+                raise SandboxWorkerError("The sandboxed process did not respond in time")
+            chunk = os.read(stdout, size)
+            if not chunk:
+                raise SandboxWorkerError("The sandboxed process exited")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return "".join(chunks)
+
+    def close(self):
+        """
+        Stop the sandboxed process.
+        """
+        try:
+            self.process.stdin.close()
+            self.process.kill()
+            self.process.wait()
+        except (IOError, OSError):
+            pass
+        shutil.rmtree(self.home, ignore_errors=True)
+
+
+class SandboxPool(object):
+    """
+    A pool of `size` sandbox workers, each of which imports the
+    `preloaded_modules` and is replaced after `max_executions` executions.
+    """
+    def __init__(self, size, max_executions, preloaded_modules=()):
+        self.size = size
+        self.max_executions = max_executions
+        self.preloaded_modules = list(preloaded_modules)
+        self._idle_workers = []
+        # The number of workers, whether idle, executing or starting, and
+        # the number of those that are starting in the background.
+        self._workers = 0
+        self._starting = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._worker_started = threading.Condition(self._lock)
+        self._available = threading.BoundedSemaphore(size)
+        self._start_workers()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute code as `codejail.safe_exec.safe_exec` does, in a worker of the pool.
+        """
+        python_path = python_path or []
+        extra_files = extra_files or []
+        extra_file_names = set(name for name, _ in extra_files)
+        if any(path not in extra_file_names for path in python_path):
+            # Only codejail copies files from the host into the sandbox.
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+            )
+
+        limits = dict(jail_code.LIMITS)
+        request = {
+            "code": code,
+            "globals_dict": json_safe(globals_dict),
+            "python_path": python_path,
+            "extra_files": [(name, content.encode("base64")) for name, content in extra_files],
+            "limits": limits,
+        }
+
+        with self._available:
+            worker = self._get_worker()
+            try:
+                response = worker.execute(request, limits.get("REALTIME", 1) + WORKER_RESPONSE_GRACE_PERIOD)
+            except SandboxWorkerError:
+                log.exception("Sandbox worker failed executing %s, executing it with codejail", slug)
+                self._retire_worker(worker)
+                return codejail_safe_exec(
+                    code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+                )
+            # The code ran in a child of the worker, so the worker can be
+            # reused even if the code raised an exception or timed out.
+            self._release_worker(worker)
+
+        if response["status"] != 0:
+            raise SafeExecException(
+                "Couldn't execute jailed code: stdout: '', stderr: {!r} with status code: {}".format(
+                    str(response.get("error", "")), response["status"],
+                )
+            )
+        globals_dict.update(response["globals_dict"])
+
+    def _get_worker(self):
+        """
+        Return an idle worker, waiting for one if any are starting, or else
+        start a new one.
+        """
+        with self._lock:
+            while not self._idle_workers and self._starting:
+                self._worker_started.wait()
+            if self._idle_workers:
+                return self._idle_workers.pop()
+            self._workers += 1
+        try:
+            return SandboxWorker(self.preloaded_modules)
+        except Exception:
+            with self._lock:
+                self._workers -= 1
+            raise
+
+    def _release_worker(self, worker):
+        """
+        Return the worker to the pool, unless it should be replaced.
+        """
+        if self._closed or worker.executions >= self.max_executions:
+            self._retire_worker(worker)
+            return
+        with self._lock:
+            self._idle_workers.append(worker)
+
+    def _retire_worker(self, worker):
+        """
+        Stop the worker, and start its replacement in the background.
+        """
+        worker.close()
+        with self._lock:
+            self._workers -= 1
+        self._start_workers()
+
+    def _start_workers(self):
+        """
+        Start workers in the background until the pool is full.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            count = self.size - self._workers
+            self._workers += count
+            self._starting += count
+        for _ in range(count):
+            thread = threading.Thread(target=self._start_worker, name="sandbox-worker-starter")
+            thread.daemon = True
+            thread.start()
+
+    def _start_worker(self):
+        """
+        Start a worker, and add it to the idle workers.
+        """
+        try:
+            worker = SandboxWorker(self.preloaded_modules)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Couldn't start a sandbox worker")
+            worker = None
+        with self._lock:
+            self._starting -= 1
+            if worker is None or self._closed:
+                self._workers -= 1
+            else:
+                self._idle_workers.append(worker)
+            self._worker_started.notify_all()
+        if worker is not None and self._closed:
+            worker.close()
+
+    def close(self):
+        """
+        Stop all idle workers, and those starting once they have started.
+        """
+        with self._lock:
+            self._closed = True
+            workers, self._idle_workers = self._idle_workers, []
+        for worker in workers:
+            worker.close()
+
+
+_pool = None
+_pool_pid = None
+_pool_config = {"size": 0, "max_executions": 100}
+
+
+def configure_pool(size, max_executions=100):
+    """
+    Configure the pool of sandbox workers.  A size of 0 disables it.
+    """
+    global _pool  # pylint: disable=global-statement
+    _pool_config.update(size=size, max_executions=max_executions)
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def get_pool(preloaded_modules=()):
+    """
+    Return the pool of sandbox workers of this process, whose workers import
+    the `preloaded_modules`, or None if it is disabled or codejail isn't
+    configured.
+    """
+    global _pool, _pool_pid  # pylint: disable=global-statement
+    if _pool_config["size"] <= 0 or not jail_code.is_configured("python"):
+        return None
+    # Workers can't be shared with forked processes.
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = SandboxPool(_pool_config["size"], _pool_config["max_executions"], preloaded_modules)
+        _pool_pid = os.getpid()
+    return _pool
@@ -0,0 +1,114 @@
+"""
+A cache of safe_exec results, in front of a key-value cache.
+
+`safe_exec` already keys the results it caches by a hash of the code, the
+globals and the random seed.  This cache stores those results compactly,
+refuses entries that are too large, and reports its hits, misses, entry
+sizes, latency, and the execution time that each hit saved.
+"""
+
+import json
+import logging
+import threading
+import time
+import zlib
+
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# Formats of the stored payloads.
+JSON_FORMAT = "json"
+ZLIB_JSON_FORMAT = "zlib-json"
+
+# Maximum number of misses per thread whose results are awaited.
+MAX_PENDING_MISSES = 100
+
+
+class SafeExecResultCache(object):
+    """
+    A cache of safe_exec results, with the .get(key) and .set(key, value)
+    methods that `safe_exec` expects of its `cache` argument.
+
+    `cache` is the underlying cache, with .get(key) and .set(key, value)
+    methods.  Results whose serialized form is larger than
+    `compress_threshold` bytes are compressed, and results that are still
+    larger than `max_entry_size` bytes aren't cached.
+    """
+    def __init__(self, cache, max_entry_size=512 * 1024, compress_threshold=4 * 1024):
+        self.cache = cache
+        self.max_entry_size = max_entry_size
+        self.compress_threshold = compress_threshold
+        # The time of each miss in this thread, to measure the execution
+        # time of the result that is set for the missed key.
+        self._misses = threading.local()
+
+    def get(self, key):
+        """
+        Return the result cached for the key, or None.
+        """
+        with dog_stats_api.timer("capa.safe_exec.cache.get"):
+            entry = self.cache.get(key)
+        result = self._decode(key, entry)
+        if result is None:
+            dog_stats_api.increment("capa.safe_exec.cache.miss")
+            missed_keys = self._missed_keys()
+            if len(missed_keys) >= MAX_PENDING_MISSES:
+                # Results are not set for misses whose execution failed.
+                missed_keys.clear()
+            missed_keys[key] = time.time()
+            return None
+
+        value, execution_time = result
+        dog_stats_api.increment("capa.safe_exec.cache.hit")
+        if execution_time is not None:
+            dog_stats_api.histogram("capa.safe_exec.cache.time_saved", execution_time)
+        return value
+
+    def set(self, key, value):
+        """
+        Cache the result for the key, unless it is too large.
+        """
+        missed_at = self._missed_keys().pop(key, None)
+        execution_time = time.time() - missed_at if missed_at is not None else None
+
+        payload = json.dumps(value)
+        payload_format = JSON_FORMAT
+        if len(payload) > self.compress_threshold:
+            payload = zlib.compress(payload)
+            payload_format = ZLIB_JSON_FORMAT
+
+        dog_stats_api.histogram("capa.safe_exec.cache.entry_size", len(payload))
+        if len(payload) > self.max_entry_size:
+            dog_stats_api.increment("capa.safe_exec.cache.oversized")
+            log.info("Not caching the %d byte safe_exec result for %s", len(payload), key)
+            return
+
+        with dog_stats_api.timer("capa.safe_exec.cache.set"):
+            self.cache.set(key, (payload_format, payload, execution_time))
+
+    def _decode(self, key, entry):
+        """
+        Return the (value, execution_time) stored in the entry, or None if
+        the entry is missing or unreadable.
+        """
+        if entry is None:
+            return None
+        try:
+            payload_format, payload, execution_time = entry
+            if payload_format == ZLIB_JSON_FORMAT:
+                payload = zlib.decompress(payload)
+            elif payload_format != JSON_FORMAT:
+                raise ValueError("Unknown format {!r}".format(payload_format))
+            return json.loads(payload), execution_time
+        except (TypeError, ValueError, zlib.error):
+            log.warning("Ignoring unreadable cached safe_exec result for %s", key, exc_info=True)
+            return None
+
+    def _missed_keys(self):
+        """
+        Return the times of the misses in this thread, by key.
+        """
+        if not hasattr(self._misses, "times"):
+            self._misses.times = {}
+        return self._misses.times
@@ -4,6 +4,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .pool import get_pool
 from dogapi import dog_stats_api
 
 import hashlib
@@ -134,7 +135,8 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        pool = get_pool(modname for _, modname in ASSUMED_IMPORTS)
+        exec_fn = pool.safe_exec if pool else codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
@@ -0,0 +1,78 @@
+"""Test the cache of safe_exec results."""
+
+import os
+import unittest
+
+from codejail.safe_exec import SafeExecException
+
+from capa.safe_exec import safe_exec
+from capa.safe_exec.result_cache import JSON_FORMAT, ZLIB_JSON_FORMAT, SafeExecResultCache
+
+
+class TestSafeExecResultCache(unittest.TestCase):
+    def setUp(self):
+        super(TestSafeExecResultCache, self).setUp()
+        self.backing_cache = {}
+        self.cache = SafeExecResultCache(
+            BackingCache(self.backing_cache), max_entry_size=1000, compress_threshold=100,
+        )
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_small_result_not_compressed(self):
+        self.cache.set("key", [None, {"a": 17}])
+        self.assertEqual(self.backing_cache["key"][0], JSON_FORMAT)
+        self.assertEqual(self.cache.get("key"), [None, {"a": 17}])
+
+    def test_large_result_compressed(self):
+        value = [None, {"a": "x" * 5000}]
+        self.cache.set("key", value)
+        payload_format, payload, _ = self.backing_cache["key"]
+        self.assertEqual(payload_format, ZLIB_JSON_FORMAT)
+        self.assertLess(len(payload), 1000)
+        self.assertEqual(self.cache.get("key"), value)
+
+    def test_oversized_result_not_cached(self):
+        self.cache.set("key", [None, {"a": os.urandom(3000).encode("hex")}])
+        self.assertNotIn("key", self.backing_cache)
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_unreadable_entry_is_a_miss(self):
+        self.backing_cache["key"] = (None, {"a": 17})
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_execution_time_recorded(self):
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", [None, {}])
+        self.assertIsNotNone(self.backing_cache["key"][2])
+
+    def test_safe_exec_results(self):
+        g = {}
+        safe_exec("a = 17", g, cache=self.cache)
+        self.assertEqual(g["a"], 17)
+
+        g = {}
+        safe_exec("a = 17", g, cache=self.cache)
+        self.assertEqual(g["a"], 17)
+        self.assertEqual(len(self.backing_cache), 1)
+
+    def test_safe_exec_exceptions(self):
+        for _ in range(2):
+            with self.assertRaises(SafeExecException) as cm:
+                safe_exec("1/0", {}, cache=self.cache)
+            self.assertIn("ZeroDivisionError", cm.exception.message)
+        self.assertEqual(len(self.backing_cache), 1)
+
+
+class BackingCache(object):
+    """A cache over a simple dict, for testing."""
+
+    def __init__(self, d):
+        self.cache = d
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache[key] = value
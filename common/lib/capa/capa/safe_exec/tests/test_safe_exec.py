@@ -4,12 +4,16 @@ import hashlib
 import os
 import os.path
 import random
+import sys
 import textwrap
+import time
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
 from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec.pool import SandboxPool, SandboxWorker, SandboxWorkerError
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -235,6 +239,114 @@ class TestUpdateHash(unittest.TestCase):
         self.assertEqual(h1, h2)
 
 
+class TestSandboxPool(unittest.TestCase):
+    """
+    Test the pool of pre-warmed sandbox workers, with workers running the
+    current Python executable unsandboxed.
+    """
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        commands = {"python": {"cmdline_start": [sys.executable, "-E", "-B"], "user": None}}
+        patcher = patch.dict("codejail.jail_code.COMMANDS", commands)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = SandboxPool(size=1, max_executions=2, preloaded_modules=["math"])
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {"a": 17}
+        self.pool.safe_exec("import math\nb = a + int(math.sqrt(16))", g)
+        self.assertEqual(g["b"], 21)
+
+    def test_extra_files_on_python_path(self):
+        g = {}
+        self.pool.safe_exec(
+            "import constants\na = constants.FOO",
+            g,
+            python_path=["constants.py"],
+            extra_files=[("constants.py", "FOO = 42\n")],
+        )
+        self.assertEqual(g["a"], 42)
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", g)
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_numpy_linear_algebra(self):
+        self.pool.close()
+        self.pool = SandboxPool(size=1, max_executions=2, preloaded_modules=["numpy"])
+        self.addCleanup(self.pool.close)
+        g = {}
+        self.pool.safe_exec(
+            "import numpy\na = numpy.ones((200, 200))\ntotal = float(numpy.dot(a, a).sum())",
+            g,
+        )
+        self.assertEqual(g["total"], 200.0 ** 3)
+
+    def test_executions_dont_share_state(self):
+        g = {}
+        self.pool.safe_exec("import math\nmath.shared = 1", g)
+        self.pool.safe_exec("import math\nshared = hasattr(math, 'shared')", g)
+        self.assertFalse(g["shared"])
+
+    def test_worker_reused_until_max_executions(self):
+        pids = []
+        for _ in range(3):
+            g = {}
+            self.pool.safe_exec("import os\nppid = os.getppid()", g)
+            pids.append(g["ppid"])
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+
+    def test_worker_reused_after_exception(self):
+        g = {}
+        self.pool.safe_exec("import os\nppid = os.getppid()", g)
+        first_ppid = g["ppid"]
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("1/0", g)
+        self.pool.safe_exec("import os\nppid = os.getppid()", g)
+        self.assertEqual(g["ppid"], first_ppid)
+
+    @patch.dict("codejail.jail_code.LIMITS", {"CPU": 1, "REALTIME": 1})
+    def test_execution_timeout(self):
+        g = {}
+        self.pool.safe_exec("import os\nppid = os.getppid()", g)
+        first_ppid = g["ppid"]
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("import time\ntime.sleep(10)", g)
+        self.assertIn("status code: -9", cm.exception.message)
+        self.pool.safe_exec("import os\nppid = os.getppid()", g)
+        self.assertEqual(g["ppid"], first_ppid)
+
+    def test_workers_started_in_background(self):
+        worker = self._wait_for_idle_worker()
+        g = {}
+        self.pool.safe_exec("import os\nppid = os.getppid()", g)
+        self.assertEqual(g["ppid"], worker.process.pid)
+
+    def test_unresponsive_worker_replaced_in_background(self):
+        worker = self._wait_for_idle_worker()
+        with patch.object(SandboxWorker, "execute", side_effect=SandboxWorkerError):
+            with patch("capa.safe_exec.pool.codejail_safe_exec") as codejail_safe_exec:
+                self.pool.safe_exec("a = 17", {})
+        self.assertTrue(codejail_safe_exec.called)
+        self.assertIsNotNone(worker.process.poll())
+        self.assertIsNot(self._wait_for_idle_worker(), worker)
+
+    def _wait_for_idle_worker(self):
+        """
+        Wait for the pool to have an idle worker, and return it.
+        """
+        for _ in range(100):
+            with self.pool._lock:  # pylint: disable=protected-access
+                if self.pool._idle_workers:  # pylint: disable=protected-access
+                    return self.pool._idle_workers[0]  # pylint: disable=protected-access
+            time.sleep(0.1)
+        self.fail("No sandbox worker was started")
+
+
 class TestRealProblems(unittest.TestCase):
     def test_802x(self):
         code = textwrap.dedent("""\
@@ -4,9 +4,12 @@ Test capa problem.
 import ddt
 import textwrap
 from lxml import etree
+from mock import Mock, patch
 import unittest
+from uuid import uuid4
 
-from capa.tests.helpers import new_loncapa_problem
+from capa.capa_problem import LoncapaProblem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 
 
 @ddt.ddt
@@ -454,6 +457,35 @@ class CAPAProblemTest(unittest.TestCase):
         self.assert_question_tag(question1, question2, tag='label', label_attr=False)
         self.assert_question_tag(question1, question2, tag='p', label_attr=True)
 
+    @ddt.unpack
+    @ddt.data(
+        {'script': 'x = 2 ** 10', 'cached_results': 1},
+        {'script': 'x = anonymous_student_id.upper()', 'cached_results': 2},
+    )
+    def test_script_results_shared_by_students(self, script, cached_results):
+        """
+        Verify that the results of scripts that don't use the student's id
+        are cached once for all students.
+        """
+        xml = textwrap.dedent("""
+            <problem>
+                <script type="loncapa/python">{}</script>
+            </problem>
+        """).format(script)
+        cache = {}
+        problems = []
+        for student_id in ('student', 'other-student'):
+            capa_system = test_capa_system()
+            capa_system.anonymous_student_id = student_id
+            capa_system.cache = Mock(get=cache.get, set=cache.__setitem__)
+            problems.append(new_loncapa_problem(xml, capa_system=capa_system))
+
+        self.assertEqual(len(cache), cached_results)
+        self.assertEqual(
+            [problem.context['anonymous_student_id'] for problem in problems],
+            ['student', 'other-student'],
+        )
+
 
 @ddt.ddt
 class CAPAMultiInputProblemTest(unittest.TestCase):
@@ -590,3 +622,51 @@ class CAPAMultiInputProblemTest(unittest.TestCase):
             description_element = multi_inputs_group.xpath('//p[@id="{}"]'.format(description_id))
             self.assertEqual(len(description_element), 1)
             self.assertEqual(description_element[0].text, descriptions[index])
+
+
+class CAPAProblemTreeCacheTest(unittest.TestCase):
+    """ Tests for the cache of parsed problem trees """
+
+    def problem_xml(self, body=''):
+        """
+        Return the xml of a problem that is not yet cached.
+        """
+        return textwrap.dedent("""
+            <problem>
+                <p>{unique}</p>
+                {body}
+                <choiceresponse>
+                    <checkboxgroup>
+                        <choice correct="true">over-suspicious</choice>
+                        <choice correct="false">funny</choice>
+                    </checkboxgroup>
+                </choiceresponse>
+            </problem>
+        """).format(unique=uuid4().hex, body=body)
+
+    def new_problems(self, xml):
+        """
+        Create two problems with different seeds from the given xml,
+        and return them along with the number of times it was parsed.
+        """
+        with patch.object(
+            LoncapaProblem, '_parse_problem_text', autospec=True, side_effect=LoncapaProblem._parse_problem_text
+        ) as mock_parse:
+            problems = [new_loncapa_problem(xml, seed=1), new_loncapa_problem(xml, seed=2)]
+        return problems, mock_parse.call_count
+
+    def test_parsed_tree_cached(self):
+        (first, second), parse_count = self.new_problems(self.problem_xml())
+        self.assertEqual(parse_count, 1)
+        self.assertEqual(first.problem_text, second.problem_text)
+        self.assertEqual(etree.tostring(first.tree), etree.tostring(second.tree))
+
+        # Each problem has its own copy of the tree.
+        first.tree.find('.//p').text = 'changed'
+        self.assertNotEqual(second.tree.find('.//p').text, 'changed')
+        self.assertEqual(second.get_question_answers(), {'1_2_1': ['choice_0']})
+
+    def test_tree_with_includes_not_cached(self):
+        (first, second), parse_count = self.new_problems(self.problem_xml('<include file="test_include.xml"/>'))
+        self.assertEqual(parse_count, 2)
+        self.assertEqual(etree.tostring(first.tree), etree.tostring(second.tree))
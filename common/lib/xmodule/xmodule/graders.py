@@ -12,6 +12,7 @@ import sys
 from collections import OrderedDict
 from datetime import datetime
 
+import numpy
 from contracts import contract
 from pytz import UTC
 from django.utils.translation import ugettext_lazy as _
@@ -143,6 +144,51 @@ def aggregate_scores(scores):
     return all_total, graded_total
 
 
+def aggregate_score_arrays(earned, possible, graded):
+    """
+    Array-backed counterpart of aggregate_scores, for many learners at once.
+
+    earned: A (num_learners x num_problems) array of weighted earned values
+    possible: A (num_learners x num_problems) array of weighted possible values
+    graded: A boolean array of length num_problems of whether each problem is graded
+    returns: A tuple (all_earned, all_possible, graded_earned, graded_possible)
+        of arrays of length num_learners, holding the totals summed over all
+        problems and over graded problems only.
+
+    Unlike aggregate_scores, first_attempted dates are not aggregated.
+    """
+    earned = numpy.asarray(earned, dtype=float)
+    possible = numpy.asarray(possible, dtype=float)
+    graded = numpy.asarray(graded, dtype=bool)
+    return (
+        earned.sum(axis=1),
+        possible.sum(axis=1),
+        earned[:, graded].sum(axis=1),
+        possible[:, graded].sum(axis=1),
+    )
+
+
+def letter_grade_array(grade_cutoffs, percents):
+    """
+    Array-backed counterpart of CourseGrade._compute_letter_grade.
+
+    grade_cutoffs: A dict of letter grade to its minimum percent (e.g. {'A': 0.9, 'B': 0.8})
+    percents: An array of (rounded) course percents of length num_learners
+    returns: An object array of length num_learners holding each learner's
+        letter grade, or None if not passed.
+    """
+    percents = numpy.asarray(percents, dtype=float)
+    letter_grades = numpy.empty(len(percents), dtype=object)
+
+    # Assign letters in ascending order of cutoff, so that a learner ends up
+    # with the highest letter grade whose cutoff the learner's percent meets.
+    descending_grades = sorted(grade_cutoffs, key=lambda x: grade_cutoffs[x], reverse=True)
+    for possible_grade in reversed(descending_grades):
+        letter_grades[percents >= grade_cutoffs[possible_grade]] = possible_grade
+
+    return letter_grades
+
+
 def invalid_args(func, argdict):
     """
     Given a function and a dictionary of arguments, returns a set of arguments
@@ -242,6 +288,23 @@ class CourseGrader(object):
         '''Given a grade sheet, return a dict containing grading information'''
         raise NotImplementedError
 
+    def grade_array(self, score_arrays, num_learners):
+        """
+        Array-backed counterpart of grade, for many learners at once.
+
+        score_arrays is keyed by section format. Each value is a tuple of
+        (earned, possible) arrays of shape (num_learners x num_sections),
+        holding the graded totals of each learner for the sections that have
+        the matching section format. A section with a possible value of 0
+        is treated as missing from that learner's grade sheet.
+
+        The grader outputs a dictionary with the 'percent' key holding an array
+        of the learners' final percentages and, for graders that provide one,
+        the 'grade_breakdown' key holding a dict of arrays keyed by category.
+        Section breakdowns are not computed.
+        """
+        raise NotImplementedError
+
 
 class WeightedSubsectionsGrader(CourseGrader):
     """
@@ -290,6 +353,20 @@ class WeightedSubsectionsGrader(CourseGrader):
             'grade_breakdown': grade_breakdown
         }
 
+    def grade_array(self, score_arrays, num_learners):
+        total_percent = numpy.zeros(num_learners)
+        grade_breakdown = OrderedDict()
+
+        for subgrader, assignment_type, weight in self.subgraders:
+            weighted_percent = subgrader.grade_array(score_arrays, num_learners)['percent'] * weight
+            total_percent += weighted_percent
+            grade_breakdown[assignment_type] = weighted_percent
+
+        return {
+            'percent': total_percent,
+            'grade_breakdown': grade_breakdown,
+        }
+
 
 class AssignmentFormatGrader(CourseGrader):
     """
@@ -448,6 +525,35 @@ class AssignmentFormatGrader(CourseGrader):
             # No grade_breakdown here
         }
 
+    def grade_array(self, score_arrays, num_learners):
+        if self.type in score_arrays:
+            earned, possible = (numpy.asarray(array, dtype=float) for array in score_arrays[self.type])
+        else:
+            earned = possible = numpy.zeros((num_learners, 0))
+
+        # As in grade, sections missing from a learner's grade sheet are
+        # graded as 0, and placeholder sections of 0 are added up to min_count.
+        is_present = possible > 0
+        percents = numpy.zeros((num_learners, max(self.min_count, earned.shape[1])))
+        percents[:, :earned.shape[1]] = numpy.where(is_present, earned / numpy.where(is_present, possible, 1), 0)
+        section_counts = numpy.maximum(self.min_count, is_present.sum(axis=1))
+
+        # Since all percents are non-negative, dropping the lowest drop_count of
+        # a learner's section_count percents leaves the highest
+        # section_count - drop_count percents, irrespective of the extra zeros
+        # from padding the array.
+        kept_counts = section_counts - self.drop_count
+        total_percent = numpy.zeros(num_learners)
+        has_kept = kept_counts > 0
+        if percents.shape[1] and has_kept.any():
+            kept_sums = numpy.cumsum(-numpy.sort(-percents, axis=1), axis=1)
+            rows = numpy.arange(num_learners)[has_kept]
+            total_percent[has_kept] = kept_sums[rows, kept_counts[has_kept] - 1] / kept_counts[has_kept]
+
+        return {
+            'percent': total_percent,
+        }
+
 
 def _iter_graded(scores):
     """
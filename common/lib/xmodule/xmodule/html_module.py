@@ -21,7 +21,7 @@ from xmodule.edxnotes_utils import edxnotes
 from xmodule.html_checker import check_html
 from xmodule.stringify import stringify_children
 from xmodule.util.misc import escape_html_characters
-from xmodule.x_module import DEPRECATION_VSCOMPAT_EVENT, XModule
+from xmodule.x_module import DEPRECATION_VSCOMPAT_EVENT, XModule, module_attr
 from xmodule.xml_module import XmlDescriptor, name_to_pathname
 
 log = logging.getLogger("edx.courseware")
@@ -76,6 +76,15 @@ class HtmlBlock(object):
         """
         return Fragment(self.get_html())
 
+    @property
+    def has_cacheable_student_view(self):
+        """
+        Whether the student_view can be rendered once and shared between
+        users, which is the case unless the html is personalized with the
+        user's anonymous id.
+        """
+        return "%%USER_ID%%" not in self.data
+
     def get_html(self):
         """ Returns html required for rendering XModule. """
 
@@ -124,6 +133,10 @@ class HtmlDescriptor(HtmlBlock, XmlDescriptor, EditingDescriptor):  # pylint: di
     template_dir_name = "html"
     show_in_read_only_mode = True
 
+    # The student_view is rendered by the module, whose class may be
+    # decorated to personalize it, such as with the user's notes token.
+    has_cacheable_student_view = module_attr('has_cacheable_student_view')
+
     js = {'coffee': [resource_string(__name__, 'js/src/html/edit.coffee')]}
     js_module_name = "HTMLEditingDescriptor"
     css = {'scss': [resource_string(__name__, 'css/editor/edit.scss'), resource_string(__name__, 'css/html/edit.scss')]}
@@ -19,7 +19,7 @@ from abc import ABCMeta, abstractmethod
 from contracts import contract, new_contract
 from xblock.plugin import default_select
 
-from .exceptions import InvalidLocationError, InsufficientSpecificationError
+from .exceptions import InvalidLocationError, InsufficientSpecificationError, ItemNotFoundError
 from xmodule.errortracker import make_error_tracker
 from xmodule.assetstore import AssetMetadata
 from opaque_keys.edx.keys import CourseKey, UsageKey, AssetKey
@@ -1224,6 +1224,22 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
                 return course
         return None
 
+    def get_courses_by_key(self, course_keys, depth=0, **kwargs):
+        """
+        Returns a dict mapping each of the given course keys to its course descriptor,
+        or to None if not found.
+
+        Default impl--get_course for each key.  Modulestores which can fetch several
+        courses at once more efficiently override this.
+        """
+        courses = {}
+        for course_key in course_keys:
+            try:
+                courses[course_key] = self.get_course(course_key, depth=depth, **kwargs)
+            except ItemNotFoundError:
+                courses[course_key] = None
+        return courses
+
     def has_course(self, course_id, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
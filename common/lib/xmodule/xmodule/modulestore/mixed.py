@@ -378,6 +378,25 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except ItemNotFoundError:
             return None
 
+    @strip_key
+    def get_courses_by_key(self, course_keys, depth=0, **kwargs):
+        """
+        Returns a dict mapping each of the given course keys to its course module, or to
+        None if no such course exists.  The courses of each modulestore are fetched together.
+
+        :param course_keys: must be CourseKeys
+        """
+        keys_by_store = {}
+        for course_key in course_keys:
+            assert isinstance(course_key, CourseKey)
+            store = self._get_modulestore_for_courselike(course_key)
+            keys_by_store.setdefault(store, []).append(course_key)
+
+        courses = {}
+        for store, store_course_keys in keys_by_store.iteritems():
+            courses.update(store.get_courses_by_key(store_course_keys, depth=depth, **kwargs))
+        return courses
+
     @strip_key
     @contract(library_key='LibraryLocator')
     def get_library(self, library_key, depth=0, **kwargs):
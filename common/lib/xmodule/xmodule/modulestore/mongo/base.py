@@ -12,15 +12,17 @@ structure:
 }
 """
 
-import copy
+import cPickle as pickle
 from datetime import datetime
 from importlib import import_module
 import logging
 import pymongo
 import re
 import sys
+import zlib
 from uuid import uuid4
 
+from bson.binary import Binary
 from bson.son import SON
 from contracts import contract, new_contract
 from fs.osfs import OSFS
@@ -71,6 +73,11 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
     name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
 ))
 
+# The version of the persisted metadata inheritance index.  Incrementally
+# update this value whenever the format of the persisted trees changes, so
+# that previously persisted trees are ignored.
+INHERITANCE_INDEX_VERSION = 1
+
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
 
@@ -537,6 +544,10 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
     # If no name is specified for the asset metadata collection, this name is used.
     DEFAULT_ASSET_COLLECTION_NAME = 'assetstore'
 
+    # Suffix of the name of the collection which stores the persisted
+    # metadata inheritance index, appended to the name of the collection.
+    INHERITANCE_INDEX_COLLECTION_SUFFIX = '.inheritance_index'
+
     # TODO (cpennington): Enable non-filesystem filestores
     # pylint: disable=invalid-name
     # pylint: disable=attribute-defined-outside-init
@@ -548,9 +559,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                  user_service=None,
                  signal_handler=None,
                  retry_wait_time=0.1,
+                 persist_inheritance_index=False,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param persist_inheritance_index: whether to persist the computed metadata inheritance trees in mongo,
+            so that they need not be recomputed when missing from the metadata_inheritance_cache_subsystem.
         """
 
         super(MongoModuleStore, self).__init__(contentstore=contentstore, **kwargs)
@@ -578,7 +592,11 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 asset_collection = self.DEFAULT_ASSET_COLLECTION_NAME
             self.asset_collection = self.database[asset_collection]
 
+            # Collection which stores the persisted metadata inheritance trees.
+            self.inheritance_index = self.database[collection + self.INHERITANCE_INDEX_COLLECTION_SUFFIX]
+
         do_connection(**doc_store_config)
+        self.persist_inheritance_index = persist_inheritance_index
 
         if default_class is not None:
             module_path, _, class_name = default_class.rpartition('.')
@@ -630,8 +648,10 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             connection.drop_database(self.collection.database.proxied_object)
         elif collections:
             self.collection.drop()
+            self.inheritance_index.drop()
         else:
             self.collection.remove({})
+            self.inheritance_index.remove({})
 
         if connections:
             connection.close()
@@ -733,39 +753,115 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
+        # now traverse the tree and compute down the inherited metadata.  The traversal
+        # is iterative, and each container's metadata is merged into a new, shallow dict
+        # rather than deep-copied, since the values of the metadata are never modified.
         metadata_to_inherit = {}
+        if root is None:
+            return metadata_to_inherit
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
+        branch = self.get_branch_setting()
+        inherited_metadata_by_url = {root: results_by_url[root].get('metadata', {})}
+        urls_to_visit = [root]
+        while urls_to_visit:
+            url = urls_to_visit.pop()
+            my_metadata = inherited_metadata_by_url[url]
 
-            # go through all the children and recurse, but only if we have
+            # go through all the children, but only traverse those that are
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
+                if child in inherited_metadata_by_url:
+                    # already traversed from another parent
+                    continue
+                child_metadata = dict(my_metadata)
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
+                    child_metadata.update(results_by_url[child].get('metadata', {}))
+                    inherited_metadata_by_url[child] = child_metadata
+                    urls_to_visit.append(child)
                 # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
+                # we're piggybacking on this traversal to grab and cache the
+                # child's parent, as a performance optimization.  It replaces
+                # (rather than updates) the parent's own 'parent' entry, which
+                # is shared through the shallow copy above.
                 # The 'parent' key will be popped out of the dictionary during
                 # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
-
-        if root is not None:
-            _compute_inherited_metadata(root)
+                child_metadata['parent'] = {branch: url}
+                metadata_to_inherit[child] = child_metadata
 
         return metadata_to_inherit
 
+    def _inheritance_index_key(self, course_id):
+        """
+        Returns the id of the persisted metadata inheritance tree
+        for the given course and the current branch setting.
+        """
+        return SON([('course_id', unicode(course_id)), ('branch', self.get_branch_setting())])
+
+    def _get_course_subtree_edited_on(self, course_id):
+        """
+        Returns when the given course's subtree was last edited, which
+        identifies the version of the course's persisted inheritance tree.
+        """
+        course_location = course_id.make_usage_key('course', course_id.run)
+        course = self.collection.find_one(
+            {'_id': course_location.to_deprecated_son()},
+            {'edit_info.subtree_edited_on': 1},
+        )
+        return course.get('edit_info', {}).get('subtree_edited_on') if course else None
+
+    def _get_persisted_metadata_inheritance_tree(self, course_id):
+        """
+        Returns the persisted metadata inheritance tree for the given course,
+        or None if it was not persisted or is out of date.
+        """
+        index = self.inheritance_index.find_one({'_id': self._inheritance_index_key(course_id)})
+        if (
+                index is None or
+                index.get('version') != INHERITANCE_INDEX_VERSION or
+                index.get('subtree_edited_on') != self._get_course_subtree_edited_on(course_id)
+        ):
+            return None
+        return pickle.loads(zlib.decompress(index['tree']))
+
+    def _persist_metadata_inheritance_tree(self, course_id, tree, subtree_edited_on):
+        """
+        Persists the given metadata inheritance tree for the given course, as of
+        the given time its subtree was last edited.  The tree is pickled since
+        its keys, being block urls, are not valid mongo field names.
+        """
+        try:
+            self.inheritance_index.update(
+                {'_id': self._inheritance_index_key(course_id)},
+                {
+                    'version': INHERITANCE_INDEX_VERSION,
+                    'subtree_edited_on': subtree_edited_on,
+                    'tree': Binary(zlib.compress(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))),
+                },
+                upsert=True,
+            )
+        except pymongo.errors.PyMongoError:
+            # The index is only an optimization; the tree is recomputed
+            # whenever it is not found.
+            log.warning(u'Failed to persist the metadata inheritance tree of %s', course_id, exc_info=True)
+
+    def _restamp_persisted_metadata_inheritance_trees(self, course_id, previous_subtree_edited_on, subtree_edited_on):
+        """
+        Marks the persisted inheritance trees of the given course, for all branches, as
+        up to date as of the given subtree_edited_on, for edits that do not affect the
+        trees.  Trees that were already out of date before these edits are left as is.
+        """
+        if previous_subtree_edited_on is None:
+            return
+        self.inheritance_index.update(
+            {
+                '_id.course_id': unicode(course_id),
+                'version': INHERITANCE_INDEX_VERSION,
+                'subtree_edited_on': previous_subtree_edited_on,
+            },
+            {'$set': {'subtree_edited_on': subtree_edited_on}},
+            multi=True,
+        )
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
@@ -787,14 +883,27 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                     OK in localdev and testing environment. Not OK in production.'
                 )
 
+            # then look in the persisted index, if enabled
+            if not tree and self.persist_inheritance_index:
+                tree = self._get_persisted_metadata_inheritance_tree(course_id)
+                if tree and self.metadata_inheritance_cache_subsystem is not None:
+                    self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+
         if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
+            # if not in subsystem, or we are on force refresh, then we have to compute.
+            # The version of the course is read before computing, so that edits made
+            # while computing leave the persisted tree out of date.
+            if self.persist_inheritance_index:
+                subtree_edited_on = self._get_course_subtree_edited_on(course_id)
             tree = self._compute_metadata_inheritance_tree(course_id)
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
             if self.metadata_inheritance_cache_subsystem is not None:
                 self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
 
+            if self.persist_inheritance_index:
+                self._persist_metadata_inheritance_tree(course_id, tree, subtree_edited_on)
+
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
@@ -1520,6 +1629,16 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         """
         course_key = xblock.location.course_key
 
+        # Edits of blocks without children cannot affect the metadata inheritance
+        # tree, so rather than recomputing it, the persisted tree is kept up to date.
+        restamp_inheritance_index = (
+            self.persist_inheritance_index and
+            not xblock.has_children and
+            not self._is_in_bulk_operation(course_key)
+        )
+        if restamp_inheritance_index:
+            previous_subtree_edited_on = self._get_course_subtree_edited_on(course_key.for_branch(None))
+
         try:
             definition_data = self._serialize_scope(xblock, Scope.content)
             now = datetime.now(UTC)
@@ -1566,7 +1685,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            if restamp_inheritance_index:
+                self._restamp_persisted_metadata_inheritance_trees(
+                    course_key.for_branch(None), previous_subtree_edited_on, now,
+                )
+            else:
+                self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
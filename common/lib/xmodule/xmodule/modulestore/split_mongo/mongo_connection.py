@@ -4,10 +4,12 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 import datetime
 import cPickle as pickle
 import math
+import threading
 import zlib
 import pymongo
 import pytz
 import re
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -15,6 +17,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -225,6 +228,91 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class ProcessStructureCache(object):
+    """
+    A per-process LRU cache of uncompressed pickled course structures, bounded
+    by their total size.
+
+    Structures are keyed by their immutable version guids, so cached entries
+    never need to be invalidated.  They are kept pickled, rather than
+    deserialized, since the modulestore modifies the structures it reads,
+    so each caller needs its own copy.
+    """
+    def __init__(self, max_size=0):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the pickled structure cached for the given key, or None if not found.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, structure, size):
+        """
+        Caches the given pickled structure of the given size, evicting the
+        least recently used structures as needed.  Returns the number of evicted
+        structures.
+        """
+        if size > self.max_size:
+            return 0
+
+        with self._lock:
+            previous_entry = self._entries.pop(key, None)
+            if previous_entry is not None:
+                self._size -= previous_entry[1]
+            self._entries[key] = (structure, size)
+            self._size += size
+            return self._evict()
+
+    def resize(self, max_size):
+        """
+        Updates the maximum size of the cache, evicting structures as needed.
+        """
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        """
+        Removes all structures from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self):
+        """
+        The total size of all cached structures.
+        """
+        return self._size
+
+    def _evict(self):
+        """
+        Evicts the least recently used structures until the cache fits within
+        its maximum size.  Returns the number of evicted structures.
+        """
+        evictions = 0
+        while self._size > self.max_size and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            evictions += 1
+        return evictions
+
+
+# The structures cached by this process, shared across CourseStructureCache
+# instances.  Disabled unless COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE is set.
+PROCESS_STRUCTURE_CACHE = ProcessStructureCache()
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
@@ -232,21 +320,38 @@ class CourseStructureCache(object):
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
+
+    If the COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE setting is set, structures
+    are also kept uncompressed in a per-process LRU cache of that many bytes,
+    which is checked before the django cache.
     """
     def __init__(self):
         self.cache = None
+        self.process_cache = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
 
+            process_cache_max_size = getattr(settings, 'COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE', 0)
+            if self.cache is not None and process_cache_max_size:
+                if PROCESS_STRUCTURE_CACHE.max_size != process_cache_max_size:
+                    PROCESS_STRUCTURE_CACHE.resize(process_cache_max_size)
+                self.process_cache = PROCESS_STRUCTURE_CACHE
+
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
+            if self.process_cache is not None:
+                pickled_data = self.process_cache.get(key)
+                tagger.tag(from_process_cache=str(pickled_data is not None).lower())
+                if pickled_data is not None:
+                    return pickle.loads(pickled_data)
+
             compressed_pickled_data = self.cache.get(key)
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
@@ -260,6 +365,7 @@ class CourseStructureCache(object):
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
+            self._set_in_process_cache(key, pickled_data, tagger)
             return pickle.loads(pickled_data)
 
     def set(self, key, structure, course_context=None):
@@ -277,6 +383,72 @@ class CourseStructureCache(object):
 
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
+            self._set_in_process_cache(key, pickled_data, tagger)
+
+    def get_many(self, keys, course_context=None):
+        """
+        Pull the compressed, pickled struct data for all of the given keys from
+        cache in a single round trip and deserialize it.  Returns a dict of the
+        structures found, by key.
+        """
+        if self.cache is None:
+            return {}
+
+        with TIMER.timer("CourseStructureCache.get_many", course_context) as tagger:
+            tagger.measure('requested_keys', len(keys))
+            structures = {}
+            if self.process_cache is not None:
+                for key in keys:
+                    pickled_data = self.process_cache.get(key)
+                    if pickled_data is not None:
+                        structures[key] = pickle.loads(pickled_data)
+                tagger.measure('process_cache_hits', len(structures))
+
+            missing_keys = [key for key in keys if key not in structures]
+            compressed_pickled_data_by_key = self.cache.get_many(missing_keys) if missing_keys else {}
+            tagger.measure('cache_hits', len(compressed_pickled_data_by_key))
+
+            for key, compressed_pickled_data in compressed_pickled_data_by_key.iteritems():
+                pickled_data = zlib.decompress(compressed_pickled_data)
+                self._set_in_process_cache(key, pickled_data, tagger)
+                structures[key] = pickle.loads(pickled_data)
+
+            if len(structures) < len(keys):
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+            return structures
+
+    def set_many(self, structures, course_context=None):
+        """
+        Given a dict of structures by key, will pickle, compress, and write
+        them all to cache in a single round trip.
+        """
+        if self.cache is None or not structures:
+            return None
+
+        with TIMER.timer("CourseStructureCache.set_many", course_context) as tagger:
+            compressed_pickled_data_by_key = {}
+            for key, structure in structures.iteritems():
+                pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+                # 1 = Fastest (slightly larger results)
+                compressed_pickled_data_by_key[key] = zlib.compress(pickled_data, 1)
+                self._set_in_process_cache(key, pickled_data, tagger)
+            tagger.measure('structures', len(compressed_pickled_data_by_key))
+
+            # Stuctures are immutable, so we set a timeout of "never"
+            self.cache.set_many(compressed_pickled_data_by_key, None)
+
+    def _set_in_process_cache(self, key, pickled_data, tagger):
+        """
+        Adds the given pickled structure to the per-process cache, if enabled,
+        and records the resulting evictions and cache size with the given tagger.
+        """
+        if self.process_cache is None:
+            return
+
+        evictions = self.process_cache.set(key, pickled_data, len(pickled_data))
+        tagger.measure('process_cache_evictions', evictions)
+        tagger.measure('process_cache_size', self.process_cache.size)
 
 
 class MongoConnection(object):
@@ -344,6 +516,40 @@ class MongoConnection(object):
 
             return structure
 
+    @autoretry_read()
+    def get_structures(self, keys, course_context=None):
+        """
+        Get the structures from the persistence mechanism whose ids are the given keys.
+
+        Cached versions of the structures are used where available, and all other
+        structures are fetched in a single query.  Returns a dict of the structures
+        found, by id.
+        """
+        with TIMER.timer("get_structures", course_context) as tagger:
+            tagger.measure("requested_ids", len(keys))
+            cache = CourseStructureCache()
+
+            structures = cache.get_many(keys, course_context)
+            missing_keys = [key for key in keys if key not in structures]
+            tagger.measure("cache_misses", len(missing_keys))
+            if missing_keys:
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+
+                fetched_structures = {
+                    doc['_id']: structure_from_mongo(doc, course_context)
+                    for doc in self.structures.find({'_id': {'$in': missing_keys}})
+                }
+                if len(fetched_structures) < len(missing_keys):
+                    log.warning(
+                        "docs were None when attempting to retrieve structures with keys %s",
+                        [unicode(key) for key in missing_keys if key not in fetched_structures]
+                    )
+                cache.set_many(fetched_structures, course_context)
+                structures.update(fetched_structures)
+
+            return structures
+
     @autoretry_read()
     def find_structures_by_id(self, ids, course_context=None):
         """
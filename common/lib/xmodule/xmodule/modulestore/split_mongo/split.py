@@ -340,6 +340,33 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             version_guid = course_key.as_object_id(version_guid)
             return self.db_connection.get_structure(version_guid, course_key)
 
+    def get_structures(self, version_guids):
+        """
+        Given a dict mapping course keys to the version_guids of their structures, returns
+        a dict mapping those course keys to their structures, respecting the current bulk
+        operation status of each course.  Structures that are not found are omitted.
+
+        The structures of all courses outside of a bulk operation are fetched together.
+        """
+        structures = {}
+        db_version_guids = {}
+        for course_key, version_guid in version_guids.iteritems():
+            if self._get_bulk_ops_record(course_key).active:
+                structure = self.get_structure(course_key, version_guid)
+                if structure is not None:
+                    structures[course_key] = structure
+            else:
+                # cast string to ObjectId if necessary
+                db_version_guids[course_key] = course_key.as_object_id(version_guid)
+
+        if db_version_guids:
+            db_structures = self.db_connection.get_structures(list(set(db_version_guids.itervalues())))
+            for course_key, version_guid in db_version_guids.iteritems():
+                if version_guid in db_structures:
+                    structures[course_key] = db_structures[version_guid]
+
+        return structures
+
     def update_structure(self, course_key, structure):
         """
         Update a course structure, respecting the current bulk operation status
@@ -915,6 +942,48 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # add it in the envelope for the structure.
         return CourseEnvelope(course_key.replace(version_guid=version_guid), entry)
 
+    def _lookup_courses(self, course_keys):
+        """
+        Decode each of the given locators as _lookup_course does, but with the course
+        indexes of all of them fetched in a single query and their structures fetched
+        together.
+
+        Returns a dict mapping each of the given course keys whose course is found to
+        its CourseEnvelope.
+        """
+        version_guids = {}
+        index_course_keys = []
+        for course_key in course_keys:
+            if course_key.org and course_key.course and course_key.run:
+                if course_key.branch is None:
+                    raise InsufficientSpecificationError(course_key)
+                index_course_keys.append(course_key)
+            elif course_key.version_guid is None:
+                raise InsufficientSpecificationError(course_key)
+            else:
+                version_guids[course_key] = course_key.version_guid
+
+        if index_course_keys:
+            indexes = {
+                (index['org'], index['course'], index['run']): index
+                for index in self.find_matching_course_indexes(course_keys=index_course_keys)
+            }
+            for course_key in index_course_keys:
+                index = indexes.get((course_key.org, course_key.course, course_key.run))
+                if index is None or course_key.branch not in index['versions']:
+                    continue
+
+                version_guid = index['versions'][course_key.branch]
+                if course_key.version_guid is not None and version_guid != course_key.version_guid:
+                    raise VersionConflictError(course_key, version_guid)
+                version_guids[course_key] = version_guid
+
+        structures = self.get_structures(version_guids)
+        return {
+            course_key: CourseEnvelope(course_key.replace(version_guid=version_guids[course_key]), structure)
+            for course_key, structure in structures.iteritems()
+        }
+
     def _get_course_blocks_for_branch(self, branch, **kwargs):
         """
         Internal generator for fetching lists of courses without loading them.
@@ -1106,6 +1175,25 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(course_id)
         return self._get_structure(course_id, depth, **kwargs)
 
+    def get_courses_by_key(self, course_keys, depth=0, **kwargs):
+        """
+        Gets the course descriptors for all of the given locators, looking up their
+        course indexes in a single query and fetching their structures together.
+
+        Returns a dict mapping each of the given course keys to its course descriptor,
+        or to None if the course is not found.
+        """
+        courses = dict.fromkeys(course_keys)
+        structure_entries = self._lookup_courses([
+            course_key for course_key in course_keys
+            # Keys of the wrong type can't possibly be stored in this modulestore.
+            if isinstance(course_key, CourseLocator) and not course_key.deprecated
+        ])
+        for course_key, structure_entry in structure_entries.iteritems():
+            root = structure_entry.structure['root']
+            courses[course_key] = self._load_items(structure_entry, [root], depth, **kwargs)[0]
+        return courses
+
     def get_library(self, library_id, depth=0, head_validation=True, **kwargs):
         """
         Gets the 'library' root block for the library identified by the locator
@@ -57,6 +57,22 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         course_id = self._map_revision_to_branch(course_id)
         return super(DraftVersioningModuleStore, self).get_course(course_id, depth=depth, **kwargs)
 
+    def get_courses_by_key(self, course_keys, depth=0, **kwargs):
+        """
+        See :py:meth: xmodule.modulestore.split_mongo.split.SplitMongoModuleStore.get_courses_by_key
+        """
+        branch_course_keys = {
+            course_key: self._map_revision_to_branch(course_key)
+            for course_key in course_keys
+        }
+        courses = super(DraftVersioningModuleStore, self).get_courses_by_key(
+            list(set(branch_course_keys.itervalues())), depth=depth, **kwargs
+        )
+        return {
+            course_key: courses[branch_course_key]
+            for course_key, branch_course_key in branch_course_keys.iteritems()
+        }
+
     def get_library(self, library_id, depth=0, head_validation=True, **kwargs):
         if not head_validation and library_id.version_guid:
             return SplitMongoModuleStore.get_library(
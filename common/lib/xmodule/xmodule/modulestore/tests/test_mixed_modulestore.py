@@ -1095,6 +1095,22 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
             course = self.store.get_item(self.course_locations[self.MONGO_COURSEID])
             self.assertEqual(course.id, self.course_locations[self.MONGO_COURSEID].course_key)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_get_courses_by_key(self, default_ms):
+        """
+        Test that get_courses_by_key fetches courses from all modulestores.
+        """
+        self.initdb(default_ms)
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            split_course = self.store.create_course('org', 'split_course', 'run', self.user_id)
+        course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        missing_course_key = course_key.replace(course='nosuchcourse')
+
+        courses = self.store.get_courses_by_key([course_key, split_course.id, missing_course_key])
+        self.assertEqual(courses[course_key].id, course_key)
+        self.assertEqual(courses[split_course.id].id, split_course.id)
+        self.assertIsNone(courses[missing_course_key])
+
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
     def test_get_library(self, default_ms):
         """
@@ -40,7 +40,7 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, as_published
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import LocationMixin, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
@@ -710,6 +710,56 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def _create_inheritance_course(self):
+        """
+        Creates a course with a graded sequential containing an html block.
+        Returns the course, the sequential and the html block.
+        """
+        course = self.draft_store.create_course("TestX", "Inheritance", uuid4().hex, self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+        sequential = self.draft_store.create_child(
+            self.dummy_user, chapter.location, "sequential", fields={'graded': True},
+        )
+        html = self.draft_store.create_child(self.dummy_user, sequential.location, "html")
+        return course, sequential, html
+
+    def test_compute_metadata_inheritance_tree(self):
+        course, sequential, html = self._create_inheritance_course()
+        tree = self.draft_store._compute_metadata_inheritance_tree(course.id)
+        html_metadata = tree[unicode(as_published(html.location))]
+        self.assertTrue(html_metadata['graded'])
+        self.assertEqual(html_metadata['parent'], {
+            ModuleStoreEnum.Branch.draft_preferred: unicode(as_published(sequential.location)),
+        })
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
+    def test_persisted_inheritance_tree(self):
+        course, _, _ = self._create_inheritance_course()
+        with patch.object(self.draft_store, 'persist_inheritance_index', True):
+            tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id, force_refresh=True)
+            with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as mock_compute:
+                self.assertEqual(self.draft_store._get_cached_metadata_inheritance_tree(course.id), tree)
+                self.assertFalse(mock_compute.called)
+
+            # edits to the course outside of update_item leave the persisted tree out of date
+            self.draft_store._update_single_item(
+                course.location, {'edit_info.subtree_edited_on': datetime.now(UTC)},
+            )
+            self.assertIsNone(self.draft_store._get_persisted_metadata_inheritance_tree(course.id))
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
+    def test_persisted_inheritance_tree_leaf_update(self):
+        course, _, html = self._create_inheritance_course()
+        with patch.object(self.draft_store, 'persist_inheritance_index', True):
+            tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id, force_refresh=True)
+            html = self.draft_store.get_item(html.location)
+            html.display_name = 'Updated'
+            with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as mock_compute:
+                self.draft_store.update_item(html, self.dummy_user)
+                self.assertFalse(mock_compute.called)
+            self.assertEqual(self.draft_store._get_persisted_metadata_inheritance_tree(course.id), tree)
+        self.draft_store.delete_course(course.id, self.dummy_user)
+
     def test_make_course_usage_key(self):
         """Test that we get back the appropriate usage key for the root of a course key."""
         course_key = CourseLocator(org="edX", course="101", run="2015")
@@ -14,6 +14,7 @@ import ddt
 from contracts import contract
 from nose.plugins.attrib import attr
 from django.core.cache import caches, InvalidCacheBackendError
+from django.test.utils import override_settings
 
 from openedx.core.lib import tempdir
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -32,6 +33,7 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import PROCESS_STRUCTURE_CACHE
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import mock_tab_from_json
@@ -757,6 +759,33 @@ class SplitModuleCourseTests(SplitModuleTest):
         with self.assertRaises(ItemNotFoundError):
             modulestore().get_course(CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_PUBLISHED))
 
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_get_courses_by_key(self, _from_json):
+        head_locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        head_course = modulestore().get_course(head_locator)
+        locators = [
+            head_locator,
+            CourseLocator(version_guid=head_course.previous_version),
+            CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_PUBLISHED),
+            CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_DRAFT),
+        ]
+        missing_locators = [
+            CourseLocator(org='edu', course='nosuchthing', run="run", branch=BRANCH_NAME_DRAFT),
+            CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_PUBLISHED),
+        ]
+
+        courses = modulestore().get_courses_by_key(locators + missing_locators)
+        self.assertItemsEqual(courses.keys(), locators + missing_locators)
+        for locator in locators:
+            expected_course = modulestore().get_course(locator)
+            self.assertEqual(courses[locator].location, expected_course.location)
+            self.assertEqual(courses[locator].display_name, expected_course.display_name)
+        for locator in missing_locators:
+            self.assertIsNone(courses[locator])
+
+        with self.assertRaises(InsufficientSpecificationError):
+            modulestore().get_courses_by_key([CourseLocator(org='edu', course='meh', run='blah')])
+
     @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
     def test_cache(self, _from_json):
         """
@@ -987,6 +1016,48 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_process_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        self.addCleanup(PROCESS_STRUCTURE_CACHE.clear)
+
+        with override_settings(COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE=10 * 1024 * 1024):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # the structure is served from the process cache, without
+            # reading or deserializing it from the django cache
+            with patch.object(self.cache, 'get') as mock_cache_get:
+                with check_mongo_calls(0):
+                    cached_structure = self._get_structure(self.new_course)
+                self.assertFalse(mock_cache_get.called)
+
+            # each read gets its own copy of the structure, which it can modify
+            cached_structure['blocks'].clear()
+            self.assertEqual(self._get_structure(self.new_course), not_cached_structure)
+
+        self.assertEqual(cached_structure['_id'], not_cached_structure['_id'])
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_cache_many(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        other_course = modulestore().create_course(
+            'org', 'other_course', 'test_run', self.user, BRANCH_NAME_DRAFT,
+        )
+        version_guids = [
+            course.location.as_object_id(course.location.version_guid)
+            for course in (self.new_course, other_course)
+        ]
+
+        # all missing structures are fetched in a single query
+        with check_mongo_calls(1):
+            not_cached_structures = modulestore().db_connection.get_structures(version_guids)
+        self.assertItemsEqual(not_cached_structures.keys(), version_guids)
+
+        with check_mongo_calls(0):
+            cached_structures = modulestore().db_connection.get_structures(version_guids)
+        self.assertEqual(cached_structures, not_cached_structures)
+
     def test_dummy_cache(self):
         with check_mongo_calls(1):
             not_cached_structure = self._get_structure(self.new_course)
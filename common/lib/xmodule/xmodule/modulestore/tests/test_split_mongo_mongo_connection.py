@@ -1,7 +1,7 @@
 """ Test the behavior of split_mongo/MongoConnection """
 import unittest
 from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, ProcessStructureCache
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -17,3 +17,46 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestProcessStructureCache(unittest.TestCase):
+    """ Test the size-bounded LRU behavior of ProcessStructureCache """
+    def setUp(self):
+        super(TestProcessStructureCache, self).setUp()
+        self.cache = ProcessStructureCache(max_size=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.set('a', {'_id': 'a'}, 4), 0)
+        self.assertEqual(self.cache.get('a'), {'_id': 'a'})
+        self.assertEqual(self.cache.size, 4)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', 'structure a', 4)
+        self.cache.set('b', 'structure b', 4)
+        self.cache.get('a')
+        self.assertEqual(self.cache.set('c', 'structure c', 4), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 'structure a')
+        self.assertEqual(self.cache.get('c'), 'structure c')
+        self.assertEqual(self.cache.size, 8)
+
+    def test_oversized_structure_not_cached(self):
+        self.assertEqual(self.cache.set('a', 'structure a', 11), 0)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_replace_existing_key(self):
+        self.cache.set('a', 'structure a', 4)
+        self.cache.set('a', 'structure a', 6)
+        self.assertEqual(self.cache.size, 6)
+
+    def test_resize_and_clear(self):
+        self.cache.set('a', 'structure a', 4)
+        self.cache.set('b', 'structure b', 4)
+        self.cache.resize(5)
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.size, 4)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.size, 0)
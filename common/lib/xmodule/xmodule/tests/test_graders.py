@@ -2,14 +2,16 @@
 Grading tests
 """
 
+import random
 import unittest
 from datetime import datetime, timedelta
 
 import ddt
+import numpy
 from pytz import UTC
 from xmodule import graders
 from xmodule.graders import (
-    AggregatedScore, ProblemScore, ShowCorrectness, aggregate_scores
+    AggregatedScore, ProblemScore, ShowCorrectness, aggregate_score_arrays, aggregate_scores, letter_grade_array
 )
 
 
@@ -319,6 +321,111 @@ class GraderTest(unittest.TestCase):
         self.assertIn(expected_error_message, error.exception.message)
 
 
+class GraderArrayTest(unittest.TestCase):
+    """
+    Tests that the array-backed grading path matches the object path
+    """
+    FORMATS = {'Homework': 6, 'Lab': 4, 'Midterm': 1}
+
+    def setUp(self):
+        super(GraderArrayTest, self).setUp()
+        random.seed(1)
+        self.num_learners = 25
+
+        # Subsections whose possible value is 0 are missing from the learner's
+        # grade sheet, as in CourseGrade.graded_subsections_by_format.
+        self.score_arrays = {}
+        for section_format, num_sections in self.FORMATS.iteritems():
+            earned = numpy.zeros((self.num_learners, num_sections))
+            possible = numpy.zeros((self.num_learners, num_sections))
+            for learner in range(self.num_learners):
+                for section in range(num_sections):
+                    if random.random() < 0.8:
+                        possible[learner, section] = random.randint(1, 10)
+                        earned[learner, section] = random.randint(0, int(possible[learner, section]))
+            self.score_arrays[section_format] = (earned, possible)
+
+    def _grade_sheet(self, learner):
+        """
+        Returns the grade sheet of the given learner, for the object path.
+        """
+        grade_sheet = {}
+        for section_format, (earned, possible) in self.score_arrays.iteritems():
+            grade_sheet[section_format] = {}
+            for section in range(earned.shape[1]):
+                if possible[learner, section] > 0:
+                    grade_sheet[section_format][section] = GraderTest.MockGrade(
+                        AggregatedScore(
+                            tw_earned=earned[learner, section],
+                            tw_possible=possible[learner, section],
+                            graded=True,
+                            first_attempted=None,
+                        ),
+                        display_name=u'section {}'.format(section),
+                    )
+        return grade_sheet
+
+    def _assert_matches_object_path(self, grader):
+        """
+        Asserts the array path of the given grader computes the same
+        results as its object path for every learner.
+        """
+        array_result = grader.grade_array(self.score_arrays, self.num_learners)
+        for learner in range(self.num_learners):
+            object_result = grader.grade(self._grade_sheet(learner))
+            self.assertAlmostEqual(array_result['percent'][learner], object_result['percent'])
+            for category, breakdown in object_result.get('grade_breakdown', {}).iteritems():
+                self.assertAlmostEqual(array_result['grade_breakdown'][category][learner], breakdown['percent'])
+
+    def test_assignment_format_grader(self):
+        for min_count, drop_count in [(0, 0), (4, 0), (6, 2), (10, 3), (2, 6), (3, 1)]:
+            self._assert_matches_object_path(graders.AssignmentFormatGrader("Homework", min_count, drop_count))
+
+    def test_missing_format(self):
+        grader = graders.AssignmentFormatGrader("Final", 1, 0)
+        self._assert_matches_object_path(grader)
+        self.assertEqual(list(grader.grade_array({}, 3)['percent']), [0.0] * 3)
+
+    def test_weighted_subsections_grader(self):
+        self._assert_matches_object_path(graders.grader_from_conf([
+            {'type': "Homework", 'min_count': 8, 'drop_count': 2, 'weight': 0.25},
+            {'type': "Lab", 'min_count': 4, 'drop_count': 1, 'weight': 0.25},
+            {'type': "Midterm", 'min_count': 1, 'drop_count': 0, 'weight': 0.5},
+        ]))
+        self._assert_matches_object_path(graders.grader_from_conf([]))
+
+    def test_aggregate_score_arrays(self):
+        earned = numpy.array([[1, 2, 3], [0, 0, 4]])
+        possible = numpy.array([[1, 4, 5], [2, 2, 4]])
+        graded = [True, False, True]
+        arrays = aggregate_score_arrays(earned, possible, graded)
+        for learner in range(2):
+            scores = [
+                ProblemScore(
+                    raw_earned=earned[learner, problem],
+                    raw_possible=possible[learner, problem],
+                    weighted_earned=earned[learner, problem],
+                    weighted_possible=possible[learner, problem],
+                    weight=1,
+                    graded=graded[problem],
+                    first_attempted=None,
+                )
+                for problem in range(3)
+            ]
+            all_total, graded_total = aggregate_scores(scores)
+            self.assertEqual(
+                [array[learner] for array in arrays],
+                [all_total.earned, all_total.possible, graded_total.earned, graded_total.possible],
+            )
+
+    def test_letter_grade_array(self):
+        grade_cutoffs = {'A': 0.9, 'B': 0.8, 'C': 0.6, 'D': 0.6}
+        self.assertEqual(
+            list(letter_grade_array(grade_cutoffs, [0.95, 0.9, 0.85, 0.6, 0.59, 0.0])),
+            ['A', 'A', 'B', 'C', None, None],
+        )
+
+
 @ddt.ddt
 class ShowCorrectnessTest(unittest.TestCase):
     """
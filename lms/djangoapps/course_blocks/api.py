@@ -4,6 +4,7 @@ get_course_blocks function.
 """
 from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+from student.roles import CourseBetaTesterRole
 
 from .transformers import library_content, start_date, user_partitions, visibility
 from .usage_info import CourseUsageInfo
@@ -63,3 +64,75 @@ def get_course_blocks(
         starting_block_usage_key,
         collected_block_structure,
     )
+
+
+class CourseBlocksForUsers(object):
+    """
+    Transforms the course blocks with COURSE_BLOCK_ACCESS_TRANSFORMERS for
+    each of a number of users.
+
+    Users whose access to the course blocks is equivalent - same staff
+    access, beta tester status and user partition groups - share a single
+    transformed block structure, so the transformers are run only once per
+    distinct combination.  The returned structures must therefore be
+    treated as read-only.
+    """
+    def __init__(self, starting_block_usage_key, collected_block_structure=None):
+        """
+        Arguments:
+            starting_block_usage_key (UsageKey) - Specifies the starting
+                block of the block structure that is to be transformed.
+
+            collected_block_structure (BlockStructureBlockData) - A
+                block structure retrieved from a prior call to
+                BlockStructureManager.get_collected.  Retrieved if not
+                provided.
+        """
+        self.starting_block_usage_key = starting_block_usage_key
+        self.course_key = starting_block_usage_key.course_key
+        if collected_block_structure is None:
+            collected_block_structure = get_block_structure_manager(self.course_key).get_collected()
+        self.collected_block_structure = collected_block_structure
+
+        # Blocks from content libraries are selected for each user
+        # individually, so structures cannot be shared in their presence.
+        self._can_share_structures = not any(
+            block_key.block_type == 'library_content' for block_key in collected_block_structure
+        )
+        self._user_partitions_for_course = collected_block_structure.get_transformer_data(
+            user_partitions.UserPartitionTransformer, 'user_partitions',
+        ) or []
+        self._transformed_structures = {}
+
+    def get(self, user):
+        """
+        Returns the transformed block structure for the given user.
+        """
+        if self._can_share_structures:
+            access_key = _get_access_key(self.course_key, user, self._user_partitions_for_course)
+        else:
+            access_key = user.id
+
+        if access_key not in self._transformed_structures:
+            self._transformed_structures[access_key] = get_course_blocks(
+                user,
+                self.starting_block_usage_key,
+                collected_block_structure=self.collected_block_structure,
+            )
+        return self._transformed_structures[access_key]
+
+
+def _get_access_key(course_key, user, user_partitions_for_course):
+    """
+    Returns a hashable value that is equal for any two users for whom
+    COURSE_BLOCK_ACCESS_TRANSFORMERS yield the same transformed structure,
+    in a course without content libraries.
+    """
+    partition_groups = user_partitions._get_user_partition_groups(  # pylint: disable=protected-access
+        course_key, user_partitions_for_course, user,
+    )
+    return (
+        CourseUsageInfo(course_key, user).has_staff_access,
+        CourseBetaTesterRole(course_key).has_user(user),
+        frozenset((partition_id, group.id) for partition_id, group in partition_groups.iteritems()),
+    )
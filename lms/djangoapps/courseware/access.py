@@ -11,6 +11,7 @@ Note: The access control logic in this file does NOT check for enrollment in
   It is a wrapper around has_access that additionally checks for enrollment.
 """
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 
 from ccx_keys.locator import CCXLocator
@@ -35,11 +36,13 @@ from courseware.access_utils import (
     check_course_open_for_learner,
 )
 from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
+from courseware.waffle import CACHE_ACCESS_DECISIONS, waffle
 from lms.djangoapps.ccx.custom_exception import CCXLocatorValidationException
 from lms.djangoapps.ccx.models import CustomCourseForEdX
 from mobile_api.models import IgnoreMobileAvailableFlagConfig
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.external_auth.models import ExternalAuthMap
+from request_cache import get_cache
 from student import auth
 from student.models import CourseEnrollmentAllowed
 from student.roles import (
@@ -65,6 +68,9 @@ from xmodule.x_module import XModule
 
 log = logging.getLogger(__name__)
 
+# Name of the request cache of access decisions, when they are being cached.
+ACCESS_DECISIONS_CACHE_NAME = u'courseware.access.decisions'
+
 
 def has_ccx_coach_role(user, course_key):
     """
@@ -129,6 +135,72 @@ def has_access(user, action, obj, course_key=None):
     if not user:
         user = AnonymousUser()
 
+    decisions = get_cache(ACCESS_DECISIONS_CACHE_NAME)
+    if not decisions.get('enabled'):
+        return _has_access(user, action, obj, course_key)
+
+    decision_key = _access_decision_key(user, action, obj, course_key)
+    if decision_key not in decisions:
+        decisions[decision_key] = _has_access(user, action, obj, course_key)
+    return decisions[decision_key]
+
+
+@contextmanager
+def cached_access_decisions():
+    """
+    Context manager within which the decisions of has_access are cached, if
+    the courseware.cache_access_decisions waffle switch is enabled.
+
+    Access is checked many times for each block that is rendered, so views
+    that render many blocks should be wrapped in this context manager.
+    However, since each decision is cached regardless of the content of the
+    block and of the user's roles and milestones, neither of these may change
+    within the context.
+    """
+    decisions = get_cache(ACCESS_DECISIONS_CACHE_NAME)
+    if decisions.get('enabled') or not waffle().is_enabled(CACHE_ACCESS_DECISIONS):
+        yield
+        return
+
+    decisions['enabled'] = True
+    try:
+        yield
+    finally:
+        decisions.clear()
+
+
+def _access_decision_key(user, action, obj, course_key):
+    """
+    Returns the key of the cached decision of has_access for the given
+    arguments.  Objects that has_access handles in the same way, such as
+    a course descriptor and its overview, share the same key.
+    """
+    obj_course_key = course_key
+    if isinstance(obj, (CourseDescriptor, CourseOverview)):
+        obj_key = (u'course', obj.id)
+        obj_course_key = obj.id
+    elif isinstance(obj, ErrorDescriptor):
+        obj_key = (u'error', obj.location)
+    elif isinstance(obj, XBlock):
+        obj_key = (u'block', obj.location)
+    elif isinstance(obj, CourseKey):
+        obj_key = (u'course_key', obj)
+        obj_course_key = obj
+    elif isinstance(obj, UsageKey):
+        obj_key = (u'usage_key', obj)
+        obj_course_key = course_key or obj.course_key
+    else:
+        obj_key = (type(obj).__name__, obj)
+
+    # Masquerading changes the decisions for the course.
+    masquerade_role = get_masquerade_role(user, obj_course_key) if obj_course_key else None
+    return (user.id, masquerade_role, action, obj_key, course_key)
+
+
+def _has_access(user, action, obj, course_key):
+    """
+    Implements has_access, for a user that is not None.
+    """
     # Preview mode is only accessible by staff.
     if in_preview_mode() and course_key:
         if not has_staff_access_to_preview_mode(user, course_key):
@@ -0,0 +1,138 @@
+"""
+Cache of the rendered student_view fragments of blocks whose student_view
+does not depend on the user's state.
+
+Blocks opt into the cache by defining a truthy `has_cacheable_student_view`
+attribute.  Only the fragment returned by the block's view and processed by
+the wrappers that depend solely on the block and the course's settings, such
+as the static url rewriting, is cached.  Wrappers that add per-request or
+per-user markup, such as wrap_xblock and the staff debug info, are applied to
+the cached fragment on every render.
+
+A cached fragment is keyed by:
+
+    * the usage key and version of the block,
+    * the version of the course, in the split modulestore,
+    * a hash of the course-level settings that affect the wrapped fragment,
+    * the active language,
+    * the user's groups in the user partitions that the block is restricted to,
+    * a per-course generation, which is reset whenever the course is published.
+
+The course version and generation invalidate the fragments of blocks whose
+rendering depends on the course, such as their inherited license, whenever
+the course is published.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.utils import translation
+
+from openedx.core.lib.xblock_utils import get_course_fragment_generation
+from request_cache.middleware import RequestCache
+from xmodule.partitions.partitions_service import PartitionService
+from xmodule.x_module import STUDENT_VIEW
+
+from .waffle import CACHE_RENDERED_FRAGMENTS, waffle
+
+# Expiration of cached fragments.  Fragments of outdated versions of a
+# block are never read again, so they only need to expire to free space.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def fragment_cache_enabled():
+    """
+    Returns whether rendered fragments should be cached.
+    """
+    return waffle().is_enabled(CACHE_RENDERED_FRAGMENTS)
+
+
+def get_fragment_cache_key(user, course_settings, block, view_name):
+    """
+    Returns the key of the cached fragment of the given view of the given
+    block, as rendered for the given user, or None if the fragment cannot
+    be cached.
+
+    Arguments:
+        user (User) - The user the block is rendered for.
+
+        course_settings (tuple) - The course-level settings that the
+            cached fragment depends on.
+
+        block (XBlock) - The block being rendered.
+
+        view_name (string) - The name of the view being rendered.
+    """
+    if view_name != STUDENT_VIEW or block.has_children or not getattr(block, 'has_cacheable_student_view', False):
+        return None
+
+    block_version = _get_block_version(block)
+    if block_version is None:
+        return None
+
+    course_key = block.scope_ids.usage_id.course_key
+    try:
+        user_partition_groups = _get_user_partition_groups(user, course_key, block)
+    except ValueError:
+        # The block is restricted to a partition that no longer exists.
+        return None
+
+    key_parts = (
+        unicode(block.scope_ids.usage_id),
+        unicode(block_version),
+        unicode(_get_course_version(block)),
+        get_course_fragment_generation(course_key),
+        course_settings,
+        translation.get_language(),
+        user_partition_groups,
+    )
+    return u'courseware.fragment.{}'.format(hashlib.md5(repr(key_parts)).hexdigest())
+
+
+def get_cached_fragment(cache_key):
+    """
+    Returns the fragment cached with the given key, or None.
+    """
+    return cache.get(cache_key)
+
+
+def set_cached_fragment(cache_key, fragment):
+    """
+    Caches the given fragment with the given key.
+    """
+    cache.set(cache_key, fragment, FRAGMENT_CACHE_TIMEOUT)
+
+
+def _get_block_version(block):
+    """
+    Returns the version of the given block's content, which is its
+    update_version in the split modulestore and its edited_on time
+    in the old Mongo modulestore.
+    """
+    # XModules keep the modulestore's edit info on their descriptor.
+    descriptor = getattr(block, 'descriptor', block)
+    return getattr(descriptor, 'update_version', None) or getattr(descriptor, 'edited_on', None)
+
+
+def _get_course_version(block):
+    """
+    Returns the version of the course the given block was loaded from,
+    which changes whenever the course is published in the split
+    modulestore, and is None in the old Mongo modulestore.
+    """
+    descriptor = getattr(block, 'descriptor', block)
+    return getattr(descriptor, 'course_version', None)
+
+
+def _get_user_partition_groups(user, course_key, block):
+    """
+    Returns the sorted (partition id, group id) pairs of the given user's
+    groups in the partitions that the given block is restricted to.
+    """
+    group_access = getattr(block, 'group_access', None)
+    if not group_access:
+        return ()
+    partitions_service = PartitionService(course_id=course_key, cache=RequestCache.get_request_cache().data)
+    return tuple(
+        (partition_id, partitions_service.get_user_group_id_for_partition(user, partition_id))
+        for partition_id in sorted(group_access)
+    )
@@ -0,0 +1,128 @@
+"""
+Management command to warm the cache of sandboxed code results for the
+problems of a course.
+
+The Python scripts of a problem are executed, and their results cached, for
+each random seed that learners can get for the problem.  Run this before
+an exam, so that learners are served cached results rather than waiting
+for the scripts to execute:
+
+    ./manage.py lms warm_safe_exec_cache <course_id> [--problem <usage_id>]
+"""
+import logging
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.responsetypes import LoncapaProblemError
+from edxmako.shortcuts import render_to_string
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
+from xmodule.capa_base import MAX_RANDOMIZATION_BINS, NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import ModuleI18nService, modulestore
+
+log = logging.getLogger(__name__)
+
+
+def problem_seeds(problem, max_seeds):
+    """
+    Returns the random seeds that learners can get for the given problem,
+    up to max_seeds of them.
+    """
+    if problem.rerandomize == RANDOMIZATION.NEVER:
+        return [1]
+    if problem.rerandomize == RANDOMIZATION.PER_STUDENT:
+        return range(min(NUM_RANDOMIZATION_BINS, max_seeds))
+    return range(min(MAX_RANDOMIZATION_BINS, max_seeds))
+
+
+class Command(BaseCommand):
+    """
+    Caches the results of the Python scripts of the problems of a course,
+    for all random seeds of each problem.
+    """
+    args = '<course_id>'
+    help = 'Cache the results of the Python scripts of the problems of a course, for all their random seeds.'
+    option_list = BaseCommand.option_list + (
+        make_option('--problem',
+                    action='store',
+                    dest='problem',
+                    default=None,
+                    help='Usage id of the only problem to warm the cache for'),
+        make_option('--max-seeds',
+                    action='store',
+                    dest='max_seeds',
+                    type='int',
+                    default=MAX_RANDOMIZATION_BINS,
+                    help='Maximum number of random seeds to warm the cache for, per problem'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('course_id not specified')
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError('Invalid course_id')
+
+        store = modulestore()
+        if options['problem']:
+            try:
+                usage_key = UsageKey.from_string(options['problem']).map_into_course(course_key)
+            except InvalidKeyError:
+                raise CommandError('Invalid problem usage id')
+            problems = [store.get_item(usage_key)]
+        else:
+            problems = store.get_items(course_key, qualifiers={'category': 'problem'})
+
+        cache = get_safe_exec_cache()
+        for problem in problems:
+            if 'anonymous_student_id' in problem.data:
+                # The results of scripts that use the student's id are cached per student.
+                log.info(u'Skipping %s, whose script uses the student id.', problem.location)
+                continue
+            seeds = problem_seeds(problem, options['max_seeds'])
+            failed = 0
+            for seed in seeds:
+                try:
+                    self.execute_problem_scripts(problem, seed, cache)
+                except LoncapaProblemError:
+                    failed += 1
+            log.info(u'Cached the script results of %s for %d seeds.', problem.location, len(seeds) - failed)
+            if failed:
+                log.warning(u'The script of %s failed for %d seeds.', problem.location, failed)
+
+    def execute_problem_scripts(self, problem, seed, cache):
+        """
+        Executes the Python scripts of the given problem with the given seed,
+        which caches their results in the given cache.
+        """
+        course_key = problem.location.course_key
+        capa_system = LoncapaSystem(
+            ajax_url=None,
+            anonymous_student_id=None,
+            cache=cache,
+            can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+            get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+            DEBUG=False,
+            filestore=problem.runtime.resources_fs,
+            i18n=ModuleI18nService(),
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=seed,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue=None,
+            matlab_api_key=problem.matlab_api_key,
+        )
+        LoncapaProblem(
+            problem_text=problem.data,
+            id=problem.location.html_id(),
+            capa_system=capa_system,
+            capa_module=None,
+            seed=seed,
+        )
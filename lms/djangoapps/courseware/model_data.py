@@ -31,12 +31,13 @@ from django.db import DatabaseError
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.keys import CourseKey, UsageKey
-from xblock.core import XBlockAside
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
 from courseware.user_state_client import DjangoXBlockUserStateClient
+from xmodule.modulestore import prefer_xmodules
 from xmodule.modulestore.django import modulestore
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
@@ -56,13 +57,24 @@ def _all_usage_keys(descriptors, aside_types):
     Return a set of all usage_ids for the `descriptors` and for
     as all asides in `aside_types` for those descriptors.
     """
+    return _usage_keys_with_asides(
+        (descriptor.scope_ids.usage_id for descriptor in descriptors),
+        aside_types,
+    )
+
+
+def _usage_keys_with_asides(usage_keys, aside_types):
+    """
+    Return a set of the `usage_keys` and of the usage keys of
+    all asides in `aside_types` for those usage keys.
+    """
     usage_ids = set()
-    for descriptor in descriptors:
-        usage_ids.add(descriptor.scope_ids.usage_id)
+    for usage_key in usage_keys:
+        usage_ids.add(usage_key)
 
         for aside_type in aside_types:
-            usage_ids.add(AsideUsageKeyV1(descriptor.scope_ids.usage_id, aside_type))
-            usage_ids.add(AsideUsageKeyV2(descriptor.scope_ids.usage_id, aside_type))
+            usage_ids.add(AsideUsageKeyV1(usage_key, aside_type))
+            usage_ids.add(AsideUsageKeyV2(usage_key, aside_type))
 
     return usage_ids
 
@@ -82,6 +94,26 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+def _all_block_types_for_usage_keys(usage_keys, aside_types):
+    """
+    Return a set of all block_types for the blocks with the supplied
+    `usage_keys` and for the asides types in `aside_types`.
+
+    As with `_all_block_types`, each block type is keyed by the entry point
+    of the class that the modulestore loads for it, which is the XModule
+    entry point for XModules.
+    """
+    block_types = set()
+    for block_type in set(usage_key.block_type for usage_key in usage_keys):
+        block_class = XBlock.load_class(block_type, default=XBlock, select=prefer_xmodules)
+        block_types.add(BlockTypeKeyV1(block_class.entry_point, block_type))
+
+    for aside_type in aside_types:
+        block_types.add(BlockTypeKeyV1(XBlockAside.entry_point, aside_type))
+
+    return block_types
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -162,6 +194,10 @@ class DjangoOrmFieldCache(object):
     def __init__(self):
         self._cache = {}
 
+        # The keys, as returned by _prefetch_keys, whose fields
+        # have all been loaded into this cache by prefetch.
+        self._prefetched_keys = set()
+
     def cache_fields(self, fields, xblocks, aside_types):
         """
         Load all fields specified by ``fields`` for the supplied ``xblocks``
@@ -172,9 +208,30 @@ class DjangoOrmFieldCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        xblocks = [
+            xblock for xblock in xblocks
+            if self._prefetch_key_for_xblock(xblock) not in self._prefetched_keys
+        ]
+        if not xblocks:
+            return
+
         for field_object in self._read_objects(fields, xblocks, aside_types):
             self._cache[self._cache_key_for_field_object(field_object)] = field_object
 
+    def prefetch(self, usage_keys, block_types):
+        """
+        Load all fields of the blocks with the supplied ``usage_keys`` and
+        ``block_types`` into this cache.  Fields of these blocks are not
+        loaded again by subsequent calls to cache_fields.
+
+        Arguments:
+            usage_keys (set of :class:`UsageKey`): The blocks and asides to cache fields for.
+            block_types (set of :class:`BlockTypeKeyV1`): The types of these blocks and asides.
+        """
+        for field_object in self._read_all_objects(usage_keys, block_types):
+            self._cache[self._cache_key_for_field_object(field_object)] = field_object
+        self._prefetched_keys.update(self._prefetch_keys(usage_keys, block_types))
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def get(self, kvs_key):
         """
@@ -320,6 +377,34 @@ class DjangoOrmFieldCache(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def _read_all_objects(self, usage_keys, block_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for any field of the blocks with the supplied ``usage_keys`` and ``block_types``.
+
+        Arguments:
+            usage_keys (set of :class:`UsageKey`): The blocks and asides to load fields for.
+            block_types (set of :class:`BlockTypeKeyV1`): The types of these blocks and asides.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _prefetch_keys(self, usage_keys, block_types):
+        """
+        Return the keys recording that all fields of the blocks with the
+        supplied ``usage_keys`` and ``block_types`` have been loaded.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _prefetch_key_for_xblock(self, xblock):
+        """
+        Return the key that records whether all fields of the specified
+        ``xblock`` have been loaded by prefetch.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def _cache_key_for_field_object(self, field_object):
         """
@@ -351,6 +436,9 @@ class UserStateCache(object):
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
 
+        # The usage keys whose state has been loaded into this cache by prefetch.
+        self._prefetched_usage_keys = set()
+
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
         Load all fields specified by ``fields`` for the supplied ``xblocks``
@@ -361,9 +449,30 @@ class UserStateCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        usage_keys = _all_usage_keys(xblocks, aside_types) - self._prefetched_usage_keys
+        if usage_keys:
+            self._load_state(usage_keys)
+
+    def prefetch(self, usage_keys, block_types):  # pylint: disable=unused-argument
+        """
+        Load the state of the blocks with the supplied ``usage_keys`` into
+        this cache.  The state of these blocks is not loaded again by
+        subsequent calls to cache_fields.
+
+        Arguments:
+            usage_keys (set of :class:`UsageKey`): The blocks and asides to cache state for.
+            block_types (set of :class:`BlockTypeKeyV1`): The types of these blocks and asides.
+        """
+        self._load_state(usage_keys)
+        self._prefetched_usage_keys.update(usage_keys)
+
+    def _load_state(self, usage_keys):
+        """
+        Load the state of the blocks with the supplied ``usage_keys`` into this cache.
+        """
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
@@ -535,6 +644,19 @@ class UserStateSummaryCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def _read_all_objects(self, usage_keys, block_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for any field of the blocks with the supplied ``usage_keys``.
+        """
+        return XModuleUserStateSummaryField.objects.chunked_filter('usage_id__in', usage_keys)
+
+    def _prefetch_keys(self, usage_keys, block_types):
+        return usage_keys
+
+    def _prefetch_key_for_xblock(self, xblock):
+        return xblock.scope_ids.usage_id
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -598,6 +720,23 @@ class PreferencesCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def _read_all_objects(self, usage_keys, block_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for any field of the supplied ``block_types``.
+        """
+        return XModuleStudentPrefsField.objects.chunked_filter(
+            'module_type__in',
+            block_types,
+            student=self.user.pk,
+        )
+
+    def _prefetch_keys(self, usage_keys, block_types):
+        return block_types
+
+    def _prefetch_key_for_xblock(self, xblock):
+        return BlockTypeKeyV1(xblock.entry_point, xblock.scope_ids.block_type)
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -658,6 +797,19 @@ class UserInfoCache(DjangoOrmFieldCache):
             field_name__in=set(field.name for field in fields),
         )
 
+    def _read_all_objects(self, usage_keys, block_types):
+        """
+        Return an iterator for all objects stored in the underlying datastore
+        for any field of the user, which are shared by all blocks.
+        """
+        return XModuleStudentInfoField.objects.filter(student=self.user.pk)
+
+    def _prefetch_keys(self, usage_keys, block_types):
+        return {self.user.pk}
+
+    def _prefetch_key_for_xblock(self, xblock):
+        return self.user.pk
+
     def _cache_key_for_field_object(self, field_object):
         """
         Return the key used in this DjangoOrmFieldCache to store the specified field_object.
@@ -776,6 +928,48 @@ class FieldDataCache(object):
 
         self.add_descriptors_to_cache(descriptors)
 
+    def add_block_structure_to_cache(self, block_structure, start_block_key=None):
+        """
+        Prefetch the data of all blocks in `block_structure`, or of the blocks in
+        the subtree rooted at `start_block_key`, in a fixed number of chunked
+        queries per scope.
+
+        Unlike add_descriptors_to_cache, this does not require the descriptors of
+        the blocks, and loads all of their fields.  Descriptors of the prefetched
+        blocks that are subsequently added to this FieldDataCache are not queried
+        for again.
+
+        Arguments:
+            block_structure: A BlockStructure of the course
+            start_block_key: The usage key of the root of the subtree to prefetch,
+                or None to prefetch all blocks
+        """
+        if not self.user.is_authenticated():
+            return
+
+        if start_block_key is not None and start_block_key not in block_structure:
+            return
+
+        block_keys = list(block_structure.post_order_traversal(start_node=start_block_key))
+        usage_keys = _usage_keys_with_asides(block_keys, self.asides)
+        block_types = _all_block_types_for_usage_keys(block_keys, self.asides)
+        for scope_cache in self.cache.values():
+            scope_cache.prefetch(usage_keys, block_types)
+
+    @classmethod
+    def cache_for_block_structure(cls, course_id, user, block_structure, start_block_key=None,
+                                  asides=None, read_only=False):
+        """
+        course_id: the course in the context of which we want StudentModules.
+        user: the django user for whom to load modules.
+        block_structure: A BlockStructure of the course
+        start_block_key: The usage key of the root of the subtree to prefetch,
+            or None to prefetch all blocks
+        """
+        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
+        cache.add_block_structure_to_cache(block_structure, start_block_key)
+        return cache
+
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
@@ -988,6 +1182,30 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create a ScoresClient for each of the given users, with data for the
+        given locations pre-fetched in a single query for all the users.
+
+        Returns a dict of user_id to ScoresClient.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created',
+        ):
+            clients[user_id]._locations_to_scores[location.map_into_course(course_id)] = cls.Score(  # pylint: disable=protected-access
+                correct, total, created,
+            )
+        for client in clients.itervalues():
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -10,7 +10,6 @@ from functools import partial
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.template.context_processors import csrf
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
@@ -29,6 +28,7 @@ from xblock.runtime import KvsFieldData
 import static_replace
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import get_user_role, has_access
+from courseware import fragment_cache
 from courseware.entrance_exams import user_can_skip_entrance_exam, user_has_passed_entrance_exam
 from courseware.masquerade import (
     MasqueradingKeyValueStore,
@@ -54,20 +54,14 @@ from openedx.core.djangoapps.util.user_utils import SystemUser
 from openedx.core.lib.license import wrap_with_license
 from openedx.core.lib.url_utils import quote_slashes, unquote_slashes
 from openedx.core.lib.xblock_utils import request_token as xblock_request_token
-from openedx.core.lib.xblock_utils import (
-    add_staff_markup,
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
-    wrap_xblock
-)
+from openedx.core.lib.xblock_utils import add_staff_markup, replace_urls, wrap_xblock
 from student.models import anonymous_id_for_user, user_by_anonymous_id
 from student.roles import CourseBetaTesterRole
 from track import contexts
 from util import milestones_helpers
 from util.json_request import JsonResponse
 from django.utils.text import slugify
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 from xblock_django.user_service import DjangoXBlockUserService
 from xmodule.contentstore.django import contentstore
 from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
@@ -622,11 +616,16 @@ def get_module_system_for_user(
     # to the Fragment content coming out of the xblocks that are about to be rendered.
     block_wrappers = []
 
+    # The subset of block_wrappers whose output depends only on the block and
+    # the course's settings, and can therefore be cached by the fragment cache.
+    fragment_wrappers = []
+
     if is_masquerading_as_specific_student(user, course_id):
         block_wrappers.append(filter_displayed_blocks)
 
     if settings.FEATURES.get("LICENSING", False):
         block_wrappers.append(wrap_with_license)
+        fragment_wrappers.append(wrap_with_license)
 
     # Wrap the output display in a single div to allow for the XModule
     # javascript to be bound correctly
@@ -643,28 +642,38 @@ def get_module_system_for_user(
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # Rewrite, in a single pass:
+    #   * urls beginning in /static to point to course-specific content
+    #   * urls of the form '/course/' to refer to the root of multicourse directory
+    #     hierarchy of this course
+    #   * intra-courseware links (/jump_to_id/<id>). This format is an improvement
+    #     over the /course/... format for studio authored courses, because it is
+    #     agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
-    block_wrappers.append(partial(
-        replace_jump_to_id_urls,
+    url_replacement_wrapper = partial(
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
         course_id,
         reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
-    ))
+        static_asset_path=static_asset_path or descriptor.static_asset_path
+    )
+    block_wrappers.append(url_replacement_wrapper)
+    fragment_wrappers.append(url_replacement_wrapper)
+
+    # Rendered fragments are not cached when masquerading as a specific
+    # student, since the displayed blocks are then filtered.
+    fragment_cache_key = None
+    if fragment_cache.fragment_cache_enabled() and not is_masquerading_as_specific_student(user, course_id):
+        fragment_cache_key = partial(
+            fragment_cache.get_fragment_cache_key,
+            user,
+            (
+                getattr(descriptor, 'data_dir', None),
+                static_asset_path or descriptor.static_asset_path,
+                settings.FEATURES.get("LICENSING", False),
+            ),
+        )
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
         if is_masquerading_as_specific_student(user, course_id):
@@ -736,12 +745,14 @@ def get_module_system_for_user(
         publish=publish,
         anonymous_student_id=anonymous_student_id,
         course_id=course_id,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
         mixins=descriptor.runtime.mixologist._mixins,  # pylint: disable=protected-access
         wrappers=block_wrappers,
+        fragment_wrappers=fragment_wrappers,
+        fragment_cache_key=fragment_cache_key,
         get_real_user=user_by_anonymous_id,
         services={
             'fs': FSService(),
@@ -28,6 +28,7 @@ from courseware.tests.factories import (
     UserFactory
 )
 from courseware.tests.helpers import LoginEnrollmentTestCase, masquerade_as_group_member
+from courseware.waffle import CACHE_ACCESS_DECISIONS, waffle as courseware_waffle
 from lms.djangoapps.ccx.models import CustomCourseForEdX
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.waffle_utils.testutils import WAFFLE_TABLES
@@ -729,6 +730,50 @@ class UserRoleTestCase(TestCase):
         )
 
 
+@attr(shard=1)
+class AccessDecisionCacheTestCase(TestCase):
+    """
+    Tests for the caching of access decisions.
+    """
+
+    def setUp(self):
+        super(AccessDecisionCacheTestCase, self).setUp()
+        self.course_key = CourseLocator('edX', 'toy', '2012_Fall')
+        self.course_staff = StaffFactory(course_key=self.course_key)
+
+        patcher = patch('courseware.access._has_access', wraps=access._has_access)
+        self.mock_has_access = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_decisions_cached_within_context(self):
+        with courseware_waffle().override(CACHE_ACCESS_DECISIONS, active=True):
+            with access.cached_access_decisions():
+                self.assertTrue(access.has_access(self.course_staff, 'staff', self.course_key))
+                self.assertTrue(access.has_access(self.course_staff, 'staff', self.course_key))
+                self.assertFalse(access.has_access(self.course_staff, 'staff', 'global'))
+            self.assertEqual(self.mock_has_access.call_count, 2)
+
+            # Decisions are no longer cached after the context.
+            self.assertTrue(access.has_access(self.course_staff, 'staff', self.course_key))
+            self.assertEqual(self.mock_has_access.call_count, 3)
+
+    def test_decisions_not_cached_when_disabled(self):
+        with courseware_waffle().override(CACHE_ACCESS_DECISIONS, active=False):
+            with access.cached_access_decisions():
+                self.assertTrue(access.has_access(self.course_staff, 'staff', self.course_key))
+                self.assertTrue(access.has_access(self.course_staff, 'staff', self.course_key))
+        self.assertEqual(self.mock_has_access.call_count, 2)
+
+    def test_decisions_cached_per_masquerade(self):
+        with courseware_waffle().override(CACHE_ACCESS_DECISIONS, active=True):
+            with access.cached_access_decisions():
+                self.assertTrue(access.has_access(self.course_staff, 'staff', self.course_key))
+                self.course_staff.masquerade_settings = {
+                    self.course_key: CourseMasquerade(self.course_key, role='student')
+                }
+                self.assertFalse(access.has_access(self.course_staff, 'staff', self.course_key))
+
+
 @attr(shard=3)
 @ddt.ddt
 class CourseOverviewAccessTestCase(ModuleStoreTestCase):
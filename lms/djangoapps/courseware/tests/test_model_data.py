@@ -8,11 +8,17 @@ from django.db import DatabaseError
 from django.test import TestCase
 from mock import Mock, patch
 from nose.plugins.attrib import attr
-from xblock.core import XBlock
+from opaque_keys.edx.block_types import BlockTypeKeyV1
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.fields import BlockScope, Scope, ScopeIds
 
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import (
+    DjangoKeyValueStore,
+    FieldDataCache,
+    InvalidScopeError,
+    _all_block_types_for_usage_keys
+)
 from courseware.models import (
     StudentModule,
     XModuleStudentInfoField,
@@ -27,7 +33,9 @@ from courseware.tests.factories import (
     course_id,
     location
 )
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
 from student.tests.factories import UserFactory
+from xmodule.x_module import XModuleDescriptor
 
 
 def mock_field(scope, name):
@@ -434,3 +442,70 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr(shard=1)
+class TestBlockStructurePrefetch(TestCase):
+    """Tests for prefetching the data of the blocks in a block structure"""
+
+    def setUp(self):
+        super(TestBlockStructurePrefetch, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        UserStateSummaryFactory.create()
+        # Problems are XModules, whose preferences are keyed by the XModule entry point.
+        StudentPrefsFactory.create(
+            student=self.user, module_type=BlockTypeKeyV1(XModuleDescriptor.entry_point, 'problem'),
+        )
+        StudentInfoFactory.create(student=self.user)
+
+        # pylint: disable=protected-access
+        self.block_structure = BlockStructureBlockData(location('root'))
+        self.block_structure._add_relation(location('root'), location('usage_id'))
+        self.block_structure._add_relation(location('root'), location('other_id'))
+
+        self.descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.user_state_summary, 'existing_field'),
+            mock_field(Scope.preferences, 'existing_field'),
+            mock_field(Scope.user_info, 'existing_field'),
+        ])
+        self.descriptor.scope_ids = ScopeIds('user1', 'problem', location('def_id'), location('usage_id'))
+        self.descriptor.entry_point = XModuleDescriptor.entry_point
+
+    def test_block_types_keyed_by_entry_point(self):
+        self.assertEqual(
+            _all_block_types_for_usage_keys([location('usage_id'), location('other_id')], ['an_aside']),
+            {
+                BlockTypeKeyV1(XModuleDescriptor.entry_point, 'problem'),
+                BlockTypeKeyV1(XBlockAside.entry_point, 'an_aside'),
+            },
+        )
+
+    def test_prefetched_blocks_not_queried_again(self):
+        # One query for each of the scopes
+        with self.assertNumQueries(4):
+            field_data_cache = FieldDataCache.cache_for_block_structure(course_id, self.user, self.block_structure)
+
+        kvs = DjangoKeyValueStore(field_data_cache)
+        with self.assertNumQueries(0):
+            field_data_cache.add_descriptors_to_cache([self.descriptor])
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+            self.assertEquals('old_value', kvs.get(user_state_summary_key('existing_field')))
+            self.assertEquals(
+                'old_value',
+                kvs.get(DjangoKeyValueStore.Key(Scope.preferences, self.user.id, 'problem', 'existing_field')),
+            )
+            self.assertEquals('old_value', kvs.get(user_info_key('existing_field')))
+
+    def test_blocks_outside_of_subtree_queried(self):
+        with self.assertNumQueries(4):
+            field_data_cache = FieldDataCache.cache_for_block_structure(
+                course_id, self.user, self.block_structure, start_block_key=location('other_id'),
+            )
+
+        # The preferences of the block type and the user's info were
+        # prefetched, but the block's state and state summary were not.
+        with self.assertNumQueries(2):
+            field_data_cache.add_descriptors_to_cache([self.descriptor])
+        self.assertEquals('a_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
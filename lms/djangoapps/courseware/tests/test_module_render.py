@@ -12,6 +12,7 @@ import pytz
 from bson import ObjectId
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.urlresolvers import reverse
 from django.http import Http404, HttpResponse
 from django.test.client import RequestFactory
@@ -33,6 +34,7 @@ from xblock.runtime import Runtime
 
 from capa.tests.response_xml_factory import OptionResponseXMLFactory
 from course_modes.models import CourseMode
+from courseware import fragment_cache
 from courseware import module_render as render
 from courseware.courses import get_course_info_section, get_course_with_access
 from courseware.field_overrides import OverrideFieldData
@@ -43,6 +45,7 @@ from courseware.module_render import get_module_for_descriptor, hash_resource
 from courseware.tests.factories import GlobalStaffFactory, StudentModuleFactory, UserFactory
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from courseware.tests.tests import LoginEnrollmentTestCase
+from courseware.waffle import CACHE_RENDERED_FRAGMENTS, waffle as courseware_waffle
 from lms.djangoapps.completion.models import BlockCompletion
 from lms.djangoapps.completion import waffle as completion_waffle
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
@@ -54,9 +57,10 @@ from openedx.core.lib.url_utils import quote_slashes
 from student.models import anonymous_id_for_user
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xblock_django.models import XBlockConfiguration
+from xmodule.html_module import HtmlModule
 from xmodule.lti_module import LTIDescriptor
 from xmodule.modulestore import ModuleStoreEnum
-from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.django import SignalHandler, modulestore
 from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_MIXED_MODULESTORE,
     ModuleStoreTestCase,
@@ -1383,6 +1387,92 @@ class TestHtmlModifiers(ModuleStoreTestCase):
         )
 
 
+@attr(shard=1)
+class TestFragmentCache(ModuleStoreTestCase):
+    """
+    Tests that the rendered fragments of blocks whose student_view does not
+    depend on user state are cached and shared between users.
+    """
+    ENABLED_SIGNALS = ['course_published']
+
+    def setUp(self):
+        super(TestFragmentCache, self).setUp()
+        test_cache = LocMemCache('fragment_cache', {})
+        for cache_patcher in (
+                patch.object(fragment_cache, 'cache', test_cache),
+                patch('openedx.core.lib.xblock_utils.cache', test_cache),
+        ):
+            cache_patcher.start()
+            self.addCleanup(cache_patcher.stop)
+
+        self.course = CourseFactory.create()
+        self.other_user = UserFactory.create()
+
+    def _create_html(self, data):
+        """
+        Creates an html block with the given data in the course.
+        """
+        return ItemFactory.create(category='html', parent_location=self.course.location, data=data)
+
+    def _render(self, user, descriptor):
+        """
+        Renders the student_view of the given block for the given user.
+        """
+        request = RequestFactory().get('/')
+        request.user = user
+        request.session = {}
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(self.course.id, user, descriptor)
+        module = render.get_module(user, request, descriptor.location, field_data_cache)
+        return module.render(STUDENT_VIEW).content
+
+    def test_fragment_shared_between_users(self):
+        html = self._create_html('<a href="/static/foo.png">Foo</a>')
+        with courseware_waffle().override(CACHE_RENDERED_FRAGMENTS, active=True):
+            with patch.object(HtmlModule, 'get_html', autospec=True, side_effect=HtmlModule.get_html) as mock_get_html:
+                contents = [self._render(user, html) for user in (self.user, self.other_user)]
+        self.assertEquals(mock_get_html.call_count, 1)
+        for content in contents:
+            self.assertEquals(len(PyQuery(content)('div.xblock.xblock-student_view.xmodule_HtmlModule')), 1)
+            self.assertIn('/asset/foo.png', content)
+            self.assertNotIn('"/static/foo.png"', content)
+
+    def test_user_specific_html_not_cached(self):
+        html = self._create_html('<p>%%USER_ID%%</p>')
+        with courseware_waffle().override(CACHE_RENDERED_FRAGMENTS, active=True):
+            contents = [self._render(user, html) for user in (self.user, self.other_user)]
+        self.assertIn(anonymous_id_for_user(self.user, None), contents[0])
+        self.assertIn(anonymous_id_for_user(self.other_user, None), contents[1])
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_EDXNOTES': True})
+    @patch('edxnotes.helpers.get_edxnotes_id_token')
+    def test_annotatable_html_not_cached(self, mock_get_id_token):
+        mock_get_id_token.side_effect = lambda user: u'token-for-{}'.format(user.username)
+        self.course.edxnotes = True
+        self.store.update_item(self.course, self.user.id)
+        html = self._create_html('<p>Foo</p>')
+        with courseware_waffle().override(CACHE_RENDERED_FRAGMENTS, active=True):
+            contents = [self._render(user, html) for user in (self.user, self.other_user)]
+        self.assertIn(u'token-for-{}'.format(self.user.username), contents[0])
+        self.assertNotIn(u'token-for-{}'.format(self.user.username), contents[1])
+        self.assertIn(u'token-for-{}'.format(self.other_user.username), contents[1])
+
+    def test_disabled(self):
+        html = self._create_html('<p>Foo</p>')
+        with patch.object(HtmlModule, 'get_html', autospec=True, side_effect=HtmlModule.get_html) as mock_get_html:
+            self._render(self.user, html)
+            self._render(self.other_user, html)
+        self.assertEquals(mock_get_html.call_count, 2)
+
+    def test_invalidated_on_course_publish(self):
+        html = self._create_html('<p>Foo</p>')
+        with courseware_waffle().override(CACHE_RENDERED_FRAGMENTS, active=True):
+            with patch.object(HtmlModule, 'get_html', autospec=True, side_effect=HtmlModule.get_html) as mock_get_html:
+                self._render(self.user, html)
+                SignalHandler.course_published.send(sender=None, course_key=self.course.id)
+                self._render(self.user, html)
+        self.assertEquals(mock_get_html.call_count, 2)
+
+
 class XBlockWithJsonInitData(XBlock):
     """
     Pure XBlock to use in tests, with JSON init data.
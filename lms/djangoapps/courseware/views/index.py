@@ -25,6 +25,7 @@ from lms.djangoapps.courseware.exceptions import CourseAccessRedirect
 from lms.djangoapps.experiments.utils import get_experiment_user_metadata_context
 from lms.djangoapps.gating.api import get_entrance_exam_score_ratio, get_entrance_exam_usage_key
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.lang_pref import LANGUAGE_KEY
 from openedx.core.djangoapps.monitoring_utils import set_custom_metrics_for_course_key
@@ -40,7 +41,7 @@ from util.views import ensure_valid_course_key
 from xmodule.modulestore.django import modulestore
 from xmodule.x_module import STUDENT_VIEW
 
-from ..access import has_access
+from ..access import cached_access_decisions, has_access
 from ..access_utils import in_preview_mode, check_course_open_for_learner
 from ..courses import get_course_with_access, get_current_child, get_studio_url
 from ..entrance_exams import (
@@ -52,6 +53,7 @@ from ..entrance_exams import (
 from ..masquerade import setup_masquerade
 from ..model_data import FieldDataCache
 from ..module_render import get_module_for_descriptor, toc_for_course
+from ..waffle import PREFETCH_FIELD_DATA_FROM_BLOCK_STRUCTURE, waffle
 from .views import (
     CourseTabView,
 )
@@ -112,7 +114,8 @@ class CoursewareIndex(View):
                 )
                 self.is_staff = has_access(request.user, 'staff', self.course)
                 self._setup_masquerade_for_effective_user()
-                return self._get(request)
+                with cached_access_decisions():
+                    return self._get(request)
         except Exception as exception:  # pylint: disable=broad-except
             return CourseTabView.handle_exceptions(request, self.course, exception)
 
@@ -298,6 +301,13 @@ class CoursewareIndex(View):
         """
         # Pre-fetch all descendant data
         self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
+        if waffle().is_enabled(PREFETCH_FIELD_DATA_FROM_BLOCK_STRUCTURE):
+            # Load the data of all blocks in the section up front, so that
+            # adding the section's descriptors does not query for them again.
+            self.field_data_cache.add_block_structure_to_cache(
+                get_course_in_cache(self.course_key),
+                start_block_key=self.section.location,
+            )
         self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
 
         # Bind section to user
@@ -15,7 +15,7 @@ from certificates import api as certs_api
 from certificates.models import CertificateStatuses
 from commerce.utils import EcommerceService
 from course_modes.models import (CourseMode, get_course_prices)
-from courseware.access import has_access, has_ccx_coach_role
+from courseware.access import cached_access_decisions, has_access, has_ccx_coach_role
 from courseware.access_utils import check_course_open_for_learner
 from courseware.courses import (
     can_self_enroll_in_course,
@@ -1410,7 +1410,7 @@ def render_xblock(request, usage_key_string, check_if_enrolled=True):
     if requested_view != 'student_view':
         return HttpResponseBadRequest("Rendering of the xblock view '{}' is not supported.".format(requested_view))
 
-    with modulestore().bulk_operations(course_key):
+    with modulestore().bulk_operations(course_key), cached_access_decisions():
         # verify the user has access to the course, including enrollment check
         try:
             course = get_course_with_access(request.user, 'load', course_key, check_if_enrolled=check_if_enrolled)
@@ -0,0 +1,20 @@
+"""
+This module contains various configuration settings via
+waffle switches for the courseware app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'courseware'
+
+# Switches
+CACHE_ACCESS_DECISIONS = u'cache_access_decisions'
+CACHE_RENDERED_FRAGMENTS = u'cache_rendered_fragments'
+PREFETCH_FIELD_DATA_FROM_BLOCK_STRUCTURE = u'prefetch_field_data_from_block_structure'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for courseware.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Courseware: ')
@@ -14,6 +14,7 @@ def edxnotes(cls):
     Decorator that makes components annotatable.
     """
     original_get_html = cls.get_html
+    original_has_cacheable_student_view = getattr(cls, 'has_cacheable_student_view', False)
 
     def get_html(self, *args, **kwargs):
         """
@@ -49,5 +50,21 @@ def edxnotes(cls):
                 },
             })
 
+    @property
+    def has_cacheable_student_view(self):
+        """
+        Annotatable components cannot share their student_view between
+        users, since it includes the user's notes token.
+        """
+        # Import is placed here to avoid model import at project startup.
+        from edxnotes.helpers import is_feature_enabled
+        course = self.descriptor.runtime.modulestore.get_course(self.runtime.course_id)
+        if is_feature_enabled(course):
+            return False
+        if isinstance(original_has_cacheable_student_view, property):
+            return original_has_cacheable_student_view.__get__(self, cls)
+        return original_has_cacheable_student_view
+
     cls.get_html = get_html
+    cls.has_cacheable_student_view = has_cacheable_student_view
     return cls
@@ -0,0 +1,103 @@
+"""
+Coalescing of subsection grade recalculations.
+
+When a learner submits several problems in quick succession, a
+recalculate_subsection_grade_v3 task is queued for each submission,
+although a single recalculation that starts after all of the scores
+were saved would account for all of them.  Two mechanisms collapse
+such redundant tasks:
+
+    * Each queued task is given a generation number for its (user,
+      problem).  A task that is superseded by a more recently queued
+      task for the same (user, problem) is skipped before doing any
+      work, leaving the recalculation to the newer task.
+
+    * When a task recalculates a subsection grade, it records when it
+      started reading the learner's scores.  A later task skips the
+      recalculation of that subsection, and thereby also the
+      recalculation of the course grade, if the recorded recalculation
+      started well after the later task's score was saved.
+
+Tasks that only update grades if they are higher, or that result from
+a deleted score, do not fully recalculate the grade, and are therefore
+neither skipped nor taken into account.
+"""
+from django.core.cache import cache
+
+from util.date_utils import to_timestamp
+
+# Time allowed for the transaction that saved a score to be committed,
+# after the score's modified time.  A recalculation is only taken to
+# account for a score if it started more than this many seconds after
+# the score was modified.
+SCORE_COMMIT_DELAY_SECONDS = 2
+
+# Expiration of the cached generation numbers and recalculation times.
+# This needs to be longer than the time a task may wait in the queue.
+COALESCING_CACHE_TIMEOUT_SECONDS = 60 * 60  # 1 hour
+
+
+def is_coalescible(only_if_higher, score_deleted):
+    """
+    Returns whether a task with the given arguments fully recalculates
+    the grades it updates, and can therefore be coalesced with others.
+    """
+    return not only_if_higher and not score_deleted
+
+
+def queue_generation(user_id, usage_id):
+    """
+    Records that a task is being queued to recalculate grades for the
+    given user's score of the given block, and returns the generation
+    number of the task.
+    """
+    key = _generation_cache_key(user_id, usage_id)
+    cache.add(key, 0, COALESCING_CACHE_TIMEOUT_SECONDS)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key expired since it was added.
+        cache.set(key, 1, COALESCING_CACHE_TIMEOUT_SECONDS)
+        return 1
+
+
+def is_superseded(user_id, usage_id, generation):
+    """
+    Returns whether a task with the given generation number has been
+    superseded by a more recently queued task for the same user and block.
+    """
+    latest_generation = cache.get(_generation_cache_key(user_id, usage_id))
+    return latest_generation is not None and latest_generation > generation
+
+
+def record_recalculation(user_id, subsection_usage_key, started_at):
+    """
+    Records that the given user's grade for the given subsection was
+    recalculated from the scores read after the given started_at datetime.
+    """
+    cache.set(
+        _recalculation_cache_key(user_id, subsection_usage_key),
+        to_timestamp(started_at),
+        COALESCING_CACHE_TIMEOUT_SECONDS,
+    )
+
+
+def is_recalculated_since(user_id, subsection_usage_key, score_modified_timestamp):
+    """
+    Returns whether the given user's grade for the given subsection has
+    been recalculated from scores that were read after the score with the
+    given modified timestamp was committed.
+    """
+    recalculated_timestamp = cache.get(_recalculation_cache_key(user_id, subsection_usage_key))
+    if recalculated_timestamp is None:
+        return False
+    # Timestamps are truncated to whole seconds, hence the strict comparison.
+    return recalculated_timestamp > score_modified_timestamp + SCORE_COMMIT_DELAY_SECONDS
+
+
+def _generation_cache_key(user_id, usage_id):
+    return u'grades.coalescing.generation.{}.{}'.format(user_id, usage_id)
+
+
+def _recalculation_cache_key(user_id, subsection_usage_key):
+    return u'grades.coalescing.recalculated.{}.{}'.format(user_id, subsection_usage_key)
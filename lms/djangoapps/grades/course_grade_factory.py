@@ -1,14 +1,18 @@
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 import dogstats_wrapper as dog_stats_api
 
+from lms.djangoapps.course_blocks.api import CourseBlocksForUsers
 from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE_GRADE_NOW_PASSED
 
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 from .models import PersistentCourseGrade, prefetch
+from .scores import possibly_scored
+from .subsection_grade_factory import clear_prefetched_scores, prefetch_scores
 
 log = getLogger(__name__)
 
@@ -75,6 +79,7 @@ class CourseGradeFactory(object):
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            batch_size=None,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -84,6 +89,12 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If batch_size is given, students are graded in batches of that size:
+        the scores of all students in a batch are fetched in bulk queries and
+        students with equivalent access to the course blocks share a single
+        transformed course structure.  If the scores of a batch can't be
+        fetched, its students are graded one at a time.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -94,16 +105,62 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
-                yield self._iter_grade_result(user, course_data, force_update)
+        if batch_size:
+            for result in self._iter_batched(users, course_data, force_update, batch_size, stats_tags):
+                yield result
+        else:
+            for user in users:
+                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                    yield self._iter_grade_result(user, course_data, force_update)
+
+    def _iter_batched(self, users, course_data, force_update, batch_size, stats_tags):
+        """
+        Yields a GradeResult for every student, grading the students in
+        batches of the given size.
+        """
+        collected_structure = course_data.collected_structure
+        scorable_locations = [block_key for block_key in collected_structure if possibly_scored(block_key)]
+
+        course_blocks = CourseBlocksForUsers(course_data.location, collected_structure)
 
-    def _iter_grade_result(self, user, course_data, force_update):
+        users = iter(users)
+        while True:
+            batch = list(islice(users, batch_size))
+            if not batch:
+                return
+
+            try:
+                try:
+                    prefetch_scores(batch, course_data.course_key, scorable_locations)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception(
+                        'Cannot prefetch the scores of %d students in course %s, grading them one at a time',
+                        len(batch),
+                        course_data.course_key,
+                    )
+                    clear_prefetched_scores()
+                    batch_course_blocks = None
+                else:
+                    batch_course_blocks = course_blocks
+
+                for user in batch:
+                    with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                        yield self._iter_grade_result(user, course_data, force_update, batch_course_blocks)
+            finally:
+                clear_prefetched_scores()
+
+    def _iter_grade_result(self, user, course_data, force_update, course_blocks=None):
+        """
+        Returns the GradeResult for the given user.  If course_blocks, a
+        CourseBlocksForUsers, is given, the user's course structure is
+        transformed with it.
+        """
         try:
             kwargs = {
                 'user': user,
                 'course': course_data.course,
                 'collected_block_structure': course_data.collected_structure,
+                'course_structure': course_blocks.get(user) if course_blocks else None,
                 'course_key': course_data.course_key
             }
             if force_update:
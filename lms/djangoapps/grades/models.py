@@ -11,10 +11,11 @@ persisted, course grades are also immune to changes in course content.
 import json
 import logging
 from base64 import b64encode
-from collections import namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
+from contextlib import contextmanager
 from hashlib import sha1
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.timezone import now
 from lazy import lazy
 from model_utils.models import TimeStampedModel
@@ -23,6 +24,7 @@ from opaque_keys.edx.keys import CourseKey, UsageKey
 from coursewarehistoryextended.fields import UnsignedBigIntAutoField, UnsignedBigIntOneToOneField
 from openedx.core.djangoapps.xmodule_django.models import CourseKeyField, UsageKeyField
 from request_cache import get_cache
+from track.event_transaction_utils import event_transaction, get_event_transaction_id, get_event_transaction_type
 
 import events
 
@@ -32,6 +34,10 @@ log = logging.getLogger(__name__)
 
 BLOCK_RECORD_LIST_VERSION = 1
 
+# Default number of subsection grades buffered, across all users, before
+# they are written in bulk within buffered_subsection_grade_writes.
+SUBSECTION_GRADE_WRITE_BATCH_SIZE = 1000
+
 # Used to serialize information about a block at the time it was used in
 # grade calculation.
 BlockRecord = namedtuple('BlockRecord', ['locator', 'weight', 'raw_possible', 'graded'])
@@ -360,11 +366,19 @@ class PersistentSubsectionGrade(TimeStampedModel):
     def update_or_create_grade(cls, **params):
         """
         Wrapper for objects.update_or_create.
+
+        Within buffered_subsection_grade_writes for the grade's course,
+        the write is deferred and an unsaved grade is returned.
         """
         cls._prepare_params(params)
+        cls._prepare_params_override(params)
+
+        write_buffer = _SubsectionGradeWriteBuffer.get(params['course_id'])
+        if write_buffer is not None:
+            return write_buffer.add(params)
+
         VisibleBlocks.cached_get_or_create(params['visible_blocks'])
         cls._prepare_params_visible_blocks_id(params)
-        cls._prepare_params_override(params)
 
         first_attempted = params.pop('first_attempted')
         user_id = params.pop('user_id')
@@ -617,6 +631,185 @@ class PersistentSubsectionGradeOverride(models.Model):
             pass
 
 
+class _SubsectionGradeWriteBuffer(object):
+    """
+    Buffers the subsection grades updated for a course, across all users,
+    and writes them, along with their VisibleBlocks, in bulk.
+    """
+    _CACHE_NAMESPACE = u"grades.models._SubsectionGradeWriteBuffer"
+
+    # Fields that identify a grade, rather than being updated.
+    _KEY_FIELDS = ('user_id', 'course_id', 'usage_key')
+
+    def __init__(self, course_key, batch_size):
+        self.course_key = course_key
+        self.batch_size = batch_size
+
+        # dict {(user_id, unicode(usage_key)): params of the grade}
+        self._pending_grades = OrderedDict()
+
+        # dict {hash: BlockRecordList}, deduplicated across users
+        self._pending_visible_blocks = {}
+
+        # dict {(user_id, unicode(usage_key)): (event transaction id, type)}
+        # in which each grade was updated, for its grade calculated event
+        self._event_transactions = {}
+
+    @classmethod
+    def get(cls, course_key):
+        """
+        Returns the active write buffer for the given course, or None.
+        """
+        return get_cache(cls._CACHE_NAMESPACE).get(course_key)
+
+    def activate(self):
+        get_cache(self._CACHE_NAMESPACE)[self.course_key] = self
+
+    def deactivate(self):
+        get_cache(self._CACHE_NAMESPACE).pop(self.course_key, None)
+
+    def add(self, params):
+        """
+        Buffers the grade for the given prepared params, flushing all
+        buffered grades if the batch is full.  Returns an unsaved
+        PersistentSubsectionGrade for the params.
+        """
+        visible_blocks = params['visible_blocks']
+        self._pending_visible_blocks[visible_blocks.hash_value] = visible_blocks
+        PersistentSubsectionGrade._prepare_params_visible_blocks_id(params)  # pylint: disable=protected-access
+
+        grade_key = (params['user_id'], unicode(params['usage_key']))
+        pending_params = self._pending_grades.pop(grade_key, None)
+        if pending_params is not None and pending_params['first_attempted'] is not None:
+            # As with consecutive calls to update_or_create_grade, the
+            # first attempt is never overwritten once it is set.
+            params['first_attempted'] = pending_params['first_attempted']
+        self._pending_grades[grade_key] = params
+        self._event_transactions[grade_key] = (get_event_transaction_id(), get_event_transaction_type())
+
+        if len(self._pending_grades) >= self.batch_size:
+            self.flush()
+        return PersistentSubsectionGrade(**params)
+
+    def flush(self):
+        """
+        Writes all buffered VisibleBlocks and grades within a single
+        transaction: a single query reads the existing grades, new grades
+        are bulk created, and existing grades are updated with a single
+        query per distinct set of updated values.  Then emits the grade
+        calculated event of each grade, within the event transaction in
+        which the grade was updated.
+        """
+        if not self._pending_grades:
+            return
+
+        with transaction.atomic():
+            VisibleBlocks.bulk_get_or_create(self._pending_visible_blocks.values(), self.course_key)
+
+            existing_grades = {
+                (grade.user_id, unicode(grade.usage_key)): grade
+                for grade in PersistentSubsectionGrade.objects.filter(
+                    course_id=self.course_key,
+                    user_id__in={user_id for user_id, _ in self._pending_grades},
+                    usage_key__in={params['usage_key'] for params in self._pending_grades.itervalues()},
+                )
+            }
+
+            grades = OrderedDict()
+            new_grades = []
+            # dict {sorted (field name, value) pairs: ids of the grades to update with them}
+            grade_ids_by_values = defaultdict(list)
+            for grade_key, params in self._pending_grades.iteritems():
+                grade = existing_grades.get(grade_key)
+                if grade is None:
+                    grade = PersistentSubsectionGrade(**params)
+                    new_grades.append(grade)
+                else:
+                    values = self._updated_values(grade, params)
+                    for field_name, value in values.iteritems():
+                        setattr(grade, field_name, value)
+                    grade_ids_by_values[tuple(sorted(values.iteritems()))].append(grade.id)
+                grades[grade_key] = grade
+
+            modified = now()
+            for values, grade_ids in grade_ids_by_values.iteritems():
+                PersistentSubsectionGrade.objects.filter(id__in=grade_ids).update(modified=modified, **dict(values))
+            self._create_grades(new_grades)
+
+        for grade_key, grade in grades.iteritems():
+            with event_transaction(*self._event_transactions[grade_key]):
+                PersistentSubsectionGrade._emit_grade_calculated_event(grade)  # pylint: disable=protected-access
+        self._pending_grades.clear()
+        self._pending_visible_blocks.clear()
+        self._event_transactions.clear()
+
+    def _updated_values(self, grade, params):
+        """
+        Returns the values of the fields of the given existing grade that
+        are updated with the given params, by field name.
+        """
+        values = {
+            field_name: value for field_name, value in params.iteritems()
+            if field_name not in self._KEY_FIELDS and field_name != 'first_attempted'
+        }
+        if grade.first_attempted is None and params['first_attempted'] is not None:
+            values['first_attempted'] = params['first_attempted']
+        return values
+
+    def _create_grades(self, grades):
+        """
+        Bulk creates the given grades.  If some of them were created since
+        the existing grades were read, by a concurrent update, the grades
+        are instead updated or created one at a time.
+        """
+        try:
+            with transaction.atomic():
+                PersistentSubsectionGrade.objects.bulk_create(grades)
+        except IntegrityError:
+            for grade in grades:
+                params = {
+                    field.attname: getattr(grade, field.attname)
+                    for field in PersistentSubsectionGrade._meta.concrete_fields  # pylint: disable=protected-access
+                    if field.attname not in ('id', 'created', 'modified')
+                }
+                saved_grade, created = PersistentSubsectionGrade.objects.get_or_create(
+                    user_id=grade.user_id,
+                    course_id=grade.course_id,
+                    usage_key=grade.usage_key,
+                    defaults=params,
+                )
+                if not created:
+                    values = self._updated_values(saved_grade, params)
+                    for field_name, value in values.iteritems():
+                        setattr(saved_grade, field_name, value)
+                    saved_grade.save()
+                grade.id = saved_grade.id
+                grade.first_attempted = saved_grade.first_attempted
+
+
+@contextmanager
+def buffered_subsection_grade_writes(course_key, batch_size=SUBSECTION_GRADE_WRITE_BATCH_SIZE):
+    """
+    Within this context, subsection grades of all users in the given course
+    that are updated via PersistentSubsectionGrade.update_or_create_grade
+    are buffered and written in bulk, in batches of the given size, with
+    the VisibleBlocks of all users in a batch deduplicated and created in a
+    single query.  Any remaining buffered grades are written upon exiting
+    the context without an error.
+
+    Grades that are buffered but not yet written cannot be read back from
+    the database, so this is intended for recomputing the grades of a
+    course, where each grade is written but not read.
+    """
+    write_buffer = _SubsectionGradeWriteBuffer(course_key, batch_size)
+    write_buffer.activate()
+    try:
+        yield
+        write_buffer.flush()
+    finally:
+        write_buffer.deactivate()
+
+
 def prefetch(user, course_key):
     PersistentSubsectionGradeOverride.prefetch(user.id, course_key)
     VisibleBlocks.bulk_read(course_key)
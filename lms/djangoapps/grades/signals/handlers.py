@@ -22,6 +22,8 @@ from .signals import (
     SUBSECTION_SCORE_CHANGED,
     SUBSECTION_OVERRIDE_CHANGED,
 )
+from .. import coalescing
+from ..config.waffle import COALESCE_SUBSECTION_GRADE_UPDATES, waffle
 from ..constants import ScoreDatabaseTableEnum
 from ..course_grade_factory import CourseGradeFactory
 from .. import events
@@ -208,19 +210,27 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
     enqueueing a subsection update operation to occur asynchronously.
     """
     events.grade_updated(**kwargs)
+    task_kwargs = dict(
+        user_id=kwargs['user_id'],
+        anonymous_user_id=kwargs.get('anonymous_user_id'),
+        course_id=kwargs['course_id'],
+        usage_id=kwargs['usage_id'],
+        only_if_higher=kwargs.get('only_if_higher'),
+        expected_modified_time=to_timestamp(kwargs['modified']),
+        score_deleted=kwargs.get('score_deleted', False),
+        event_transaction_id=unicode(get_event_transaction_id()),
+        event_transaction_type=unicode(get_event_transaction_type()),
+        score_db_table=kwargs['score_db_table'],
+    )
+    if (
+            waffle().is_enabled(COALESCE_SUBSECTION_GRADE_UPDATES) and
+            coalescing.is_coalescible(task_kwargs['only_if_higher'], task_kwargs['score_deleted'])
+    ):
+        task_kwargs['coalesce_generation'] = coalescing.queue_generation(
+            task_kwargs['user_id'], task_kwargs['usage_id'],
+        )
     recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
-            user_id=kwargs['user_id'],
-            anonymous_user_id=kwargs.get('anonymous_user_id'),
-            course_id=kwargs['course_id'],
-            usage_id=kwargs['usage_id'],
-            only_if_higher=kwargs.get('only_if_higher'),
-            expected_modified_time=to_timestamp(kwargs['modified']),
-            score_deleted=kwargs.get('score_deleted', False),
-            event_transaction_id=unicode(get_event_transaction_id()),
-            event_transaction_type=unicode(get_event_transaction_type()),
-            score_db_table=kwargs['score_db_table'],
-        ),
+        kwargs=task_kwargs,
         countdown=RECALCULATE_GRADE_DELAY_SECONDS,
     )
 
@@ -1,4 +1,4 @@
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from logging import getLogger
 
 from lazy import lazy
@@ -8,14 +8,69 @@ from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_g
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
+from request_cache import clear_cache, get_cache
 from student.models import anonymous_id_for_user
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
 
 from .course_data import CourseData
 from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSubsectionGrade
 
 log = getLogger(__name__)
 
+PrefetchedScores = namedtuple('PrefetchedScores', ['submissions_scores', 'csm_scores'])
+
+_PREFETCHED_SCORES_CACHE_NAMESPACE = u'grades.subsection_grade_factory.PrefetchedScores'
+
+
+def prefetch_scores(users, course_key, scorable_locations):
+    """
+    Prefetches, in bulk for all the given users, the scores stored in the
+    user state (in CSM) and by the Submissions API for the course, for later
+    use by SubsectionGradeFactory instances of these users within the
+    current request.
+    """
+    csm_scores = ScoresClient.create_for_users(course_key, [user.id for user in users], scorable_locations)
+    submissions_scores = _bulk_get_submissions_scores(users, course_key)
+    cache = get_cache(_PREFETCHED_SCORES_CACHE_NAMESPACE)
+    for user in users:
+        cache[(user.id, course_key)] = PrefetchedScores(submissions_scores[user.id], csm_scores[user.id])
+
+
+def clear_prefetched_scores():
+    """
+    Clears all scores prefetched via prefetch_scores.
+    """
+    clear_cache(_PREFETCHED_SCORES_CACHE_NAMESPACE)
+
+
+def _bulk_get_submissions_scores(users, course_key):
+    """
+    Returns a dict of user id to the user's scores stored by the
+    Submissions API for the course, in the format returned by
+    submissions_api.get_scores, queried for all the given users at once.
+    """
+    user_ids_by_anonymous_id = {
+        anonymous_id_for_user(user, course_key, save=False): user.id
+        for user in users
+    }
+    scores = {user.id: {} for user in users}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=user_ids_by_anonymous_id.keys(),
+    ).select_related('latest', 'latest__submission', 'student_item')
+    for summary in score_summaries:
+        if summary.latest.is_hidden():
+            continue
+        user_id = user_ids_by_anonymous_id[summary.student_item.student_id]
+        scores[user_id][summary.student_item.item_id] = {
+            'points_earned': summary.latest.points_earned,
+            'points_possible': summary.latest.points_possible,
+            'created_at': summary.latest.created_at,
+            'submission_uuid': summary.latest.submission.uuid if summary.latest.submission else None,
+        }
+    return scores
+
 
 class SubsectionGradeFactory(object):
     """
@@ -100,6 +155,9 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched_scores = self._prefetched_scores
+        if prefetched_scores:
+            return prefetched_scores.csm_scores
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -109,9 +167,20 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched_scores = self._prefetched_scores
+        if prefetched_scores:
+            return prefetched_scores.submissions_scores
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
+    @property
+    def _prefetched_scores(self):
+        """
+        Returns the PrefetchedScores for the student in the course, if
+        prefetched via prefetch_scores.  Otherwise, returns None.
+        """
+        return get_cache(_PREFETCHED_SCORES_CACHE_NAMESPACE).get((self.student.id, self.course_data.course_key))
+
     def _get_bulk_cached_grade(self, subsection):
         """
         Returns the student's SubsectionGrade for the subsection,
@@ -13,6 +13,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db.utils import DatabaseError
+from django.utils.timezone import now
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.grades.config.models import ComputeGradesSetting
 from opaque_keys.edx.keys import CourseKey, UsageKey
@@ -24,10 +25,12 @@ from track.event_transaction_utils import set_event_transaction_id, set_event_tr
 from util.date_utils import from_timestamp
 from xmodule.modulestore.django import modulestore
 
-from .config.waffle import DISABLE_REGRADE_ON_POLICY_CHANGE, waffle
+from . import coalescing
+from .config.waffle import COALESCE_SUBSECTION_GRADE_UPDATES, DISABLE_REGRADE_ON_POLICY_CHANGE, waffle
 from .constants import ScoreDatabaseTableEnum
 from .course_grade_factory import CourseGradeFactory
 from .exceptions import DatabaseNotReadyError
+from .models import buffered_subsection_grade_writes
 from .services import GradesService
 from .signals.signals import SUBSECTION_SCORE_CHANGED
 from .subsection_grade_factory import SubsectionGradeFactory
@@ -117,9 +120,15 @@ def compute_grades_for_course(course_key, offset, batch_size, **kwargs):  # pyli
     course_key = CourseKey.from_string(course_key)
     enrollments = CourseEnrollment.objects.filter(course_id=course_key).order_by('created')
     student_iter = (enrollment.user for enrollment in enrollments[offset:offset + batch_size])
-    for result in CourseGradeFactory().iter(users=student_iter, course_key=course_key, force_update=True):
-        if result.error is not None:
-            raise result.error
+    with buffered_subsection_grade_writes(course_key):
+        for result in CourseGradeFactory().iter(
+                users=student_iter,
+                course_key=course_key,
+                force_update=True,
+                batch_size=settings.COURSE_GRADES_BATCH_SIZE,
+        ):
+            if result.error is not None:
+                raise result.error
 
 
 @task(
@@ -160,6 +169,8 @@ def _recalculate_subsection_grade(self, **kwargs):
             event at the root of the current event transaction.
         score_db_table (ScoreDatabaseTableEnum): database table that houses
             the changed score. Used in conjunction with expected_modified_time.
+        coalesce_generation (int, OPTIONAL): generation number of the task,
+            if it may be coalesced with other tasks.  See grades.coalescing.
     """
     try:
         course_key = CourseLocator.from_string(kwargs['course_id'])
@@ -168,6 +179,16 @@ def _recalculate_subsection_grade(self, **kwargs):
         set_custom_metrics_for_course_key(course_key)
         set_custom_metric('usage_id', unicode(scored_block_usage_key))
 
+        coalesce = 'coalesce_generation' in kwargs and coalescing.is_coalescible(
+            kwargs['only_if_higher'], kwargs['score_deleted'],
+        )
+        if coalesce and coalescing.is_superseded(
+                kwargs['user_id'], kwargs['usage_id'], kwargs['coalesce_generation'],
+        ):
+            set_custom_metric('grades_coalesced', True)
+            log.debug(u"Grades: skipping recalculation superseded by a newer task. Kwargs: {}".format(kwargs))
+            return
+
         # The request cache is not maintained on celery workers,
         # where this code runs. So we take the values from the
         # main request cache and store them in the local request
@@ -191,6 +212,7 @@ def _recalculate_subsection_grade(self, **kwargs):
             kwargs['only_if_higher'],
             kwargs['user_id'],
             kwargs['score_deleted'],
+            kwargs['expected_modified_time'] if coalesce else None,
         )
     except Exception as exc:   # pylint: disable=broad-except
         if not isinstance(exc, KNOWN_RETRY_ERRORS):
@@ -250,12 +272,23 @@ def _has_db_updated_with_new_score(self, scored_block_usage_key, **kwargs):
     return db_is_updated
 
 
-def _update_subsection_grades(course_key, scored_block_usage_key, only_if_higher, user_id, score_deleted):
+def _update_subsection_grades(
+        course_key, scored_block_usage_key, only_if_higher, user_id, score_deleted, coalesce_modified_time=None,
+):
     """
     A helper function to update subsection grades in the database
     for each subsection containing the given block, and to signal
     that those subsection grades were updated.
+
+    If coalesce_modified_time is given, subsections whose grades were
+    already recalculated after the score with that modified time was
+    saved are skipped.
     """
+    recalculation_started = now()
+    record_recalculations = (
+        waffle().is_enabled(COALESCE_SUBSECTION_GRADE_UPDATES) and
+        coalescing.is_coalescible(only_if_higher, score_deleted)
+    )
     student = User.objects.get(id=user_id)
     store = modulestore()
     with store.bulk_operations(course_key):
@@ -272,6 +305,10 @@ def _update_subsection_grades(course_key, scored_block_usage_key, only_if_higher
 
         for subsection_usage_key in subsections_to_update:
             if subsection_usage_key in course_structure:
+                if coalesce_modified_time is not None and coalescing.is_recalculated_since(
+                        user_id, subsection_usage_key, coalesce_modified_time,
+                ):
+                    continue
                 subsection_grade = subsection_grade_factory.update(
                     course_structure[subsection_usage_key],
                     only_if_higher,
@@ -284,6 +321,10 @@ def _update_subsection_grades(course_key, scored_block_usage_key, only_if_higher
                     user=student,
                     subsection_grade=subsection_grade,
                 )
+                # Only recorded once the course grade was updated, so that
+                # a retry of this task doesn't skip the subsection.
+                if record_recalculations:
+                    coalescing.record_recalculation(user_id, subsection_usage_key, recalculation_started)
 
 
 def _course_task_args(course_key, **kwargs):
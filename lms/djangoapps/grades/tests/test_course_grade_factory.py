@@ -4,6 +4,7 @@ from nose.plugins.attrib import attr
 import ddt
 from courseware.access import has_access
 from django.conf import settings
+from lms.djangoapps.course_blocks.api import CourseBlocksForUsers
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from mock import patch
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
@@ -15,6 +16,7 @@ from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
+from ..subsection_grade_factory import prefetch_scores
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -228,6 +230,7 @@ class TestCourseGradeFactory(GradeTestBase):
 
 
 @attr(shard=1)
+@ddt.ddt
 class TestGradeIteration(SharedModuleStoreTestCase):
     """
     Test iteration through student course grades.
@@ -322,7 +325,77 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertIsNotNone(all_course_grades[student2])
         self.assertIsNotNone(all_course_grades[student5])
 
-    def _course_grades_and_errors_for(self, course, students):
+    @ddt.data(1, 2, 5, 10)
+    def test_batched_iteration(self, batch_size):
+        """
+        Students graded in batches get the same grades as when graded
+        one at a time, with each batch's scores prefetched once.
+        """
+        expected_grades, _ = self._course_grades_and_errors_for(self.course, self.students)
+        with patch(
+            'lms.djangoapps.grades.course_grade_factory.prefetch_scores',
+            wraps=prefetch_scores,
+        ) as mock_prefetch_scores:
+            all_course_grades, all_errors = self._course_grades_and_errors_for(
+                self.course, self.students, batch_size=batch_size,
+            )
+        self.assertEqual(mock_prefetch_scores.call_count, -(-len(self.students) // batch_size))
+        self.assertEqual(len(all_errors), 0)
+        self.assertEqual(
+            {student: course_grade.percent for student, course_grade in all_course_grades.iteritems()},
+            {student: course_grade.percent for student, course_grade in expected_grades.iteritems()},
+        )
+
+    def test_batched_iteration_transform_error(self):
+        """
+        A student whose course structure can't be transformed gets an
+        error, and the other students of the batch are still graded.
+        """
+        expected_grades, _ = self._course_grades_and_errors_for(self.course, self.students)
+        failing_student = self.students[1]
+        get_course_blocks = CourseBlocksForUsers.get
+
+        def get_course_blocks_or_fail(course_blocks, user):
+            if user == failing_student:
+                raise Exception("Error for {}.".format(user.username))
+            return get_course_blocks(course_blocks, user)
+
+        with patch.object(CourseBlocksForUsers, 'get', autospec=True, side_effect=get_course_blocks_or_fail):
+            all_course_grades, all_errors = self._course_grades_and_errors_for(
+                self.course, self.students, batch_size=len(self.students),
+            )
+        self.assertEqual(
+            {student: error.message for student, error in all_errors.iteritems()},
+            {failing_student: "Error for {}.".format(failing_student.username)},
+        )
+        self.assertIsNone(all_course_grades.pop(failing_student))
+        self.assertEqual(
+            {student: course_grade.percent for student, course_grade in all_course_grades.iteritems()},
+            {
+                student: course_grade.percent for student, course_grade in expected_grades.iteritems()
+                if student != failing_student
+            },
+        )
+
+    def test_batched_iteration_prefetch_error(self):
+        """
+        Students whose scores can't be prefetched are graded one at a time.
+        """
+        expected_grades, _ = self._course_grades_and_errors_for(self.course, self.students)
+        with patch(
+            'lms.djangoapps.grades.course_grade_factory.prefetch_scores',
+            side_effect=Exception("Prefetch error"),
+        ):
+            all_course_grades, all_errors = self._course_grades_and_errors_for(
+                self.course, self.students, batch_size=2,
+            )
+        self.assertEqual(len(all_errors), 0)
+        self.assertEqual(
+            {student: course_grade.percent for student, course_grade in all_course_grades.iteritems()},
+            {student: course_grade.percent for student, course_grade in expected_grades.iteritems()},
+        )
+
+    def _course_grades_and_errors_for(self, course, students, batch_size=None):
         """
         Simple helper method to iterate through student grades and give us
         two dictionaries -- one that has all students and their respective
@@ -332,7 +405,7 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         students_to_course_grades = {}
         students_to_errors = {}
 
-        for student, course_grade, error in CourseGradeFactory().iter(students, course):
+        for student, course_grade, error in CourseGradeFactory().iter(students, course, batch_size=batch_size):
             students_to_course_grades[student] = course_grade
             if error:
                 students_to_errors[student] = error
@@ -9,8 +9,10 @@ from hashlib import sha1
 
 import ddt
 import pytz
+from django.db import connection
 from django.db.utils import IntegrityError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 from freezegun import freeze_time
 from mock import patch
@@ -23,9 +25,15 @@ from lms.djangoapps.grades.models import (
     PersistentCourseGrade,
     PersistentSubsectionGrade,
     PersistentSubsectionGradeOverride,
-    VisibleBlocks
+    VisibleBlocks,
+    _SubsectionGradeWriteBuffer,
+    buffered_subsection_grade_writes
+)
+from track.event_transaction_utils import (
+    create_new_event_transaction_id,
+    get_event_transaction_id,
+    get_event_transaction_type
 )
-from track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
 
 
 class BlockRecordListTestCase(TestCase):
@@ -294,6 +302,106 @@ class PersistentSubsectionGradeTest(GradesModelTestCase):
         self.assertEqual(grade.earned_all, 0.0)
         self.assertEqual(grade.earned_graded, 0.0)
 
+    @ddt.data(True, False)
+    def test_buffered_writes(self, already_created):
+        if already_created:
+            PersistentSubsectionGrade.update_or_create_grade(**self.params)
+
+        with buffered_subsection_grade_writes(self.course_key):
+            for user_id in (self.params['user_id'], 54321):
+                self.params['user_id'] = user_id
+                self.params['earned_all'] = 7.0
+                grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
+                self.assertEqual(grade.earned_all, 7.0)
+                self.assertIsNone(grade.id)
+            self.assertEqual(
+                PersistentSubsectionGrade.objects.filter(earned_all=7.0).count(),
+                0,
+            )
+
+        for user_id in (12345, 54321):
+            read_grade = PersistentSubsectionGrade.read_grade(user_id=user_id, usage_key=self.usage_key)
+            self.assertEqual(read_grade.earned_all, 7.0)
+            self.assertEqual(read_grade.visible_blocks.blocks, self.block_records)
+        self.assertEqual(VisibleBlocks.objects.filter(hashed=self.block_records.hash_value).count(), 1)
+
+    def test_buffered_writes_batch_size(self):
+        with buffered_subsection_grade_writes(self.course_key, batch_size=2):
+            for user_id in range(3):
+                self.params['user_id'] = user_id
+                PersistentSubsectionGrade.update_or_create_grade(**self.params)
+            self.assertEqual(PersistentSubsectionGrade.objects.count(), 2)
+        self.assertEqual(PersistentSubsectionGrade.objects.count(), 3)
+
+    def test_buffered_writes_first_attempted_not_changed(self):
+        first_attempted = self.params['first_attempted']
+        with buffered_subsection_grade_writes(self.course_key):
+            PersistentSubsectionGrade.update_or_create_grade(**self.params)
+            self.params['first_attempted'] = now()
+            PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        read_grade = PersistentSubsectionGrade.read_grade(user_id=self.params['user_id'], usage_key=self.usage_key)
+        self.assertEqual(read_grade.first_attempted, first_attempted)
+
+    def test_buffered_writes_discarded_on_error(self):
+        with self.assertRaises(ValueError):
+            with buffered_subsection_grade_writes(self.course_key):
+                PersistentSubsectionGrade.update_or_create_grade(**self.params)
+                raise ValueError
+        self.assertFalse(PersistentSubsectionGrade.objects.exists())
+
+    def test_buffered_writes_event(self):
+        with patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
+            with buffered_subsection_grade_writes(self.course_key):
+                grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
+                tracker_mock.emit.assert_not_called()
+        self._assert_tracker_emitted_event(tracker_mock, grade)
+
+    def test_buffered_writes_event_transactions(self):
+        transaction_ids = {}
+        with patch('lms.djangoapps.grades.events.tracker') as tracker_mock:
+            with buffered_subsection_grade_writes(self.course_key):
+                for user_id in (12345, 54321):
+                    self.params['user_id'] = user_id
+                    transaction_ids[unicode(user_id)] = unicode(create_new_event_transaction_id())
+                    PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        self.assertEqual(
+            {
+                event_data['user_id']: event_data['event_transaction_id']
+                for (_, event_data), _ in tracker_mock.emit.call_args_list
+            },
+            transaction_ids,
+        )
+
+    def test_buffered_writes_updates_grouped(self):
+        user_ids = range(4)
+        for user_id in user_ids:
+            self.params['user_id'] = user_id
+            PersistentSubsectionGrade.update_or_create_grade(**self.params)
+
+        with buffered_subsection_grade_writes(self.course_key):
+            for user_id in user_ids:
+                self.params['user_id'] = user_id
+                self.params['earned_all'] = 7.0 if user_id % 2 else 8.0
+                PersistentSubsectionGrade.update_or_create_grade(**self.params)
+            with CaptureQueriesContext(connection) as queries:
+                _SubsectionGradeWriteBuffer.get(self.course_key).flush()
+        # An update per distinct earned_all.
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE')]), 2)
+
+        for user_id in user_ids:
+            read_grade = PersistentSubsectionGrade.read_grade(user_id=user_id, usage_key=self.usage_key)
+            self.assertEqual(read_grade.earned_all, 7.0 if user_id % 2 else 8.0)
+
+    def test_buffered_writes_concurrently_created(self):
+        with buffered_subsection_grade_writes(self.course_key):
+            self.params['earned_all'] = 7.0
+            PersistentSubsectionGrade.update_or_create_grade(**self.params)
+            with patch.object(PersistentSubsectionGrade.objects, 'bulk_create', side_effect=IntegrityError):
+                _SubsectionGradeWriteBuffer.get(self.course_key).flush()
+
+        read_grade = PersistentSubsectionGrade.read_grade(user_id=self.params['user_id'], usage_key=self.usage_key)
+        self.assertEqual(read_grade.earned_all, 7.0)
+
     def _assert_tracker_emitted_event(self, tracker_mock, grade):
         """
         Helper function to ensure that the mocked event tracker
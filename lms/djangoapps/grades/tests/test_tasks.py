@@ -12,13 +12,17 @@ import pytz
 import six
 from django.conf import settings
 from django.db.utils import IntegrityError
+from django.test.utils import override_settings
 from mock import MagicMock, patch
 
+from lms.djangoapps.grades import coalescing
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
+from lms.djangoapps.grades.config.waffle import COALESCE_SUBSECTION_GRADE_UPDATES, waffle
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
 from lms.djangoapps.grades.services import GradesService
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
+from lms.djangoapps.grades.subsection_grade_factory import prefetch_scores
 from lms.djangoapps.grades.tasks import (
     RECALCULATE_GRADE_DELAY_SECONDS,
     _course_task_args,
@@ -144,6 +148,79 @@ class RecalculateSubsectionGradeTest(HasCourseWithProblemsMixin, ModuleStoreTest
             PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
             mock_task_apply.assert_called_once_with(countdown=RECALCULATE_GRADE_DELAY_SECONDS, kwargs=local_task_args)
 
+    def test_triggered_with_coalesce_generation(self):
+        self.set_up_course()
+        with waffle().override(COALESCE_SUBSECTION_GRADE_UPDATES, active=True):
+            with patch(
+                'lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3.apply_async',
+                return_value=None
+            ) as mock_task_apply:
+                for _ in range(2):
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **self.problem_weighted_score_changed_kwargs)
+        generations = [call[1]['kwargs']['coalesce_generation'] for call in mock_task_apply.call_args_list]
+        self.assertEqual(generations[1], generations[0] + 1)
+
+    @ddt.data(True, False)
+    @patch('lms.djangoapps.grades.subsection_grade_factory.SubsectionGradeFactory.update')
+    def test_superseded_task_skipped(self, superseded, mock_update):
+        self.set_up_course()
+        generation = coalescing.queue_generation(self.user.id, unicode(self.problem.location))
+        if superseded:
+            coalescing.queue_generation(self.user.id, unicode(self.problem.location))
+        self.recalculate_subsection_grade_kwargs['coalesce_generation'] = generation
+        self._apply_recalculate_subsection_grade()
+        self.assertEqual(mock_update.called, not superseded)
+
+    @ddt.data(
+        (True, None, False),
+        (False, None, False),
+        (True, True, False),
+        (True, None, True),
+    )
+    @ddt.unpack
+    @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
+    def test_recalculated_subsection_skipped(self, coalesce, only_if_higher, score_deleted, mock_subsection_signal):
+        self.set_up_course()
+        with waffle().override(COALESCE_SUBSECTION_GRADE_UPDATES, active=True):
+            self._apply_recalculate_subsection_grade()
+        self.assertEqual(mock_subsection_signal.call_count, 1)
+
+        # The score of the second task was saved well before the first task ran.
+        self.recalculate_subsection_grade_kwargs['expected_modified_time'] = self.frozen_now_timestamp - 60
+        self.recalculate_subsection_grade_kwargs['only_if_higher'] = only_if_higher
+        self.recalculate_subsection_grade_kwargs['score_deleted'] = score_deleted
+        if coalesce:
+            self.recalculate_subsection_grade_kwargs['coalesce_generation'] = coalescing.queue_generation(
+                self.user.id, unicode(self.problem.location),
+            )
+        self._apply_recalculate_subsection_grade()
+        expected_skipped = coalesce and coalescing.is_coalescible(only_if_higher, score_deleted)
+        self.assertEqual(mock_subsection_signal.call_count, 1 if expected_skipped else 2)
+
+    @ddt.data(True, False)
+    @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
+    def test_recalculation_recorded(self, coalescing_enabled, mock_subsection_signal):
+        self.set_up_course()
+        with waffle().override(COALESCE_SUBSECTION_GRADE_UPDATES, active=coalescing_enabled):
+            self._apply_recalculate_subsection_grade()
+        self.assertTrue(mock_subsection_signal.called)
+        self.assertEqual(
+            coalescing.is_recalculated_since(self.user.id, self.sequential.location, self.frozen_now_timestamp - 60),
+            coalescing_enabled,
+        )
+
+    @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
+    def test_retry_not_skipped_after_signal_failure(self, mock_subsection_signal):
+        self.set_up_course()
+        self.recalculate_subsection_grade_kwargs['expected_modified_time'] = self.frozen_now_timestamp - 60
+        self.recalculate_subsection_grade_kwargs['coalesce_generation'] = coalescing.queue_generation(
+            self.user.id, unicode(self.problem.location),
+        )
+        mock_subsection_signal.side_effect = [IntegrityError("WHAMMY"), None]
+        with waffle().override(COALESCE_SUBSECTION_GRADE_UPDATES, active=True):
+            self._apply_recalculate_subsection_grade()
+        self.assertEqual(mock_subsection_signal.call_count, 2)
+
     @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
     def test_triggers_subsection_score_signal(self, mock_subsection_signal):
         """
@@ -436,6 +513,22 @@ class ComputeGradesForCourseTest(HasCourseWithProblemsMixin, ModuleStoreTestCase
             min(batch_size, 8)  # No more than 8 due to offset
         )
 
+    @ddt.data(0, 3)
+    def test_graded_in_batches(self, grades_batch_size):
+        with override_settings(COURSE_GRADES_BATCH_SIZE=grades_batch_size):
+            with patch(
+                'lms.djangoapps.grades.course_grade_factory.prefetch_scores',
+                wraps=prefetch_scores,
+            ) as mock_prefetch_scores:
+                compute_grades_for_course_v2.delay(
+                    course_key=six.text_type(self.course.id),
+                    batch_size=8,
+                    offset=4,
+                )
+        # The 8 learners are graded in batches, or else one at a time.
+        self.assertEqual(mock_prefetch_scores.call_count, 3 if grades_batch_size else 0)
+        self.assertEqual(PersistentCourseGrade.objects.filter(course_id=self.course.id).count(), 8)
+
     @ddt.data(*xrange(1, 12, 3))
     def test_course_task_args(self, test_batch_size):
         offset_expected = 0
@@ -0,0 +1,19 @@
+"""
+This module contains various configuration settings via
+waffle switches for the Instructor Task app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'instructor_task'
+
+# Switches
+STREAM_GRADE_REPORTS = u'stream_grade_reports'
+PARALLEL_RESCORING = u'parallel_rescoring'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for Instructor Tasks.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'InstructorTask: ')
@@ -44,12 +44,20 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
 )
 from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
+    parallel_rescoring_enabled,
     perform_module_state_update,
+    perform_module_state_update_subtask,
     override_score_module_state,
+    queue_module_state_update_subtasks,
     rescore_problem_module_state,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
+from lms.djangoapps.instructor_task.tasks_helper.shards import (
+    generate_report_shard,
+    queue_report_shards,
+    sharded_reports_enabled
+)
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -72,15 +80,37 @@ def rescore_problem(entry_id, xmodule_instance_args):
 
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
+
+    If parallel rescoring is enabled, the submissions are rescored by subtasks,
+    each of which rescores a range of them.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    if parallel_rescoring_enabled():
+        def _create_rescore_subtask(entry_id, module_id_range, initial_subtask_status):
+            """Creates a subtask to rescore the submissions in the given StudentModule id range."""
+            return rescore_problem_subtask.subtask(
+                (entry_id, xmodule_instance_args, module_id_range, initial_subtask_status.to_dict()),
+                task_id=initial_subtask_status.task_id,
+            )
+        visit_fcn = partial(queue_module_state_update_subtasks, _create_rescore_subtask, None)
+    else:
+        update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+        visit_fcn = partial(perform_module_state_update, update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task()  # pylint: disable=not-callable
+def rescore_problem_subtask(entry_id, xmodule_instance_args, module_id_range, subtask_status_dict):
+    """
+    Rescores the submissions in the given StudentModule id range, as a
+    subtask of a rescore_problem task.
+    """
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_subtask(update_fcn, None, entry_id, module_id_range, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def override_problem_score(entry_id, xmodule_instance_args):
     """
@@ -183,7 +213,7 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    task_fn = _grade_report_task_fn(CourseGradeReport, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -200,10 +230,48 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(ProblemGradeReport.generate, xmodule_instance_args)
+    task_fn = _grade_report_task_fn(ProblemGradeReport, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _grade_report_task_fn(report_class, xmodule_instance_args):
+    """
+    Returns the task function that generates a report of the given
+    report_class, either directly or by queueing subtasks that each
+    generate a shard of the report.
+    """
+    if sharded_reports_enabled():
+        def _create_shard_subtask(entry_id, user_id_range, initial_subtask_status):
+            """Creates a subtask to generate the shard of the report for the given user id range."""
+            return generate_grade_report_shard.subtask(
+                (
+                    entry_id,
+                    report_class.REPORT_NAME,
+                    xmodule_instance_args,
+                    user_id_range,
+                    initial_subtask_status.to_dict(),
+                ),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+        return partial(queue_report_shards, report_class, _create_shard_subtask, xmodule_instance_args)
+    return partial(report_class.generate, xmodule_instance_args)
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def generate_grade_report_shard(entry_id, report_name, xmodule_instance_args, user_id_range, subtask_status_dict):
+    """
+    Generates the shard of a grade report for the enrollees in the given
+    user id range, merging all shards into the final report once the last
+    shard has been generated.
+    """
+    report_class = {
+        report.REPORT_NAME: report
+        for report in (CourseGradeReport, ProblemGradeReport)
+    }[report_name]
+    return generate_report_shard(report_class, xmodule_instance_args, entry_id, user_id_range, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -8,6 +8,7 @@ from datetime import datetime
 from itertools import chain, izip, izip_longest
 from time import time
 
+from django.conf import settings
 from lazy import lazy
 from pytz import UTC
 
@@ -29,8 +30,9 @@ from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
+from ..config.waffle import STREAM_GRADE_REPORTS, waffle
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import ReportCSVWriter, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -192,6 +194,10 @@ class CourseGradeReport(object):
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
 
+    # Names of the uploaded CSVs.
+    REPORT_NAME = 'grade_report'
+    ERROR_REPORT_NAME = 'grade_report_err'
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -201,6 +207,27 @@ class CourseGradeReport(object):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def shard_headers(cls, _xmodule_instance_args, _entry_id, course_id, action_name):
+        """
+        Returns the (success_headers, error_headers) of a grade report
+        generated in shards.
+        """
+        context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, None, action_name)
+        report = CourseGradeReport()
+        return report._success_headers(context), report._error_headers()
+
+    @classmethod
+    def shard_batched_rows(cls, _xmodule_instance_args, _entry_id, course_id, action_name, users):
+        """
+        A generator of batches of (success_rows, error_rows) for the given
+        queryset of users, for a grade report generated in shards.
+        """
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, None, action_name)
+            for rows in CourseGradeReport()._batched_rows(context, users):
+                yield rows
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -210,11 +237,15 @@ class CourseGradeReport(object):
         error_headers = self._error_headers()
         batched_rows = self._batched_rows(context)
 
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+        if waffle().is_enabled(STREAM_GRADE_REPORTS):
+            context.update_status(u'Compiling and uploading grades')
+            self._compile_and_upload_streaming(context, success_headers, error_headers, batched_rows)
+        else:
+            context.update_status(u'Compiling grades')
+            success_rows, error_rows = self._compile(context, batched_rows)
 
-        context.update_status(u'Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+            context.update_status(u'Uploading grades')
+            self._upload(context, success_headers, success_rows, error_headers, error_rows)
 
         return context.update_status(u'Completed grades')
 
@@ -239,11 +270,12 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _batched_rows(self, context, users=None):
         """
-        A generator of batches of (success_rows, error_rows) for this report.
+        A generator of batches of (success_rows, error_rows) for this report,
+        for the given queryset of users or, if None, for all enrollees.
         """
-        for users in self._batch_users(context):
+        for users in self._batch_users(context, users):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
@@ -264,15 +296,43 @@ class CourseGradeReport(object):
         context.task_progress.total = context.task_progress.attempted
         return success_rows, error_rows
 
+    def _compile_and_upload_streaming(self, context, success_headers, error_headers, batched_rows):
+        """
+        Writes the rows of each of the given batched_rows to temporary files
+        as soon as the batch is computed, updating the task progress after
+        each batch, and uploads the CSVs once all batches are written.  Only
+        a single batch of rows is held in memory at a time.
+        """
+        date = datetime.now(UTC)
+        with ReportCSVWriter(self.REPORT_NAME, context.course_id, date) as success_writer, \
+                ReportCSVWriter(self.ERROR_REPORT_NAME, context.course_id, date) as error_writer:
+            success_writer.writerows([success_headers])
+            error_writer.writerows([error_headers])
+
+            for success_rows, error_rows in batched_rows:
+                success_writer.writerows(success_rows)
+                error_writer.writerows(error_rows)
+
+                # update metrics on task status
+                context.task_progress.succeeded += len(success_rows)
+                context.task_progress.failed += len(error_rows)
+                context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
+                context.task_progress.total = context.task_progress.attempted
+                context.task_progress.update_task_state(extra_meta={'step': u'Compiling and uploading grades'})
+
+            success_writer.upload()
+            if context.task_progress.failed > 0:
+                error_writer.upload()
+
     def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
         """
         Creates and uploads a CSV for the given headers and rows.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
+        upload_csv_to_report_store([success_headers] + success_rows, self.REPORT_NAME, context.course_id, date)
         if len(error_rows) > 0:
             error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+            upload_csv_to_report_store(error_rows, self.ERROR_REPORT_NAME, context.course_id, date)
 
     def _grades_header(self, context):
         """
@@ -286,15 +346,17 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, users=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of the given queryset of users or,
+        if None, of all enrollees.
         """
         def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
             args = [iter(iterable)] * chunk_size
             return izip_longest(*args, fillvalue=fillvalue)
 
-        users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
+        if users is None:
+            users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True)
         users = users.select_related('profile__allow_certificate')
         return grouper(users)
 
@@ -432,6 +494,7 @@ class CourseGradeReport(object):
                 course=context.course,
                 collected_block_structure=context.course_structure,
                 course_key=context.course_id,
+                batch_size=settings.COURSE_GRADES_BATCH_SIZE,
             ):
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
@@ -451,6 +514,18 @@ class CourseGradeReport(object):
 
 
 class ProblemGradeReport(object):
+    # Names of the uploaded CSVs.
+    REPORT_NAME = 'problem_grade_report'
+    ERROR_REPORT_NAME = 'problem_grade_report_err'
+
+    # This struct encapsulates both the display names of each static item in the
+    # header row as values as well as the django User field names of those items
+    # as the keys.  It is structured in this way to keep the values related.
+    HEADER_ROW = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
+
+    # Number of students graded between updates of the task progress.
+    STATUS_INTERVAL = 100
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -459,69 +534,125 @@ class ProblemGradeReport(object):
         """
         start_time = time()
         start_date = datetime.now(UTC)
-        status_interval = 100
         enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True)
         task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
-        # This struct encapsulates both the display names of each static item in the
-        # header row as values as well as the django User field names of those items
-        # as the keys.  It is structured in this way to keep the values related.
-        header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
-
         course = get_course_by_id(course_id)
         graded_scorable_blocks = cls._graded_scorable_blocks_to_header(course)
 
         # Just generate the static fields for now.
-        rows = [list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())]
-        error_rows = [list(header_row.values()) + ['error_msg']]
+        header, error_header = cls._headers(graded_scorable_blocks)
+        rows = [header]
+        error_rows = [error_header]
         current_step = {'step': 'Calculating Grades'}
 
         # Bulk fetch and cache enrollment states so we can efficiently determine
         # whether each user is currently enrolled in the course.
         CourseEnrollment.bulk_fetch_enrollment_states(enrolled_students, course_id)
 
-        for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
-            student_fields = [getattr(student, field_name) for field_name in header_row]
+        for student, course_grade, error in CourseGradeFactory().iter(
+                enrolled_students, course, batch_size=settings.COURSE_GRADES_BATCH_SIZE,
+        ):
             task_progress.attempted += 1
 
-            if not course_grade:
-                err_msg = error.message
-                # There was an error grading this student.
-                if not err_msg:
-                    err_msg = u'Unknown error'
-                error_rows.append(student_fields + [err_msg])
+            row, error_row = cls._student_rows(course_id, graded_scorable_blocks, student, course_grade, error)
+            if error_row:
+                error_rows.append(error_row)
                 task_progress.failed += 1
                 continue
 
-            enrollment_status = _user_enrollment_status(student, course_id)
-
-            earned_possible_values = []
-            for block_location in graded_scorable_blocks:
-                try:
-                    problem_score = course_grade.problem_scores[block_location]
-                except KeyError:
-                    earned_possible_values.append([u'Not Available', u'Not Available'])
-                else:
-                    if problem_score.first_attempted:
-                        earned_possible_values.append([problem_score.earned, problem_score.possible])
-                    else:
-                        earned_possible_values.append([u'Not Attempted', problem_score.possible])
-
-            rows.append(student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values))
+            rows.append(row)
 
             task_progress.succeeded += 1
-            if task_progress.attempted % status_interval == 0:
+            if task_progress.attempted % cls.STATUS_INTERVAL == 0:
                 task_progress.update_task_state(extra_meta=current_step)
 
         # Perform the upload if any students have been successfully graded
         if len(rows) > 1:
-            upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+            upload_csv_to_report_store(rows, cls.REPORT_NAME, course_id, start_date)
         # If there are any error rows, write them out as well
         if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+            upload_csv_to_report_store(error_rows, cls.ERROR_REPORT_NAME, course_id, start_date)
 
         return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
+    @classmethod
+    def shard_headers(cls, _xmodule_instance_args, _entry_id, course_id, _action_name):
+        """
+        Returns the (success_headers, error_headers) of a problem grade
+        report generated in shards.
+        """
+        course = get_course_by_id(course_id)
+        return cls._headers(cls._graded_scorable_blocks_to_header(course))
+
+    @classmethod
+    def shard_batched_rows(cls, _xmodule_instance_args, _entry_id, course_id, _action_name, users):
+        """
+        A generator of batches of (success_rows, error_rows) for the given
+        queryset of users, for a problem grade report generated in shards.
+        """
+        course = get_course_by_id(course_id)
+        graded_scorable_blocks = cls._graded_scorable_blocks_to_header(course)
+        CourseEnrollment.bulk_fetch_enrollment_states(users, course_id)
+
+        rows, error_rows = [], []
+        for student, course_grade, error in CourseGradeFactory().iter(
+                users, course, batch_size=settings.COURSE_GRADES_BATCH_SIZE,
+        ):
+            row, error_row = cls._student_rows(course_id, graded_scorable_blocks, student, course_grade, error)
+            if error_row:
+                error_rows.append(error_row)
+            else:
+                rows.append(row)
+
+            if len(rows) + len(error_rows) == cls.STATUS_INTERVAL:
+                yield rows, error_rows
+                rows, error_rows = [], []
+
+        if rows or error_rows:
+            yield rows, error_rows
+
+    @classmethod
+    def _headers(cls, graded_scorable_blocks):
+        """
+        Returns the (success_headers, error_headers) of the report.
+        """
+        return (
+            list(cls.HEADER_ROW.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values()),
+            list(cls.HEADER_ROW.values()) + ['error_msg'],
+        )
+
+    @classmethod
+    def _student_rows(cls, course_id, graded_scorable_blocks, student, course_grade, error):
+        """
+        Returns a tuple of (row, error_row) for the given student's grading
+        result, exactly one of which is None.
+        """
+        student_fields = [getattr(student, field_name) for field_name in cls.HEADER_ROW]
+
+        if not course_grade:
+            err_msg = error.message
+            # There was an error grading this student.
+            if not err_msg:
+                err_msg = u'Unknown error'
+            return None, student_fields + [err_msg]
+
+        enrollment_status = _user_enrollment_status(student, course_id)
+
+        earned_possible_values = []
+        for block_location in graded_scorable_blocks:
+            try:
+                problem_score = course_grade.problem_scores[block_location]
+            except KeyError:
+                earned_possible_values.append([u'Not Available', u'Not Available'])
+            else:
+                if problem_score.first_attempted:
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                else:
+                    earned_possible_values.append([u'Not Attempted', problem_score.possible])
+
+        return student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values), None
+
     @classmethod
     def _graded_scorable_blocks_to_header(cls, course):
         """
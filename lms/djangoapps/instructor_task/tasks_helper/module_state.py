@@ -5,6 +5,8 @@ import json
 import logging
 from time import time
 
+from celery.states import FAILURE, SUCCESS
+from django.conf import settings
 from django.contrib.auth.models import User
 from opaque_keys.edx.keys import UsageKey
 
@@ -22,12 +24,26 @@ from util.db import outer_atomic
 from xblock.runtime import KvsFieldData
 from xblock.scorable import Score
 from xmodule.modulestore.django import modulestore
+from ..config.waffle import PARALLEL_RESCORING, waffle
 from ..exceptions import UpdateProblemModuleStateError
+from ..models import InstructorTask
+from ..subtasks import SubtaskStatus, check_subtask_is_valid, queue_subtasks_for_query, update_subtask_status
 from .runner import TaskProgress
 from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED, UPDATE_STATUS_SUCCEEDED
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Number of StudentModules fetched and updated at a time.
+MODULE_STATE_UPDATE_BATCH_SIZE = 100
+
+
+def parallel_rescoring_enabled():
+    """
+    Returns whether problems should be rescored by subtasks, each of which
+    rescores a range of the StudentModules.
+    """
+    return waffle().is_enabled(PARALLEL_RESCORING)
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -48,6 +64,9 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    The StudentModules are fetched and updated in batches of MODULE_STATE_UPDATE_BATCH_SIZE,
+    and the task progress is updated after each batch.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -65,6 +84,130 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
+    problems, modules_to_update = _get_modules_to_update(course_id, task_input, filter_fcn)
+
+    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    task_progress.update_task_state()
+
+    with modulestore().bulk_operations(course_id):
+        for module_batch in _batches_of_modules(modules_to_update):
+            for module_to_update in module_batch:
+                task_progress.attempted += 1
+                update_status = _update_module_state(update_fcn, problems, module_to_update, task_input, action_name)
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    # If the update_fcn returns true, then it performed some kind of work.
+                    # Logging of failures is left to the update_fcn itself.
+                    task_progress.succeeded += 1
+                elif update_status == UPDATE_STATUS_FAILED:
+                    task_progress.failed += 1
+                else:
+                    task_progress.skipped += 1
+            task_progress.update_task_state()
+
+    return task_progress.update_task_state()
+
+
+def queue_module_state_update_subtasks(create_subtask_fcn, filter_fcn, entry_id, course_id, task_input, action_name):
+    """
+    Queues subtasks that each perform the update of the StudentModules selected as in
+    perform_module_state_update, for a range of their ids, and returns the task progress.
+
+    `create_subtask_fcn` is a function that constructs the subtask for a range of StudentModules,
+    given the entry_id, the (first, last) StudentModule id range of the subtask, and the initial
+    SubtaskStatus of the subtask.  The subtask calls perform_module_state_update_subtask.
+
+    The counts of the subtasks are aggregated into the progress of the task as they complete.
+    """
+    start_time = time()
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the parent task is requeued after its subtasks were queued,
+    # there is no need to queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u'Task %s has already queued its subtasks.  InstructorTask = %s', entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    _, modules_to_update = _get_modules_to_update(course_id, task_input, filter_fcn)
+    modules_to_update = modules_to_update.order_by('id')
+    total_num_modules = modules_to_update.count()
+
+    # Subtasks are never queued for an empty query, so the parent
+    # task would otherwise never complete.
+    if total_num_modules == 0:
+        return TaskProgress(action_name, 0, start_time).update_task_state()
+
+    def _create_subtask(student_modules, initial_subtask_status):
+        """
+        Creates a subtask to update the range of the given StudentModules.
+        """
+        module_id_range = (student_modules[0]['pk'], student_modules[-1]['pk'])
+        return create_subtask_fcn(entry_id, module_id_range, initial_subtask_status)
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_subtask,
+        [modules_to_update],
+        [],
+        settings.RESCORE_STUDENT_MODULES_PER_TASK,
+        total_num_modules,
+    )
+
+
+def perform_module_state_update_subtask(update_fcn, filter_fcn, entry_id, module_id_range, subtask_status_dict):
+    """
+    Performs the update of the StudentModules of the instructor task in the given
+    (first, last) module_id_range, as a subtask queued by queue_module_state_update_subtasks.
+
+    Returns the status of the subtask in a form that can be serialized by
+    Celery into JSON.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_input = json.loads(entry.task_input)
+    action_name = json.loads(entry.task_output)['action_name']
+    TASK_LOG.info(
+        u'Updating student modules %s as subtask %s of instructor task %d',
+        module_id_range, current_task_id, entry_id,
+    )
+
+    try:
+        problems, modules_to_update = _get_modules_to_update(course_id, task_input, filter_fcn)
+        modules_to_update = modules_to_update.filter(id__range=module_id_range)
+        with modulestore().bulk_operations(course_id):
+            for module_batch in _batches_of_modules(modules_to_update):
+                for module_to_update in module_batch:
+                    update_status = _update_module_state(
+                        update_fcn, problems, module_to_update, task_input, action_name
+                    )
+                    if update_status == UPDATE_STATUS_SUCCEEDED:
+                        subtask_status.increment(succeeded=1)
+                    elif update_status == UPDATE_STATUS_FAILED:
+                        subtask_status.increment(failed=1)
+                    else:
+                        # Skipped updates are attempted, as in perform_module_state_update.
+                        subtask_status.increment(skipped=1)
+                        subtask_status.attempted += 1
+    except Exception:
+        TASK_LOG.exception(u'Subtask %s of instructor task %d failed', current_task_id, entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
+def _get_modules_to_update(course_id, task_input, filter_fcn):
+    """
+    Returns the descriptors of the problems selected by the task_input, by usage key,
+    and the query of the StudentModules of these problems to be updated.
+    """
     usage_keys = []
     problem_url = task_input.get('problem_url')
     entrance_exam_url = task_input.get('entrance_exam_url')
@@ -85,8 +228,10 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
         problems = get_problems_in_section(entrance_exam_url)
         usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
 
-    # find the modules in question
-    modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key__in=usage_keys)
+    # find the modules in question, along with their students, which every update needs
+    modules_to_update = StudentModule.objects.filter(
+        course_id=course_id, module_state_key__in=usage_keys,
+    ).select_related('student')
 
     # give the option of updating an individual student. If not specified,
     # then updates all students who have responded to a problem so far
@@ -105,28 +250,41 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
-    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
-    task_progress.update_task_state()
+    return problems, modules_to_update
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update, task_input)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
-    return task_progress.update_task_state()
+def _batches_of_modules(modules_to_update):
+    """
+    Yields the StudentModules of the given query in lists of up to
+    MODULE_STATE_UPDATE_BATCH_SIZE, in order of their ids, each fetched
+    with a separate query.
+
+    Unlike iterating over the query itself, this does not hold all of the
+    StudentModules in memory, and is unaffected by updates that delete them.
+    """
+    modules_to_update = modules_to_update.order_by('id')
+    last_id = None
+    while True:
+        batch_query = modules_to_update if last_id is None else modules_to_update.filter(id__gt=last_id)
+        module_batch = list(batch_query[:MODULE_STATE_UPDATE_BATCH_SIZE])
+        if not module_batch:
+            return
+        yield module_batch
+        last_id = module_batch[-1].id
+
+
+def _update_module_state(update_fcn, problems, module_to_update, task_input, action_name):
+    """
+    Calls the update_fcn on the given StudentModule, and returns its update status.
+    """
+    module_descriptor = problems[unicode(module_to_update.module_state_key)]
+    # There is no try here:  if there's an error, we let it throw, and the task will
+    # be marked as FAILED, with a stack trace.
+    with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+        update_status = update_fcn(module_descriptor, module_to_update, task_input)
+    if update_status not in (UPDATE_STATUS_SUCCEEDED, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED):
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    return update_status
 
 
 @outer_atomic
@@ -0,0 +1,281 @@
+"""
+Functionality for generating reports in shards, across multiple Celery
+workers.
+
+The enrollees of the course are split into ranges of user ids, each of
+which is handed to a subtask.  Each subtask writes the rows for its users
+to partial CSVs in the ReportStore.  Once all subtasks have completed, the
+last of them merges the partial CSVs, in order of their user id ranges,
+into the final report, and only then marks the instructor task as
+succeeded.  If any subtask failed, the partial CSVs are deleted and the
+instructor task is marked as failed instead.
+
+A report class that can be generated in shards provides:
+
+    REPORT_NAME, ERROR_REPORT_NAME: names of the uploaded CSVs.
+    shard_headers(xmodule_instance_args, entry_id, course_id, action_name):
+        returns the (success_headers, error_headers) of the report.
+    shard_batched_rows(xmodule_instance_args, entry_id, course_id, action_name, users):
+        yields batches of (success_rows, error_rows) for the given users.
+"""
+import json
+import logging
+import os.path
+from datetime import datetime
+
+from celery.states import FAILURE, SUCCESS
+from django.core.cache import cache
+from django.db import transaction
+from pytz import UTC
+
+from student.models import CourseEnrollment
+
+from ..config.models import GradeReportSetting
+from ..models import InstructorTask, ReportStore
+from ..subtasks import SubtaskStatus, check_subtask_is_valid, queue_subtasks_for_query, update_subtask_status
+from .utils import ReportCSVWriter
+
+TASK_LOG = logging.getLogger('edx.celery.task')
+
+# Directory, within the course's directory in the ReportStore, in which
+# the partial CSVs of the shards are stored.  Since it is a subdirectory,
+# partial CSVs are not listed among the course's downloadable reports.
+SHARDS_DIRECTORY = u'shards'
+
+# Lock expiration should be long enough to allow the partial CSVs to be merged.
+MERGE_LOCK_EXPIRE = 60 * 30  # Lock expires in 30 minutes
+
+
+def sharded_reports_enabled():
+    """
+    Returns whether reports should be generated in shards.
+    """
+    return GradeReportSetting.current().enabled
+
+
+def queue_report_shards(
+        report_class,
+        create_shard_subtask,
+        xmodule_instance_args,
+        entry_id,
+        course_id,
+        task_input,
+        action_name,
+):
+    """
+    Queues the subtasks that generate the shards of a report of the given
+    report_class for the course, and returns the task progress.
+
+    `create_shard_subtask` is a function that constructs the subtask for a
+    shard, given the entry_id, the (first, last) user id range of the shard,
+    and the initial SubtaskStatus of the subtask.
+
+    If the course has no enrollees, the report is generated directly.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the parent task is requeued after its subtasks were queued,
+    # there is no need to queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u'Task %s has already queued its report shards.  InstructorTask = %s', entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    enrollees = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True).order_by('id')
+    total_num_enrollees = enrollees.count()
+
+    # Subtasks are never queued for an empty query, so the parent
+    # task would otherwise never complete.
+    if total_num_enrollees == 0:
+        return report_class.generate(xmodule_instance_args, entry_id, course_id, task_input, action_name)
+
+    def _create_subtask(users, initial_subtask_status):
+        """
+        Creates a subtask to generate the shard for the range of the given users.
+        """
+        user_id_range = (users[0]['pk'], users[-1]['pk'])
+        return create_shard_subtask(entry_id, user_id_range, initial_subtask_status)
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_subtask,
+        [enrollees],
+        [],
+        GradeReportSetting.current().batch_size,
+        total_num_enrollees,
+    )
+
+
+def generate_report_shard(report_class, xmodule_instance_args, entry_id, user_id_range, subtask_status_dict):
+    """
+    Generates the shard of a report of the given report_class for the
+    enrollees in the given (first, last) user_id_range, and stores its
+    partial CSVs in the ReportStore.  If this is the last shard to complete,
+    merges all partial CSVs into the final report.
+
+    Returns the status of the subtask in a form that can be serialized by
+    Celery into JSON.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    action_name = json.loads(entry.task_output)['action_name']
+    TASK_LOG.info(
+        u'Generating report shard for users %s as subtask %s of instructor task %d',
+        user_id_range, current_task_id, entry_id,
+    )
+
+    try:
+        users = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True).filter(
+            id__range=user_id_range,
+        ).order_by('id')
+        timestamp = datetime.now(UTC)
+        with ReportCSVWriter(report_class.REPORT_NAME, course_id, timestamp) as success_writer, \
+                ReportCSVWriter(report_class.ERROR_REPORT_NAME, course_id, timestamp) as error_writer:
+            for success_rows, error_rows in report_class.shard_batched_rows(
+                    xmodule_instance_args, entry_id, course_id, action_name, users,
+            ):
+                success_writer.writerows(success_rows)
+                error_writer.writerows(error_rows)
+                subtask_status.increment(succeeded=len(success_rows), failed=len(error_rows))
+
+            success_writer.store_as(_shard_filename(entry_id, report_class.REPORT_NAME, user_id_range))
+            error_writer.store_as(_shard_filename(entry_id, report_class.ERROR_REPORT_NAME, user_id_range))
+    except Exception:
+        TASK_LOG.exception(u'Report shard subtask %s of instructor task %d failed', current_task_id, entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False)
+        _merge_shards_if_complete(report_class, xmodule_instance_args, entry_id, course_id, action_name)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False)
+    _merge_shards_if_complete(report_class, xmodule_instance_args, entry_id, course_id, action_name)
+    return subtask_status.to_dict()
+
+
+def _merge_shards_if_complete(report_class, xmodule_instance_args, entry_id, course_id, action_name):
+    """
+    Merges the partial CSVs of all shards of the report into the final
+    report, and then marks the instructor task as succeeded, if all of its
+    subtasks have completed and the merge has not already been started by
+    another subtask.  If any subtask failed, or the merge fails, the partial
+    CSVs are deleted and the instructor task is marked as failed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+
+    # cache.add fails if the key already exists
+    if not cache.add(u'report-shards-merge-{}'.format(entry.task_id), 'true', MERGE_LOCK_EXPIRE):
+        return
+
+    csv_names = (report_class.REPORT_NAME, report_class.ERROR_REPORT_NAME)
+    if subtask_dict['failed'] > 0:
+        TASK_LOG.error(
+            u'Not merging report shards of instructor task %d: %d of %d subtasks failed',
+            entry_id, subtask_dict['failed'], subtask_dict['total'],
+        )
+        _delete_shards(entry_id, course_id, csv_names)
+        _complete_task(entry_id, FAILURE, u'{} of {} report shards failed'.format(
+            subtask_dict['failed'], subtask_dict['total'],
+        ))
+        return
+
+    try:
+        success_headers, error_headers = report_class.shard_headers(
+            xmodule_instance_args, entry_id, course_id, action_name,
+        )
+        num_failed = json.loads(entry.task_output)['failed']
+        timestamp = datetime.now(UTC)
+        _merge_shards(entry_id, course_id, report_class.REPORT_NAME, success_headers, timestamp, upload=True)
+        _merge_shards(
+            entry_id, course_id, report_class.ERROR_REPORT_NAME, error_headers, timestamp, upload=num_failed > 0,
+        )
+    except Exception as exc:
+        TASK_LOG.exception(u'Merging the report shards of instructor task %d failed', entry_id)
+        _delete_shards(entry_id, course_id, csv_names)
+        _complete_task(entry_id, FAILURE, u'Merging the report shards failed: {}'.format(exc))
+        raise
+
+    _complete_task(entry_id, SUCCESS)
+    TASK_LOG.info(u'Merged report shards of instructor task %d', entry_id)
+
+
+@transaction.atomic
+def _complete_task(entry_id, task_state, message=None):
+    """
+    Sets the state of the instructor task, whose subtasks have all
+    completed, adding the given message to its progress if given.
+    """
+    entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+    entry.task_state = task_state
+    if message is not None:
+        task_progress = json.loads(entry.task_output)
+        task_progress['message'] = message
+        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+    entry.save()
+
+
+def _merge_shards(entry_id, course_id, csv_name, headers, timestamp, upload):
+    """
+    Concatenates the partial CSVs with the given name, in order of their
+    user id ranges, uploads the result as a report if upload is True,
+    and deletes the partial CSVs.
+    """
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    shard_paths = _shard_paths(report_store, entry_id, course_id, csv_name)
+
+    if upload:
+        with ReportCSVWriter(csv_name, course_id, timestamp) as writer:
+            writer.writerows([headers])
+            for shard_path in shard_paths:
+                with report_store.storage.open(shard_path) as shard_file:
+                    writer.append_csv_file(shard_file)
+            writer.upload()
+
+    for shard_path in shard_paths:
+        report_store.storage.delete(shard_path)
+
+
+def _delete_shards(entry_id, course_id, csv_names):
+    """
+    Deletes the partial CSVs with the given names.
+    """
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    for csv_name in csv_names:
+        for shard_path in _shard_paths(report_store, entry_id, course_id, csv_name):
+            report_store.storage.delete(shard_path)
+
+
+def _shard_paths(report_store, entry_id, course_id, csv_name):
+    """
+    Returns the paths of the stored partial CSVs with the given name, in
+    order of their user id ranges.
+    """
+    shards_directory = report_store.path_to(course_id, _shard_filename(entry_id, csv_name))
+    try:
+        _, filenames = report_store.storage.listdir(shards_directory)
+    except OSError:
+        # No shard was stored, in a storage with actual directories.
+        return []
+    return [
+        os.path.join(shards_directory, filename)
+        for filename in sorted(filenames, key=lambda filename: int(os.path.splitext(filename)[0]))
+    ]
+
+
+def _shard_filename(entry_id, csv_name, user_id_range=None):
+    """
+    Returns the filename of the partial CSV with the given name, for the
+    shard of the given user id range, or of the directory of all such
+    partial CSVs if user_id_range is None.
+    """
+    directory = os.path.join(SHARDS_DIRECTORY, unicode(entry_id), csv_name)
+    if user_id_range is None:
+        return directory
+    return os.path.join(directory, u'{}.csv'.format(user_id_range[0]))
@@ -1,3 +1,8 @@
+import csv
+import shutil
+from tempfile import TemporaryFile
+
+from django.core.files import File
 from eventtracking import tracker
 from lms.djangoapps.instructor_task.models import ReportStore
 from util.file import course_filename_prefix_generator
@@ -30,16 +35,89 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     report_store = ReportStore.from_config(config_name)
     report_store.store_rows(
         course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
+        _report_filename(csv_name, course_id, timestamp),
         rows
     )
     tracker_emit(csv_name)
 
 
+class ReportCSVWriter(object):
+    """
+    Writes the rows of a CSV report incrementally to a temporary file, so
+    that the rows need not all be held in memory, and uploads the file to
+    the ReportStore once all rows are written.
+
+    Usage:
+        with ReportCSVWriter(csv_name, course_id, timestamp) as writer:
+            writer.writerows(rows)
+            ...
+            writer.upload()
+    """
+    def __init__(self, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+        self.csv_name = csv_name
+        self.course_id = course_id
+        self.timestamp = timestamp
+        self.config_name = config_name
+        self._file = TemporaryFile()
+        self._csv_writer = csv.writer(self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def writerows(self, rows):
+        """
+        Appends the given rows (each row is an iterable of unicode strings
+        or other values) to the report, encoded as utf-8.
+        """
+        self._csv_writer.writerows(
+            [unicode(item).encode('utf-8') for item in row]
+            for row in rows
+        )
+
+    def append_csv_file(self, csv_file):
+        """
+        Appends the rows of the given utf-8 encoded CSV file to the report.
+        """
+        shutil.copyfileobj(csv_file, self._file)
+
+    def upload(self):
+        """
+        Uploads the report, with all rows written so far, to the ReportStore.
+        """
+        self.store_as(_report_filename(self.csv_name, self.course_id, self.timestamp))
+        tracker_emit(self.csv_name)
+
+    def store_as(self, filename):
+        """
+        Stores the rows written so far in the ReportStore, under the given
+        filename in the course's directory.
+        """
+        self._file.flush()
+        self._file.seek(0)
+        report_store = ReportStore.from_config(self.config_name)
+        report_store.store(self.course_id, filename, File(self._file))
+
+    def close(self):
+        """
+        Closes and removes the temporary file.
+        """
+        self._file.close()
+
+
+def _report_filename(csv_name, course_id, timestamp):
+    """
+    Returns the filename of the CSV report with the given name.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
 def tracker_emit(report_name):
     """
     Emits a 'report.requested' event for the given report.
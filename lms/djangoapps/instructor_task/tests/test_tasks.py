@@ -11,6 +11,7 @@ from uuid import uuid4
 
 import ddt
 from celery.states import FAILURE, SUCCESS
+from django.test.utils import override_settings
 from django.utils.translation import ugettext_noop
 from mock import MagicMock, Mock, patch
 from nose.plugins.attrib import attr
@@ -18,6 +19,7 @@ from opaque_keys.edx.locations import i4xEncoder
 
 from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
+from lms.djangoapps.instructor_task.config.waffle import PARALLEL_RESCORING, waffle
 from lms.djangoapps.instructor_task.exceptions import UpdateProblemModuleStateError
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks import (
@@ -447,6 +449,65 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    def _rescore_students(self, num_students):
+        """
+        Runs a task rescoring the submissions of the given number of students, and returns its entry.
+        """
+        mock_instance = MagicMock()
+        mock_instance.has_submitted_answer.return_value = True
+        self._create_students_with_state(num_students)
+        task_entry = self._create_input_entry()
+        with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal'
+        ) as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+        self.assertEqual(mock_instance.rescore.call_count, num_students)
+        return InstructorTask.objects.get(id=task_entry.id)
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.module_state.MODULE_STATE_UPDATE_BATCH_SIZE', 3)
+    def test_rescoring_in_batches(self):
+        """
+        Tests rescoring updates the task progress after each batch of submissions.
+        """
+        entry = self._rescore_students(10)
+        self.assert_task_output(
+            output=json.loads(entry.task_output),
+            total=10,
+            attempted=10,
+            succeeded=10,
+            skipped=0,
+            failed=0,
+            action_name='rescored'
+        )
+        # Once when starting, once after each of the 4 batches, and once when done.
+        self.assertEqual(self.current_task.update_state.call_count, 6)
+
+    @override_settings(RESCORE_STUDENT_MODULES_PER_TASK=3)
+    def test_parallel_rescoring(self):
+        """
+        Tests rescoring by subtasks aggregates their progress into the task's.
+        """
+        with waffle().override(PARALLEL_RESCORING, active=True):
+            entry = self._rescore_students(10)
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['total'], 4)
+        self.assertEqual(subtasks['succeeded'], 4)
+        self.assert_task_output(
+            output=json.loads(entry.task_output),
+            total=10,
+            attempted=10,
+            succeeded=10,
+            skipped=0,
+            failed=0,
+            action_name='rescored'
+        )
+
+    def test_parallel_rescoring_with_no_state(self):
+        with waffle().override(PARALLEL_RESCORING, active=True):
+            self._test_run_with_no_state(rescore_problem, 'rescored')
+
 
 @attr(shard=3)
 class TestResetAttemptsInstructorTask(TestInstructorTasks):
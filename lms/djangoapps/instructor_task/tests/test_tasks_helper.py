@@ -8,14 +8,17 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 import tempfile
 import urllib
 from datetime import datetime
+from uuid import uuid4
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -33,6 +36,7 @@ from course_modes.tests.factories import CourseModeFactory
 from courseware.tests.factories import InstructorFactory
 from instructor_analytics.basic import UNAVAILABLE
 from lms.djangoapps.grades.models import PersistentCourseGrade
+from lms.djangoapps.grades.subsection_grade_factory import prefetch_scores
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -53,6 +57,9 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_course_survey_report,
     upload_ora2_data
 )
+from lms.djangoapps.instructor_task.tasks_helper import shards
+from lms.djangoapps.instructor_task.tasks_helper.shards import generate_report_shard, queue_report_shards
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -83,7 +90,9 @@ from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 from xmodule.partitions.partitions import Group, UserPartition
 
-from ..models import ReportStore
+from ..config.models import GradeReportSetting
+from ..config.waffle import STREAM_GRADE_REPORTS, waffle
+from ..models import InstructorTask, ReportStore
 from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED
 
 
@@ -150,6 +159,73 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    @patch('lms.djangoapps.instructor_task.tasks_helper.grades.CourseGradeReport.USER_BATCH_SIZE', 2)
+    def test_streaming(self, mock_current_task):
+        """
+        Test that rows are written and progress is updated for each batch
+        of students when grade reports are streamed.
+        """
+        students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(3)
+        ]
+        with waffle().override(STREAM_GRADE_REPORTS, active=True):
+            result = CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+
+        progress_updates = [
+            call_kwargs['meta']
+            for _, call_kwargs in mock_current_task.return_value.update_state.call_args_list
+            if call_kwargs['meta'].get('step') == u'Compiling and uploading grades'
+        ]
+        self.assertEqual([progress['attempted'] for progress in progress_updates[1:]], [2, 3])
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertFalse(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
+        self.verify_rows_in_csv(
+            [
+                {u'Student ID': unicode(student.id), u'Username': student.username, u'Grade': u'0.0'}
+                for student in students
+            ],
+            ignore_other_columns=True,
+        )
+
+    @ddt.data(True, False)
+    @override_settings(COURSE_GRADES_BATCH_SIZE=2)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_graded_in_batches(self, streaming, _mock_current_task):
+        """
+        Test that students are graded in batches.
+        """
+        for index in range(3):
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+        with waffle().override(STREAM_GRADE_REPORTS, active=streaming):
+            with patch(
+                'lms.djangoapps.grades.course_grade_factory.prefetch_scores',
+                wraps=prefetch_scores,
+            ) as mock_prefetch_scores:
+                result = CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        self.assertEqual(mock_prefetch_scores.call_count, 2)
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
+    def test_streaming_grading_failure(self, mock_grades_iter, _mock_current_task):
+        """
+        Test that grading errors are uploaded to the report store when
+        grade reports are streamed.
+        """
+        mock_grades_iter.return_value = [
+            (self.create_student('username', 'student@example.com'), None, TypeError('Cannot grade student'))
+        ]
+        with waffle().override(STREAM_GRADE_REPORTS, active=True):
+            result = CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 0, 'failed': 1}, result)
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
+
     def test_cohort_data_in_grading(self):
         """
         Test that cohort data is included in grades csv if cohort configuration is enabled for course.
@@ -424,6 +500,109 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         )
 
 
+@ddt.ddt
+class TestShardedGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports generated in shards by subtasks match the
+    reports generated by a single task.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(u'student{}'.format(index)) for index in range(5)]
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+
+    def _generate_in_shards(self, report_class):
+        """
+        Queues the shards of a report of the given class, running each
+        subtask synchronously as it is queued, and returns the task's entry.
+        """
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+        def _create_shard_subtask(entry_id, user_id_range, initial_subtask_status):
+            """Returns a subtask that generates the shard when applied."""
+            subtask = Mock()
+            subtask.apply_async.side_effect = lambda: generate_report_shard(
+                report_class, None, entry_id, user_id_range, initial_subtask_status.to_dict(),
+            )
+            return subtask
+
+        queue_report_shards(report_class, _create_shard_subtask, None, entry.id, self.course.id, {}, 'graded')
+        return InstructorTask.objects.get(pk=entry.id)
+
+    @ddt.data(CourseGradeReport, ProblemGradeReport)
+    def test_sharded_report(self, report_class):
+        entry = self._generate_in_shards(report_class)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(len(json.loads(entry.subtasks)['status']), 3)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn(report_class.REPORT_NAME, links[0][0])
+        self.verify_rows_in_csv(
+            [{u'Student ID': unicode(student.id)} for student in sorted(self.students, key=lambda student: student.id)],
+            ignore_other_columns=True,
+        )
+
+    @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
+    def test_sharded_report_errors(self, mock_grades_iter):
+        mock_grades_iter.side_effect = lambda users, *args, **kwargs: [
+            (user, None, TypeError('Cannot grade student')) for user in users
+        ]
+        entry = self._generate_in_shards(CourseGradeReport)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 0, 'failed': 5}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
+
+    def test_task_in_progress_until_merged(self):
+        task_states = []
+        merge_shards = shards._merge_shards  # pylint: disable=protected-access
+
+        def _merge_shards_recording_task_state(entry_id, *args, **kwargs):
+            """Records the state of the instructor task when the shards are merged."""
+            task_states.append(InstructorTask.objects.get(pk=entry_id).task_state)
+            return merge_shards(entry_id, *args, **kwargs)
+
+        with patch.object(shards, '_merge_shards', side_effect=_merge_shards_recording_task_state):
+            entry = self._generate_in_shards(CourseGradeReport)
+        self.assertEqual(len(task_states), 2)
+        self.assertNotIn(SUCCESS, task_states)
+        self.assertEqual(entry.task_state, SUCCESS)
+
+    def test_failed_shard(self):
+        shard_batched_rows = CourseGradeReport.shard_batched_rows
+
+        def _fail_for_last_student(xmodule_instance_args, entry_id, course_id, action_name, users):
+            """Fails the shard of the last student, which is the last shard generated."""
+            if self.students[-1] in users:
+                raise ValueError('Cannot generate shard')
+            return shard_batched_rows(xmodule_instance_args, entry_id, course_id, action_name, users)
+
+        with patch.object(CourseGradeReport, 'shard_batched_rows', side_effect=_fail_for_last_student):
+            with self.assertRaises(ValueError):
+                self._generate_in_shards(CourseGradeReport)
+
+        entry = InstructorTask.objects.get(course_id=self.course.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset({'message': u'1 of 3 report shards failed'}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+        for csv_name in (CourseGradeReport.REPORT_NAME, CourseGradeReport.ERROR_REPORT_NAME):
+            shards_directory = report_store.path_to(
+                self.course.id, os.path.join(shards.SHARDS_DIRECTORY, unicode(entry.id), csv_name),
+            )
+            self.assertEqual(report_store.storage.listdir(shards_directory)[1], [])
+
+
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
 
@@ -704,6 +883,20 @@ class TestProblemGradeReport(TestReportMixin, InstructorTaskModuleTestCase):
         self.student_2 = self.create_student(u'üser_2')
         self.csv_header_row = [u'Student ID', u'Email', u'Username', u'Enrollment Status', u'Grade']
 
+    @override_settings(COURSE_GRADES_BATCH_SIZE=1)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_graded_in_batches(self, _get_current_task):
+        """
+        Verify that students are graded in batches.
+        """
+        with patch(
+            'lms.djangoapps.grades.course_grade_factory.prefetch_scores',
+            wraps=prefetch_scores,
+        ) as mock_prefetch_scores:
+            result = ProblemGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 2, 'succeeded': 2, 'failed': 0}, result)
+        self.assertEqual(mock_prefetch_scores.call_count, 2)
+
     @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
     def test_no_problems(self, _get_current_task):
         """
@@ -7,6 +7,7 @@ from django.core.urlresolvers import reverse
 
 from badges.service import BadgingService
 from badges.utils import badges_enabled
+from courseware.fragment_cache import get_cached_fragment, set_cached_fragment
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from openedx.core.djangoapps.user_api.course_tag import api as user_course_tag_api
 from openedx.core.lib.url_utils import quote_slashes
@@ -147,8 +148,63 @@ class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
         if badges_enabled():
             services['badging'] = BadgingService(course_id=kwargs.get('course_id'), modulestore=store)
         self.request_token = kwargs.pop('request_token', None)
+        self.fragment_cache_key = kwargs.pop('fragment_cache_key', None)
+        self.fragment_wrappers = kwargs.pop('fragment_wrappers', [])
+        self._fragment_cache_keys_to_set = {}
         super(LmsModuleSystem, self).__init__(**kwargs)
 
+    def render(self, block, view_name, context=None):
+        """
+        Renders the given view of the block, reusing its cached fragment
+        if the block's view can be cached.
+
+        `fragment_cache_key` is a function of the block and view name that
+        returns the key of the cached fragment, or None if the fragment
+        cannot be cached.  The cached fragment is wrapped by the
+        `fragment_wrappers` only, and the remaining wrappers are applied
+        to it on every render.
+        """
+        cache_key = self.fragment_cache_key(block, view_name) if self.fragment_cache_key else None
+        if cache_key is None:
+            return super(LmsModuleSystem, self).render(block, view_name, context)
+
+        frag = get_cached_fragment(cache_key)
+        if frag is not None:
+            frag = self._apply_wrappers(block, view_name, frag, context, cached=False)
+            return self.render_asides(block, view_name, frag, context)
+
+        usage_id = block.scope_ids.usage_id
+        self._fragment_cache_keys_to_set[usage_id] = cache_key
+        try:
+            return super(LmsModuleSystem, self).render(block, view_name, context)
+        finally:
+            self._fragment_cache_keys_to_set.pop(usage_id, None)
+
+    def wrap_xblock(self, block, view, frag, context):
+        """
+        Applies the wrappers to the fragment, caching the fragment once
+        wrapped by the `fragment_wrappers` if requested by `render`.
+
+        See :func:`Runtime.wrap_child`
+        """
+        cache_key = self._fragment_cache_keys_to_set.pop(block.scope_ids.usage_id, None)
+        if cache_key is None:
+            return super(LmsModuleSystem, self).wrap_xblock(block, view, frag, context)
+
+        frag = self._apply_wrappers(block, view, frag, context, cached=True)
+        set_cached_fragment(cache_key, frag)
+        return self._apply_wrappers(block, view, frag, context, cached=False)
+
+    def _apply_wrappers(self, block, view, frag, context, cached):
+        """
+        Applies, in order, either the wrappers that are included in cached
+        fragments or the remaining ones.
+        """
+        for wrapper in self.wrappers:
+            if (wrapper in self.fragment_wrappers) == cached:
+                frag = wrapper(block, view, frag, context)
+        return frag
+
     def handler_url(self, *args, **kwargs):
         """
         Implement the XBlock runtime handler_url interface.
@@ -125,6 +125,11 @@ if STATIC_ROOT_BASE:
     STATIC_ROOT = path(STATIC_ROOT_BASE)
     WEBPACK_LOADER['DEFAULT']['STATS_FILE'] = STATIC_ROOT / "webpack-stats.json"
 
+# MAKO_MODULE_DIR specifies the directory where compiled Mako templates are
+# stored.  It can be shared by all processes, and populated when deploying with
+# the compile_mako_templates management command.
+MAKO_MODULE_DIR = ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR)
+
 
 # STATIC_URL_BASE specifies the base url to use for static files
 STATIC_URL_BASE = ENV_TOKENS.get('STATIC_URL_BASE', None)
@@ -224,6 +229,18 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+CONTENTSERVER_SPILL_CACHE_DIR = ENV_TOKENS.get('CONTENTSERVER_SPILL_CACHE_DIR', CONTENTSERVER_SPILL_CACHE_DIR)
+CONTENTSERVER_SPILL_CACHE_MIN_HITS = ENV_TOKENS.get(
+    'CONTENTSERVER_SPILL_CACHE_MIN_HITS', CONTENTSERVER_SPILL_CACHE_MIN_HITS
+)
+CONTENTSERVER_SPILL_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'CONTENTSERVER_SPILL_CACHE_MAX_SIZE', CONTENTSERVER_SPILL_CACHE_MAX_SIZE
+)
+
+COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE', COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE
+)
+
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
 DEFAULT_FEEDBACK_EMAIL = ENV_TOKENS.get('DEFAULT_FEEDBACK_EMAIL', DEFAULT_FEEDBACK_EMAIL)
@@ -275,6 +292,9 @@ RECALCULATE_GRADES_ROUTING_KEY = ENV_TOKENS.get('RECALCULATE_GRADES_ROUTING_KEY'
 # Queue to use for updating grades due to grading policy change
 POLICY_CHANGE_GRADES_ROUTING_KEY = ENV_TOKENS.get('POLICY_CHANGE_GRADES_ROUTING_KEY', LOW_PRIORITY_QUEUE)
 
+# Number of learners whose course grades are computed together
+COURSE_GRADES_BATCH_SIZE = ENV_TOKENS.get('COURSE_GRADES_BATCH_SIZE', COURSE_GRADES_BATCH_SIZE)
+
 # Message expiry time in seconds
 CELERY_EVENT_QUEUE_TTL = ENV_TOKENS.get('CELERY_EVENT_QUEUE_TTL', None)
 
@@ -381,6 +401,7 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_CACHE.update(ENV_TOKENS.get("SAFE_EXEC_CACHE", {}))
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -640,6 +661,9 @@ DISABLE_ACCOUNT_ACTIVATION_REQUIREMENT_SWITCH = ENV_TOKENS.get(
     DISABLE_ACCOUNT_ACTIVATION_REQUIREMENT_SWITCH
 )
 
+# Problem rescoring
+RESCORE_STUDENT_MODULES_PER_TASK = ENV_TOKENS.get('RESCORE_STUDENT_MODULES_PER_TASK', RESCORE_STUDENT_MODULES_PER_TASK)
+
 # Grades download
 GRADES_DOWNLOAD_ROUTING_KEY = ENV_TOKENS.get('GRADES_DOWNLOAD_ROUTING_KEY', HIGH_MEM_QUEUE)
 
@@ -832,6 +832,12 @@ MODULESTORE = {
     }
 }
 
+# Maximum total size, in bytes, of the uncompressed pickles of the split
+# modulestore course structures cached in each process in front of the
+# course_structure_cache.  Each read unpickles a copy of the structure.
+# 0 disables the per-process cache.
+COURSE_STRUCTURE_PROCESS_CACHE_MAX_SIZE = 0
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -845,6 +851,14 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of pre-warmed sandboxed Python processes.
+    'pool': {
+        # How many sandboxed processes each server process keeps?  0 disables the pool.
+        'size': 0,
+        # How many executions before a sandboxed process is replaced?
+        'max_executions': 100,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -857,6 +871,15 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# Cache of the results of sandboxed code.  The results are stored in the
+# 'safe_exec' cache if it is configured in CACHES, else in the default cache.
+SAFE_EXEC_CACHE = {
+    # Results larger than this many bytes, after compression, aren't cached.
+    'max_entry_size': 512 * 1024,
+    # Results larger than this many bytes are compressed.
+    'compress_threshold': 4 * 1024,
+}
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1234,6 +1257,7 @@ MIDDLEWARE_CLASSES = [
 
     'django_comment_client.utils.ViewNameMiddleware',
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'capa.safe_exec.django_integration.ConfigureSandboxPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -1263,6 +1287,22 @@ X_FRAME_OPTIONS = 'ALLOW'
 # Platform for Privacy Preferences header
 P3P_HEADER = 'CP="Open EdX does not have a P3P policy."'
 
+############################### Contentserver ##################################
+
+# Directory on local disk in which frequently requested course assets that are
+# too large to be cached in memory are stored, and served from, instead of being
+# read from the contentstore for every request.  Files are named by the digest of
+# their asset.  Disabled if None.
+CONTENTSERVER_SPILL_CACHE_DIR = None
+
+# Maximum total size, in bytes, of the files in the spill cache.  The least
+# recently served files are removed to stay within it.
+CONTENTSERVER_SPILL_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+# Number of requests for an asset, within an hour, after which it is stored in
+# the spill cache.
+CONTENTSERVER_SPILL_CACHE_MIN_HITS = 3
+
 ############################### PIPELINE #######################################
 
 PIPELINE_ENABLED = True
@@ -1941,6 +1981,11 @@ RECALCULATE_GRADES_ROUTING_KEY = LOW_PRIORITY_QUEUE
 # Queue to use for updating grades due to grading policy change
 POLICY_CHANGE_GRADES_ROUTING_KEY = LOW_PRIORITY_QUEUE
 
+# Number of learners whose course grades are computed together, with their
+# scores fetched in bulk, when grading many learners, as for grade reports
+# and regrades.  Learners are graded one at a time if 0.
+COURSE_GRADES_BATCH_SIZE = 100
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -2562,6 +2607,11 @@ BADGR_ISSUER_SLUG = "example-issuer"
 # Number of seconds to wait on the badging server when contacting it before giving up.
 BADGR_TIMEOUT = 10
 
+###################### Problem Rescoring ######################
+# Number of student submissions rescored by each subtask, when rescoring is
+# parallelized with the instructor_task.parallel_rescoring waffle switch.
+RESCORE_STUDENT_MODULES_PER_TASK = 1000
+
 ###################### Grade Downloads ######################
 # These keys are used for all of our asynchronous downloadable files, including
 # the ones that contain information other than grades.
@@ -7,7 +7,9 @@ Module with family of classes for block structures.
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
+    _CompactFields - Compact storage of a single block's field values.
 """
+from collections import MutableMapping
 from copy import deepcopy
 from functools import partial
 from logging import getLogger
@@ -277,26 +279,152 @@ class BlockStructure(object):
             block_relations[usage_key] = _BlockRelations()
 
 
+class _FieldShape(object):
+    """
+    An immutable, ordered set of field names, shared by all
+    _CompactFields objects that have values for exactly those fields.
+    Each value is stored at the index of its field's name within
+    the shape.
+    """
+    __slots__ = ('names', 'indices', '_transitions')
+
+    # Map of all shapes by their field names, so that equal shapes are
+    # only ever created once per process.
+    # dict {tuple (string): _FieldShape}
+    _shapes = {}
+
+    def __init__(self, names):
+        # tuple (string)
+        self.names = names
+
+        # dict {string: int}
+        self.indices = {name: index for index, name in enumerate(names)}
+
+        # Map of an added field's name to the resulting shape.
+        # dict {string: _FieldShape}
+        self._transitions = {}
+
+    @classmethod
+    def get(cls, names):
+        """
+        Returns the shared shape for the given tuple of field names.
+        """
+        try:
+            return cls._shapes[names]
+        except KeyError:
+            return cls._shapes.setdefault(names, cls(tuple(_intern(name) for name in names)))
+
+    def with_field(self, field_name):
+        """
+        Returns the shape with the given field name appended.
+        """
+        try:
+            return self._transitions[field_name]
+        except KeyError:
+            shape = self.get(self.names + (field_name,))
+            self._transitions[field_name] = shape
+            return shape
+
+    def without_field(self, field_name):
+        """
+        Returns the shape with the given field name removed.
+        """
+        index = self.indices[field_name]
+        return self.get(self.names[:index] + self.names[index + 1:])
+
+
+def _intern(field_name):
+    """
+    Interns the given field name, if it is a byte string, so that
+    field names are shared across all shapes.
+    """
+    return intern(field_name) if type(field_name) is str else field_name
+
+
+class _CompactFields(MutableMapping):
+    """
+    A mapping of field name to the field's value, storing only a list of
+    values and a reference to a _FieldShape shared with all other
+    mappings with the same field names.  This uses considerably less
+    memory than a dict per block.
+    """
+    __slots__ = ('_shape', '_values')
+
+    def __init__(self, fields=None):
+        self._shape = _FieldShape.get(())
+        self._values = []
+        if fields:
+            self.update(fields)
+
+    def __getitem__(self, field_name):
+        return self._values[self._shape.indices[field_name]]
+
+    def __setitem__(self, field_name, field_value):
+        index = self._shape.indices.get(field_name)
+        if index is None:
+            self._shape = self._shape.with_field(field_name)
+            self._values.append(field_value)
+        else:
+            self._values[index] = field_value
+
+    def __delitem__(self, field_name):
+        index = self._shape.indices[field_name]
+        self._shape = self._shape.without_field(field_name)
+        del self._values[index]
+
+    def __contains__(self, field_name):
+        return field_name in self._shape.indices
+
+    def __iter__(self):
+        return iter(self._shape.names)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, field_name, default=None):
+        index = self._shape.indices.get(field_name)
+        return default if index is None else self._values[index]
+
+    def __repr__(self):
+        return repr(dict(self.iteritems()))
+
+    def __getstate__(self):
+        return self._shape.names, self._values
+
+    def __setstate__(self, state):
+        names, values = state
+        self._shape = _FieldShape.get(names)
+        self._values = values
+
+
 class FieldData(object):
     """
     Data structure to encapsulate collected fields.
     """
+    __slots__ = ('fields',)
+
+    # Names of the fields that are defined directly on the class. All
+    # other fields are stored in the self.fields mapping.
+    _CLASS_FIELD_NAMES = frozenset(['fields'])
+
     def class_field_names(self):
         """
         Returns list of names of fields that are defined directly
-        on the class. Can be overridden by subclasses. All other
-        fields are assumed to be stored in the self.fields dict.
+        on the class. All other fields are assumed to be stored in
+        the self.fields mapping.
         """
-        return ['fields']
+        return list(self._CLASS_FIELD_NAMES)
 
     def __init__(self):
         # Map of field name to the field's value for this block.
-        # dict {string: any picklable type}
-        self.fields = {}
+        # mapping {string: any picklable type}
+        self.fields = _CompactFields()
 
     def __getattr__(self, field_name):
+        # Only called when field_name is not found on the class
+        # or in its slots.
         if self._is_own_field(field_name):
-            return super(FieldData, self).__getattr__(field_name)
+            raise AttributeError(field_name)
         try:
             return self.fields[field_name]
         except KeyError:
@@ -312,21 +440,35 @@ class FieldData(object):
         if self._is_own_field(field_name):
             return super(FieldData, self).__delattr__(field_name)
         else:
-            delattr(self.fields, field_name)
+            try:
+                del self.fields[field_name]
+            except KeyError:
+                raise AttributeError("Field {0} does not exist".format(field_name))
+
+    def __getstate__(self):
+        return {field_name: getattr(self, field_name) for field_name in self._CLASS_FIELD_NAMES}
+
+    def __setstate__(self, state):
+        # Instances pickled before the introduction of slots have their
+        # fields in a dict, so they are converted to compact storage.
+        for field_name, field_value in state.iteritems():
+            if field_name == 'fields' and type(field_value) is dict:
+                field_value = _CompactFields(field_value)
+            object.__setattr__(self, field_name, field_value)
 
     def _is_own_field(self, field_name):
         """
         Returns whether the given field_name is the name of an
         actual field of this class.
         """
-        return field_name in self.class_field_names()
+        return field_name in self._CLASS_FIELD_NAMES
 
 
 class TransformerData(FieldData):
     """
     Data structure to encapsulate collected data for a transformer.
     """
-    pass
+    __slots__ = ()
 
 
 class TransformerDataMap(dict):
@@ -379,8 +521,9 @@ class BlockData(FieldData):
     """
     Data structure to encapsulate collected data for a single block.
     """
-    def class_field_names(self):
-        return super(BlockData, self).class_field_names() + ['location', 'transformer_data']
+    __slots__ = ('location', 'transformer_data')
+
+    _CLASS_FIELD_NAMES = FieldData._CLASS_FIELD_NAMES | frozenset(['location', 'transformer_data'])
 
     def __init__(self, usage_key):
         super(BlockData, self).__init__()
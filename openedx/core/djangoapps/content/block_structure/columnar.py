@@ -0,0 +1,235 @@
+"""
+Columnar serialization format for collected BlockStructures.
+
+Instead of pickling the whole graph of BlockData/TransformerData objects,
+the columnar format stores:
+
+    * a block-key table, so that every block is referred to by its index,
+    * an adjacency list (parents and children) of block indices,
+    * one independently pickled column per xBlock field and per
+      (transformer, field) pair, each holding parallel lists of the
+      indices of the blocks that have a value and the values themselves.
+
+On deserialization, only the block-key table and the adjacency list are
+decoded eagerly.  Each field column is decoded the first time any block
+accesses that field, so requests that read only a handful of fields
+never pay for unpickling the rest.
+"""
+import cPickle as pickle
+from collections import MutableMapping
+from itertools import izip
+import zlib
+
+from .block_structure import BlockData, TransformerData, _BlockRelations
+from .exceptions import BlockStructureNotFound
+from .factory import BlockStructureFactory
+
+
+# Marker prepended to serialized data in the columnar format.  zlib streams
+# never start with this value, so zpickled data can be told apart from it.
+COLUMNAR_FORMAT_PREFIX = b'BSCOL:'
+
+# The version of the columnar layout.  Incrementally update this value
+# whenever the layout of the serialized payload changes.
+COLUMNAR_FORMAT_VERSION = 1
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given serialized data is in the columnar format.
+    """
+    return serialized_data.startswith(COLUMNAR_FORMAT_PREFIX)
+
+
+def serialize(block_structure):
+    """
+    Serializes the given block structure into the columnar format.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    # Block-key table: related blocks first, followed by any blocks that
+    # only have data but no relations.
+    block_keys = list(block_relations)
+    block_keys.extend(key for key in block_data_map if key not in block_relations)
+    block_indices = {block_key: index for index, block_key in enumerate(block_keys)}
+
+    parents = []
+    children = []
+    for block_key in block_keys[:len(block_relations)]:
+        relations = block_relations[block_key]
+        parents.append([block_indices[parent] for parent in relations.parents])
+        children.append([block_indices[child] for child in relations.children])
+
+    block_data_indices = []
+    field_columns = {}
+    transformer_blocks = {}
+    transformer_columns = {}
+    for index, block_key in enumerate(block_keys):
+        block_data = block_data_map.get(block_key)
+        if block_data is None:
+            continue
+        block_data_indices.append(index)
+        _add_to_columns(field_columns, index, block_data.fields)
+
+        for transformer_name, transformer_block_data in block_data.transformer_data.iteritems():
+            transformer_blocks.setdefault(transformer_name, []).append(index)
+            _add_to_columns(
+                transformer_columns.setdefault(transformer_name, {}),
+                index,
+                transformer_block_data.fields,
+            )
+
+    payload = dict(
+        version=COLUMNAR_FORMAT_VERSION,
+        block_keys=block_keys,
+        parents=parents,
+        children=children,
+        block_data_indices=block_data_indices,
+        fields=_encode_columns(field_columns),
+        transformer_blocks=transformer_blocks,
+        transformer_fields={
+            transformer_name: _encode_columns(columns)
+            for transformer_name, columns in transformer_columns.iteritems()
+        },
+        transformer_data=block_structure.transformer_data,
+    )
+    return COLUMNAR_FORMAT_PREFIX + zlib.compress(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+
+def deserialize(serialized_data, root_block_usage_key):
+    """
+    Deserializes the given columnar data and returns the parsed
+    block_structure.  Field values are decoded lazily, upon first access.
+
+    Raises:
+        BlockStructureNotFound if the data was serialized with an
+        incompatible version of the columnar format.
+    """
+    payload = pickle.loads(zlib.decompress(serialized_data[len(COLUMNAR_FORMAT_PREFIX):]))
+    if payload['version'] != COLUMNAR_FORMAT_VERSION:
+        raise BlockStructureNotFound(root_block_usage_key)
+
+    block_keys = payload['block_keys']
+
+    block_relations = {}
+    for index, (parent_indices, child_indices) in enumerate(izip(payload['parents'], payload['children'])):
+        relations = _BlockRelations()
+        relations.parents = [block_keys[parent] for parent in parent_indices]
+        relations.children = [block_keys[child] for child in child_indices]
+        block_relations[block_keys[index]] = relations
+
+    field_columns = _LazyColumns(payload['fields'])
+    block_data_map = {}
+    for index in payload['block_data_indices']:
+        block_data = BlockData(block_keys[index])
+        block_data.fields = _ColumnarFields(field_columns, index)
+        block_data_map[block_keys[index]] = block_data
+
+    for transformer_name, indices in payload['transformer_blocks'].iteritems():
+        transformer_columns = _LazyColumns(payload['transformer_fields'].get(transformer_name, {}))
+        for index in indices:
+            transformer_block_data = TransformerData()
+            transformer_block_data.fields = _ColumnarFields(transformer_columns, index)
+            block_data_map[block_keys[index]].transformer_data[transformer_name] = transformer_block_data
+
+    return BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        payload['transformer_data'],
+        block_data_map,
+    )
+
+
+def _add_to_columns(columns, index, fields):
+    """
+    Appends the given block index and its field values to the
+    corresponding columns.
+    """
+    for field_name, field_value in fields.iteritems():
+        indices, values = columns.setdefault(field_name, ([], []))
+        indices.append(index)
+        values.append(field_value)
+
+
+def _encode_columns(columns):
+    """
+    Returns a map of field name to its independently pickled column.
+    """
+    return {
+        field_name: pickle.dumps(column, pickle.HIGHEST_PROTOCOL)
+        for field_name, column in columns.iteritems()
+    }
+
+
+class _LazyColumns(object):
+    """
+    A set of pickled field columns that are each decoded upon first access.
+    """
+    def __init__(self, encoded_columns):
+        # dict {string: pickled (list [int], list [any picklable type])}
+        self._encoded_columns = encoded_columns
+
+        # dict {string: dict {int: any picklable type}}
+        self._decoded_columns = {}
+
+    def field_names(self):
+        """
+        Returns the names of all fields that have a column.
+        """
+        return self._encoded_columns.keys()
+
+    def get_column(self, field_name):
+        """
+        Returns a map of block index to value for the given field,
+        decoding it if not yet decoded.
+        """
+        try:
+            return self._decoded_columns[field_name]
+        except KeyError:
+            encoded_column = self._encoded_columns.get(field_name)
+            column = dict(izip(*pickle.loads(encoded_column))) if encoded_column else {}
+            self._decoded_columns[field_name] = column
+            return column
+
+
+class _ColumnarFields(MutableMapping):
+    """
+    A mutable view of a single block's values in a set of lazily decoded
+    columns.  Updates are kept local to the block and never written back
+    to the shared columns.
+    """
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+        self._overrides = {}
+        self._deleted = set()
+
+    def __getitem__(self, field_name):
+        if field_name in self._overrides:
+            return self._overrides[field_name]
+        if field_name in self._deleted:
+            raise KeyError(field_name)
+        return self._columns.get_column(field_name)[self._index]
+
+    def __setitem__(self, field_name, field_value):
+        self._overrides[field_name] = field_value
+        self._deleted.discard(field_name)
+
+    def __delitem__(self, field_name):
+        if field_name not in self:
+            raise KeyError(field_name)
+        self._overrides.pop(field_name, None)
+        self._deleted.add(field_name)
+
+    def __iter__(self):
+        field_names = set(self._overrides)
+        field_names.update(
+            field_name for field_name in self._columns.field_names()
+            if self._index in self._columns.get_column(field_name)
+        )
+        return iter(field_names - self._deleted)
+
+    def __len__(self):
+        return sum(1 for _ in self)
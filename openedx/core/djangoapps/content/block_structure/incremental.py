@@ -0,0 +1,123 @@
+"""
+Module for incrementally recollecting BlockStructures.
+
+When a course is published, typically only a few of its blocks change.
+Rather than re-running every transformer's collect method over the whole
+structure, the blocks whose modulestore version changed are determined by
+comparing each block's split modulestore update_version with the one stored
+in the previously collected structure.  Only those blocks, their
+descendants and their ancestors are recollected, and the newly collected
+data is merged with the previously collected data for all other blocks.
+
+This relies on the data collected for a block depending only on the block
+itself and its ancestors, which holds for the collect methods of the
+registered transformers since they merge values top-down.
+"""
+# pylint: disable=protected-access
+from .block_structure import BlockStructureModulestoreData
+from .factory import BlockStructureFactory
+from .transformer_registry import TransformerRegistry
+
+
+# Name of the xBlock attribute with the guid of the split modulestore
+# structure in which the block's current content was last updated.
+BLOCK_VERSION_FIELD = 'update_version'
+
+
+def get_blocks_to_recollect(block_structure, collected_block_structure):
+    """
+    Returns the set of usage keys of the blocks in the given block
+    structure whose data needs to be recollected, or None if the
+    structure cannot be recollected incrementally.
+
+    Arguments:
+        block_structure (BlockStructureModulestoreData) - The block
+            structure newly created from the modulestore.
+
+        collected_block_structure (BlockStructureBlockData) - The
+            previously collected block structure.
+    """
+    for transformer in TransformerRegistry.get_registered_transformers():
+        if collected_block_structure._get_transformer_data_version(transformer) != transformer.WRITE_VERSION:
+            return None
+
+    changed_block_keys = set()
+    for block_key in block_structure:
+        block_version = getattr(block_structure.get_xblock(block_key), BLOCK_VERSION_FIELD, None)
+        if block_version is None:
+            # Versions are only available from the split modulestore.
+            return None
+
+        if (
+                block_key not in collected_block_structure or
+                collected_block_structure.get_xblock_field(block_key, BLOCK_VERSION_FIELD) != block_version or
+                set(collected_block_structure.get_parents(block_key)) != set(block_structure.get_parents(block_key))
+        ):
+            changed_block_keys.add(block_key)
+
+    blocks_to_recollect = set()
+    for block_key in changed_block_keys:
+        if block_key not in blocks_to_recollect:
+            blocks_to_recollect.update(
+                block_structure.post_order_traversal(
+                    filter_func=lambda key: key not in blocks_to_recollect,
+                    start_node=block_key,
+                )
+            )
+
+    # Include all ancestors, so values merged from parents are available
+    # for each recollected block.  The root is always recollected so that
+    # course-level data, such as the course_version, remains current.
+    blocks_to_recollect.add(block_structure.root_block_usage_key)
+    unvisited_block_keys = list(blocks_to_recollect)
+    while unvisited_block_keys:
+        for parent_key in block_structure.get_parents(unvisited_block_keys.pop()):
+            if parent_key not in blocks_to_recollect:
+                blocks_to_recollect.add(parent_key)
+                unvisited_block_keys.append(parent_key)
+
+    return blocks_to_recollect
+
+
+def create_recollection_structure(block_structure, blocks_to_recollect):
+    """
+    Returns a new BlockStructureModulestoreData containing only the
+    given blocks of the given block structure, along with their xBlocks
+    and relations with each other.
+
+    Note: Since blocks_to_recollect is closed under ancestors, the
+    returned structure shares the root of the given block structure.
+    """
+    recollection_structure = BlockStructureModulestoreData(block_structure.root_block_usage_key)
+    for block_key in block_structure.topological_traversal():
+        if block_key not in blocks_to_recollect:
+            continue
+        recollection_structure._add_xblock(block_key, block_structure.get_xblock(block_key))
+        for child_key in block_structure.get_children(block_key):
+            if child_key in blocks_to_recollect:
+                recollection_structure._add_relation(block_key, child_key)
+    return recollection_structure
+
+
+def merge_recollected(block_structure, recollection_structure, collected_block_structure):
+    """
+    Returns a new BlockStructureBlockData with the relations of the given
+    block structure, the data of the recollected blocks from the given
+    recollection structure and the previously collected data for all
+    other blocks.
+    """
+    block_data_map = {}
+    for block_key in block_structure:
+        if block_key in recollection_structure:
+            block_data = recollection_structure._block_data_map.get(block_key)
+        else:
+            block_data = collected_block_structure._block_data_map.get(block_key)
+        if block_data is not None:
+            block_data_map[block_key] = block_data
+
+    return BlockStructureFactory.create_new(
+        block_structure.root_block_usage_key,
+        block_structure._block_relations,
+        recollection_structure.transformer_data,
+        block_data_map,
+    )
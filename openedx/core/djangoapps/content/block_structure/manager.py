@@ -4,7 +4,7 @@ BlockStructures.
 """
 from contextlib import contextmanager
 
-from . import config
+from . import config, incremental
 from .exceptions import UsageKeyNotInBlockStructure, TransformerDataIncompatible, BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
@@ -118,16 +118,46 @@ class BlockStructureManager(object):
         """
         The store is updated with newly collected transformers data from
         the modulestore.
+
+        If incremental recollection is enabled, only the blocks that
+        changed since the previously stored collection (along with their
+        descendants and ancestors) are recollected.
         """
         with self._bulk_operations():
             block_structure = BlockStructureFactory.create_from_modulestore(
                 self.root_block_usage_key,
                 self.modulestore,
             )
-            BlockStructureTransformers.collect(block_structure)
+            if config.waffle().is_enabled(config.INCREMENTAL_RECOLLECT):
+                block_structure.request_xblock_fields(incremental.BLOCK_VERSION_FIELD)
+                block_structure = self._collect_incrementally(block_structure)
+            else:
+                BlockStructureTransformers.collect(block_structure)
             self.store.add(block_structure)
             return block_structure
 
+    def _collect_incrementally(self, block_structure):
+        """
+        Returns the collected block structure for the given block
+        structure newly created from the modulestore, recollecting only
+        the changed blocks if a compatible collected version is found in
+        the store.  Otherwise, the entire structure is collected.
+        """
+        try:
+            collected_block_structure = self.store.get(self.root_block_usage_key)
+            blocks_to_recollect = incremental.get_blocks_to_recollect(block_structure, collected_block_structure)
+        except BlockStructureNotFound:
+            blocks_to_recollect = None
+
+        if blocks_to_recollect is None:
+            BlockStructureTransformers.collect(block_structure)
+            return block_structure
+
+        recollection_structure = incremental.create_recollection_structure(block_structure, blocks_to_recollect)
+        recollection_structure.request_xblock_fields(incremental.BLOCK_VERSION_FIELD)
+        BlockStructureTransformers.collect(recollection_structure)
+        return incremental.merge_recollected(block_structure, recollection_structure, collected_block_structure)
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
@@ -6,7 +6,7 @@ from logging import getLogger
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from . import columnar, config
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -191,8 +191,12 @@ class BlockStructureStore(object):
 
     def _serialize(self, block_structure):
         """
-        Serializes the data for the given block_structure.
+        Serializes the data for the given block_structure, using the
+        columnar format if enabled and zpickle otherwise.
         """
+        if config.waffle().is_enabled(config.COLUMNAR_SERIALIZATION):
+            return columnar.serialize(block_structure)
+
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
@@ -203,7 +207,13 @@ class BlockStructureStore(object):
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        The format is detected from the data itself, so data written
+        before the serialization setting was changed remains readable.
         """
+        if columnar.is_columnar(serialized_data):
+            return columnar.deserialize(serialized_data, root_block_usage_key)
+
         block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         return BlockStructureFactory.create_new(
             root_block_usage_key,
@@ -4,6 +4,7 @@ Tests for block_structure.py
 # pylint: disable=protected-access
 from collections import namedtuple
 from copy import deepcopy
+import cPickle as pickle
 import ddt
 import itertools
 from nose.plugins.attrib import attr
@@ -11,7 +12,7 @@ from unittest import TestCase
 
 from openedx.core.lib.graph_traversals import traverse_post_order
 
-from ..block_structure import BlockStructure, BlockStructureModulestoreData
+from ..block_structure import BlockData, BlockStructure, BlockStructureModulestoreData
 from ..exceptions import TransformerException
 from .helpers import MockXBlock, MockTransformer, ChildrenMapTestMixin
 
@@ -268,3 +269,64 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         self.assertEquals(_get_value(block_structure), 'edit1')
         self.assertEquals(_get_value(new_copy), 'edit2')
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestBlockData(TestCase):
+    """
+    Tests for BlockData and its compact field storage.
+    """
+    def create_block_data(self, usage_key='block'):
+        """
+        Returns BlockData with xBlock fields and transformer data set.
+        """
+        block_data = BlockData(usage_key)
+        block_data.display_name = 'Block'
+        block_data.graded = True
+        block_data.transformer_data.get_or_create('transformer').depth = 1
+        return block_data
+
+    def test_fields(self):
+        block_data = self.create_block_data()
+        self.assertEquals(block_data.location, 'block')
+        self.assertEquals(block_data.display_name, 'Block')
+        self.assertEquals(dict(block_data.fields), {'display_name': 'Block', 'graded': True})
+
+        block_data.graded = False
+        self.assertFalse(block_data.graded)
+        del block_data.display_name
+        self.assertEquals(dict(block_data.fields), {'graded': False})
+        with self.assertRaises(AttributeError):
+            block_data.display_name  # pylint: disable=pointless-statement
+        with self.assertRaises(AttributeError):
+            del block_data.display_name
+
+    def test_shared_field_names(self):
+        block_data_1 = self.create_block_data('block_1')
+        block_data_2 = self.create_block_data('block_2')
+        self.assertIs(block_data_1.fields._shape, block_data_2.fields._shape)
+        block_data_2.display_name = 'Changed'
+        self.assertEquals(block_data_1.display_name, 'Block')
+
+    @ddt.data(0, pickle.HIGHEST_PROTOCOL)
+    def test_pickle(self, protocol):
+        block_data = pickle.loads(pickle.dumps(self.create_block_data(), protocol))
+        self.assertEquals(block_data.location, 'block')
+        self.assertEquals(dict(block_data.fields), {'display_name': 'Block', 'graded': True})
+        self.assertEquals(block_data.transformer_data['transformer'].depth, 1)
+
+    def test_unpickle_dict_fields(self):
+        block_data = BlockData.__new__(BlockData)
+        block_data.__setstate__({'location': 'block', 'fields': {'graded': True}, 'transformer_data': {}})
+        self.assertTrue(block_data.graded)
+        block_data.display_name = 'Block'
+        self.assertEquals(dict(block_data.fields), {'display_name': 'Block', 'graded': True})
+
+    def test_deepcopy(self):
+        block_data = self.create_block_data()
+        block_data_copy = deepcopy(block_data)
+        block_data_copy.display_name = 'Changed'
+        block_data_copy.transformer_data['transformer'].depth = 2
+        self.assertEquals(block_data.display_name, 'Block')
+        self.assertEquals(block_data.transformer_data['transformer'].depth, 1)
@@ -0,0 +1,90 @@
+"""
+Tests for block_structure/columnar.py
+"""
+# pylint: disable=protected-access
+import ddt
+from mock import patch
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from ..columnar import deserialize, is_columnar, serialize, COLUMNAR_FORMAT_PREFIX
+from ..exceptions import BlockStructureNotFound
+from .helpers import ChildrenMapTestMixin, MockTransformer
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestColumnarSerialization(TestCase, ChildrenMapTestMixin):
+    """
+    Tests for the columnar serialization format.
+    """
+    def create_collected_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        xBlock fields and transformer data set on every block.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        for block_key in block_structure:
+            block_data = block_structure._get_or_create_block(block_key)
+            block_data.display_name = 'Block {}'.format(block_key)
+            if block_key % 2:
+                block_data.graded = True
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'depth', block_key)
+        return block_structure
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_structure(children_map)
+        serialized_data = serialize(block_structure)
+        self.assertTrue(is_columnar(serialized_data))
+
+        deserialized = deserialize(serialized_data, block_structure.root_block_usage_key)
+        self.assert_block_structure(deserialized, children_map)
+        for block_key in block_structure:
+            self.assertEquals(deserialized.get_xblock_field(block_key, 'display_name'), 'Block {}'.format(block_key))
+            self.assertEquals(deserialized.get_xblock_field(block_key, 'graded'), True if block_key % 2 else None)
+            self.assertEquals(
+                deserialized.get_transformer_block_field(block_key, MockTransformer, 'depth'),
+                block_key,
+            )
+            self.assertEquals(
+                dict(deserialized[block_key].fields),
+                dict(block_structure[block_key].fields),
+            )
+        self.assertEquals(deserialized._get_transformer_data_version(MockTransformer), MockTransformer.WRITE_VERSION)
+
+    def test_update_does_not_leak_across_blocks(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = deserialize(serialize(block_structure), block_structure.root_block_usage_key)
+
+        deserialized[1].display_name = 'Changed'
+        deserialized.set_transformer_block_field(2, MockTransformer, 'depth', 20)
+        self.assertEquals(deserialized.get_xblock_field(1, 'display_name'), 'Changed')
+        self.assertEquals(deserialized.get_xblock_field(3, 'display_name'), 'Block 3')
+        self.assertEquals(deserialized.get_transformer_block_field(2, MockTransformer, 'depth'), 20)
+        self.assertEquals(deserialized.get_transformer_block_field(3, MockTransformer, 'depth'), 3)
+
+    def test_copy_and_reserialize(self):
+        block_structure = self.create_collected_structure(self.DAG_CHILDREN_MAP)
+        deserialized = deserialize(serialize(block_structure), block_structure.root_block_usage_key)
+        deserialized[0].display_name = 'Root'
+
+        reserialized = deserialize(serialize(deserialized.copy()), block_structure.root_block_usage_key)
+        self.assert_block_structure(reserialized, self.DAG_CHILDREN_MAP)
+        self.assertEquals(reserialized.get_xblock_field(0, 'display_name'), 'Root')
+        self.assertEquals(reserialized.get_xblock_field(5, 'display_name'), 'Block 5')
+
+    def test_incompatible_version(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = serialize(block_structure)
+        with patch('openedx.core.djangoapps.content.block_structure.columnar.COLUMNAR_FORMAT_VERSION', 2):
+            with self.assertRaises(BlockStructureNotFound):
+                deserialize(serialized_data, block_structure.root_block_usage_key)
+
+    def test_prefix_distinct_from_zlib(self):
+        self.assertFalse(is_columnar(b'x\x9c' + COLUMNAR_FORMAT_PREFIX))
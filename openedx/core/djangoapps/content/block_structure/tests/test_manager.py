@@ -6,7 +6,7 @@ from django.test import TestCase
 from nose.plugins.attrib import attr
 
 from ..block_structure import BlockStructureBlockData
-from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import INCREMENTAL_RECOLLECT, RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
 from ..exceptions import UsageKeyNotInBlockStructure, BlockStructureNotFound
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
@@ -25,6 +25,7 @@ class TestTransformer1(MockTransformer):
     collect_data_key = 't1.collect'
     transform_data_key = 't1.transform'
     collect_call_count = 0
+    collected_block_keys = set()
 
     @classmethod
     def collect(cls, block_structure):
@@ -33,6 +34,7 @@ class TestTransformer1(MockTransformer):
         """
         cls._set_block_values(block_structure, cls.collect_data_key)
         cls.collect_call_count += 1
+        cls.collected_block_keys = set(block_structure.get_block_keys())
 
     def transform(self, usage_info, block_structure):
         """
@@ -219,3 +221,48 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+    def set_block_versions(self, version, block_ids=None):
+        """
+        Sets the given modulestore version on the mock xBlocks with the
+        given block_ids, or on all mock xBlocks if block_ids is None.
+        """
+        for block_key, xblock in self.modulestore.blocks.iteritems():
+            if block_ids is None or block_key in [self.block_key_factory(block_id) for block_id in block_ids]:
+                xblock.field_map['update_version'] = version
+
+    @ddt.data(True, False)
+    def test_incremental_recollect(self, with_storage_backing):
+        self.set_block_versions('v1')
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(INCREMENTAL_RECOLLECT, active=True):
+                with mock_registered_transformers(self.registered_transformers):
+                    self.bs_manager._update_collected()  # pylint: disable=protected-access
+                    self.assertEquals(len(TestTransformer1.collected_block_keys), len(self.children_map))
+
+                    # Only the changed leaf and its ancestors are recollected.
+                    self.set_block_versions('v2', block_ids=[3])
+                    self.bs_manager._update_collected()  # pylint: disable=protected-access
+                    self.assertEquals(
+                        TestTransformer1.collected_block_keys,
+                        {self.block_key_factory(block_id) for block_id in [0, 1, 3]},
+                    )
+
+                    # A changed block is recollected with all its descendants.
+                    self.set_block_versions('v3', block_ids=[1])
+                    self.bs_manager._update_collected()  # pylint: disable=protected-access
+                    self.assertEquals(
+                        TestTransformer1.collected_block_keys,
+                        {self.block_key_factory(block_id) for block_id in [0, 1, 3, 4]},
+                    )
+
+                self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+                self.assertEquals(TestTransformer1.collect_call_count, 3)
+
+    def test_incremental_recollect_without_versions(self):
+        with waffle().override(INCREMENTAL_RECOLLECT, active=True):
+            with mock_registered_transformers(self.registered_transformers):
+                self.bs_manager._update_collected()  # pylint: disable=protected-access
+                self.bs_manager._update_collected()  # pylint: disable=protected-access
+                self.assertEquals(len(TestTransformer1.collected_block_keys), len(self.children_map))
+            self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
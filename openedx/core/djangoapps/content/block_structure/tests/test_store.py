@@ -2,11 +2,12 @@
 Tests for block_structure/cache.py
 """
 import ddt
+import itertools
 from nose.plugins.attrib import attr
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import COLUMNAR_SERIALIZATION, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
 from ..store import BlockStructureStore
@@ -67,6 +68,31 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             with self.assertRaises(BlockStructureNotFound):
                 self.store.get(self.block_structure.root_block_usage_key)
 
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_columnar_add_and_get(self, with_storage_backing, with_columnar):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COLUMNAR_SERIALIZATION, active=with_columnar):
+                self.store.add(self.block_structure)
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+                self.assert_block_structure(stored_value, self.children_map)
+                self.assertEquals(
+                    stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                    'MockTransformer val',
+                )
+                self.assertEquals(
+                    stored_value.get_transformer_data(MockTransformer, '_version'),
+                    MockTransformer.WRITE_VERSION,
+                )
+
+    @ddt.data(True, False)
+    def test_read_after_changing_serialization(self, with_columnar):
+        with waffle().override(COLUMNAR_SERIALIZATION, active=with_columnar):
+            self.store.add(self.block_structure)
+        with waffle().override(COLUMNAR_SERIALIZATION, active=not with_columnar):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+
     def test_uncached_without_storage(self):
         self.store.add(self.block_structure)
         self.mock_cache.map.clear()
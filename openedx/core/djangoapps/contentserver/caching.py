@@ -1,11 +1,25 @@
 """
 Helper functions for caching course assets.
+
+Assets are cached in two tiers.  Assets small enough to be cached whole are
+cached as StaticContent objects.  For larger assets, only their metadata is
+cached, from which a StaticContentStream is constructed that reads the data
+of the asset from the contentstore when it is first streamed.  Locations at
+which no asset is found are cached for a short while as well.
 """
+import fcntl
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContentStream
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -14,6 +28,20 @@ try:
 except InvalidCacheBackendError:
     pass
 
+log = logging.getLogger(__name__)
+
+# Value cached as the metadata of locations at which no asset was found.
+CONTENT_NOT_FOUND = 'not_found'
+
+# Expiration of cached locations at which no asset was found.  This is
+# short, since assets may be added without their location being invalidated,
+# for example when a course is imported.
+CONTENT_NOT_FOUND_TIMEOUT = 60  # 1 minute
+
+# Period over which requests for an asset are counted to decide whether
+# it is requested often enough to be stored in the spill cache.
+SPILL_CACHE_HITS_TIMEOUT = 60 * 60  # 1 hour
+
 
 def set_cached_content(content):
     """
@@ -29,9 +57,48 @@ def get_cached_content(location):
     return CONTENT_CACHE.get(unicode(location).encode("utf-8"), version=STATIC_CONTENT_VERSION)
 
 
+def set_cached_content_metadata(content):
+    """
+    Stores the metadata of the given content stream in the cache, using its
+    location as the key.
+    """
+    metadata = {
+        'name': content.name,
+        'content_type': content.content_type,
+        'length': content.length,
+        'content_digest': content.content_digest,
+        'locked': content.locked,
+        'last_modified_at': content.last_modified_at,
+        'thumbnail_location': content.thumbnail_location,
+        'import_path': content.import_path,
+    }
+    CONTENT_CACHE.set(_metadata_key(content.location), metadata, version=STATIC_CONTENT_VERSION)
+
+
+def set_cached_content_not_found(location):
+    """
+    Stores in the cache that no content exists at the given location.
+    """
+    CONTENT_CACHE.set(
+        _metadata_key(location), CONTENT_NOT_FOUND, CONTENT_NOT_FOUND_TIMEOUT, version=STATIC_CONTENT_VERSION
+    )
+
+
+def get_cached_content_metadata(location):
+    """
+    Retrieves a StaticContentStream for the content at the given location if
+    its metadata is cached, CONTENT_NOT_FOUND if the content is cached as not
+    found, or else None.
+    """
+    metadata = CONTENT_CACHE.get(_metadata_key(location), version=STATIC_CONTENT_VERSION)
+    if metadata is None or metadata == CONTENT_NOT_FOUND:
+        return metadata
+    return StaticContentStream(location, stream=_LazyContentStream(location), **metadata)
+
+
 def del_cached_content(location):
     """
-    Delete content for the given location, as well versions of the content without a run.
+    Delete content and metadata for the given location, as well versions of the content without a run.
 
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
@@ -40,11 +107,196 @@ def del_cached_content(location):
         """Force the location to a Unicode string."""
         return unicode(loc).encode("utf-8")
 
-    locations = [location_str(location)]
+    locations = [location]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(location.replace(run=None))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+    CONTENT_CACHE.delete_many(
+        [location_str(loc) for loc in locations] + [_metadata_key(loc) for loc in locations],
+        version=STATIC_CONTENT_VERSION,
+    )
+
+
+def _metadata_key(location):
+    """
+    Returns the cache key of the metadata of the content at the given location.
+    """
+    return 'metadata:' + unicode(location).encode("utf-8")
+
+
+class _LazyContentStream(object):
+    """
+    A stream of the data of the content at a location, which is only opened
+    from the contentstore when it is first read.
+    """
+    def __init__(self, location):
+        self._location = location
+        self._stream = None
+
+    def _get_stream(self):
+        """
+        Returns the stream of the content from the contentstore.
+        """
+        if self._stream is None:
+            # pylint: disable=protected-access
+            self._stream = AssetManager.find(self._location, as_stream=True)._stream
+        return self._stream
+
+    def read(self, size=-1):
+        return self._get_stream().read(size)
+
+    def seek(self, position):
+        return self._get_stream().seek(position)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+
+
+def get_spilled_content_path(content):
+    """
+    Returns the path of the file in which the data of the given content is
+    stored in the local spill cache, or None if the spill cache is disabled.
+
+    Spilled files are named by the digest of their data, so that a changed
+    asset is never served from a stale file.  Content larger than the spill
+    cache is never stored there, and None is returned for it as well.
+    """
+    spill_cache_dir = getattr(settings, 'CONTENTSERVER_SPILL_CACHE_DIR', None)
+    content_digest = getattr(content, 'content_digest', None)
+    if not spill_cache_dir or not content_digest:
+        return None
+    if content.length > settings.CONTENTSERVER_SPILL_CACHE_MAX_SIZE:
+        return None
+    return os.path.join(spill_cache_dir, content_digest)
+
+
+def record_spill_cache_hit(content):
+    """
+    Records a request for the given content, and returns whether it has been
+    requested often enough to be stored in the spill cache.
+    """
+    key = u'contentserver.spill_cache_hits.{}'.format(content.content_digest)
+    CONTENT_CACHE.add(key, 0, SPILL_CACHE_HITS_TIMEOUT)
+    try:
+        hits = CONTENT_CACHE.incr(key)
+    except ValueError:
+        # The key expired since it was added.
+        return False
+    return hits >= settings.CONTENTSERVER_SPILL_CACHE_MIN_HITS
+
+
+def spill_content(path, data_chunks):
+    """
+    Stores the given chunks of an asset's data in the given file of the
+    spill cache.  Returns whether the data was stored.
+
+    The data is written to a temporary file that is then renamed, so that
+    concurrent requests never serve a partially written file.  Only one
+    request per host spills an asset at a time, and requests that find the
+    spill cache locked don't store the data, so that an asset that suddenly
+    becomes popular is read from the contentstore once rather than by every
+    concurrent request.  The least recently served files are then removed
+    to keep the spill cache within CONTENTSERVER_SPILL_CACHE_MAX_SIZE.
+    """
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory)
+    except OSError:
+        # The directory already exists.
+        pass
+
+    with _spill_cache_lock(directory) as locked:
+        if not locked:
+            return False
+        if os.path.exists(path):
+            # Spilled by another request since this one checked.
+            return True
+
+        try:
+            spill_fd, spill_temp_path = tempfile.mkstemp(prefix='.spill-', dir=directory)
+        except OSError:
+            log.exception(u"Unable to create a contentserver spill cache file in %s", directory)
+            return False
+
+        try:
+            with os.fdopen(spill_fd, 'wb') as spill_file:
+                for chunk in data_chunks:
+                    spill_file.write(chunk)
+            os.rename(spill_temp_path, path)
+        except (IOError, OSError):
+            log.exception(u"Unable to write the contentserver spill cache file %s", path)
+            os.remove(spill_temp_path)
+            return False
+
+        _evict_spilled_content(directory, settings.CONTENTSERVER_SPILL_CACHE_MAX_SIZE)
+    return True
+
+
+def record_spilled_content_served(path):
+    """
+    Records that the given file of the spill cache was served, so that it is
+    among the last to be removed from the spill cache.
+    """
+    try:
+        os.utime(path, None)
+    except OSError:
+        # The file was removed since it was opened.
+        pass
+
+
+@contextmanager
+def _spill_cache_lock(directory):
+    """
+    Locks the given spill cache directory for this host, without waiting.
+    Yields whether the lock was acquired.
+    """
+    try:
+        lock_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        yield False
+        return
+
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            yield False
+        else:
+            yield True
+    finally:
+        # Closing the directory releases the lock.
+        os.close(lock_fd)
+
+
+def _evict_spilled_content(directory, max_size):
+    """
+    Removes the least recently served files of the given spill cache directory,
+    until their total size is at most max_size bytes.  Files that are being
+    served when they are removed remain readable until they are closed.
+    """
+    spilled_files = []
+    for name in os.listdir(directory):
+        if name.startswith('.'):
+            # A temporary file that is being written.
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        spilled_files.append((stat.st_mtime, stat.st_size, path))
+
+    total_size = sum(size for _, size, _ in spilled_files)
+    for _, size, path in sorted(spilled_files):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            log.exception(u"Unable to remove the contentserver spill cache file %s", path)
+            continue
+        total_size -= size
@@ -4,23 +4,36 @@ Middleware to serve assets.
 
 import logging
 import datetime
+import os
 log = logging.getLogger(__name__)
 try:
     import newrelic.agent
 except ImportError:
     newrelic = None  # pylint: disable=invalid-name
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
-    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect, StreamingHttpResponse)
+from django.utils.http import parse_etags, quote_etag
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from openedx.core.djangoapps.header_control import force_header_for_response
-from .caching import get_cached_content, set_cached_content
+from .caching import (
+    CONTENT_NOT_FOUND,
+    get_cached_content,
+    get_cached_content_metadata,
+    get_spilled_content_path,
+    record_spill_cache_hit,
+    record_spilled_content_served,
+    set_cached_content,
+    set_cached_content_metadata,
+    set_cached_content_not_found,
+    spill_content,
+)
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -31,6 +44,13 @@ from .models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# Maximum length of assets that are cached, and served, in memory.
+MAX_CACHED_CONTENT_LENGTH = 1048576
+
+# Size of the blocks in which assets are streamed.  This is the default GridFS
+# chunk size, so that each block is read from a single chunk.
+STREAMING_BLOCK_SIZE = 255 * 1024
+
 
 class StaticContentServer(object):
     """
@@ -107,9 +127,16 @@ class StaticContentServer(object):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
+            # if this asset has changed since then.  If-None-Match takes precedence over
+            # If-Modified-Since, since it is based on the digest of the asset.
+            etag = self.get_etag(content)
             last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if etag is not None and 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag_matches(request.META['HTTP_IF_NONE_MATCH'], content.content_digest):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
@@ -122,10 +149,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -150,7 +173,7 @@ class StaticContentServer(object):
 
                         if 0 <= first <= last < content.length:
                             # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                            response = self.get_content_response(content, first, last)
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
@@ -167,7 +190,7 @@ class StaticContentServer(object):
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = self.get_content_response(content)
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -213,11 +236,84 @@ class StaticContentServer(object):
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
 
+        etag = self.get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
+
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
         # caches a version of the response without CORS headers, in turn breaking XHR requests.
         force_header_for_response(response, 'Vary', 'Origin')
 
+    def get_content_response(self, content, first_byte=None, last_byte=None):
+        """
+        Returns a response with the data of the given content, or with its data
+        between first_byte and last_byte (included), if given.
+
+        Content loaded from the cache is already in memory and is sent as is.  Other
+        content is streamed in blocks, from the local spill cache if it is available
+        there, or else from the contentstore.
+        """
+        if not isinstance(content, StaticContentStream):
+            if first_byte is None:
+                return HttpResponse(content.data)
+            return HttpResponse(content.data[first_byte:last_byte + 1])
+
+        spilled_file = self.open_spilled_content(content)
+        if spilled_file is not None:
+            if newrelic:
+                newrelic.agent.add_custom_parameter('contentserver.from_spill_cache', True)
+
+            if first_byte is None:
+                # A FileResponse is offloaded to the WSGI server's file wrapper, if it has one.
+                response = FileResponse(spilled_file)
+                response.block_size = STREAMING_BLOCK_SIZE
+                return response
+            return StreamingHttpResponse(stream_file_in_range(spilled_file, first_byte, last_byte))
+
+        if first_byte is None:
+            # The content is streamed from its start, since a failed attempt to
+            # spill it may have already read part of it.
+            first_byte, last_byte = 0, content.length - 1
+        return StreamingHttpResponse(content.stream_data_in_range(first_byte, last_byte, STREAMING_BLOCK_SIZE))
+
+    def open_spilled_content(self, content):
+        """
+        Returns the file in the local spill cache with the data of the given content,
+        opened for reading, or None if it is not available.
+
+        Content that is not yet in the spill cache is stored there once it has been
+        requested often enough.
+        """
+        spilled_content_path = get_spilled_content_path(content)
+        if spilled_content_path is None:
+            return None
+
+        if not os.path.exists(spilled_content_path):
+            if not record_spill_cache_hit(content):
+                return None
+            data_chunks = content.stream_data_in_range(0, content.length - 1, STREAMING_BLOCK_SIZE)
+            if not spill_content(spilled_content_path, data_chunks):
+                return None
+
+        try:
+            spilled_file = open(spilled_content_path, 'rb')
+        except IOError:
+            return None
+        record_spilled_content_served(spilled_content_path)
+        return spilled_file
+
+    @staticmethod
+    def get_etag(content):
+        """
+        Returns the entity tag of the given content, based on its digest, or None if
+        the content has no digest.
+        """
+        content_digest = getattr(content, "content_digest", None)
+        if content_digest is None:
+            return None
+        return quote_etag(content_digest)
+
     @staticmethod
     def is_cdn_request(request):
         """
@@ -269,27 +365,70 @@ class StaticContentServer(object):
         """
         Loads an asset based on its location, either retrieving it from a cache
         or loading it directly from the contentstore.
+
+        Assets that are too large to be cached are loaded as a stream, which is
+        only opened from the contentstore when the asset's data is streamed.
         """
 
         # See if we can load this item from cache.
         content = get_cached_content(location)
-        if content is None:
-            # Not in cache, so just try and load it from the asset manager.
-            try:
-                content = AssetManager.find(location, as_stream=True)
-            except (ItemNotFoundError, NotFoundError):
-                raise
-
-            # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
-            # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
-                content = content.copy_to_in_mem()
-                set_cached_content(content)
+        if content is not None:
+            return content
+
+        # See if we have at least its metadata cached, or know that it doesn't exist.
+        content = get_cached_content_metadata(location)
+        if content == CONTENT_NOT_FOUND:
+            raise NotFoundError(location)
+        if content is not None:
+            return content
+
+        # Not in cache, so just try and load it from the asset manager.
+        try:
+            content = AssetManager.find(location, as_stream=True)
+        except (ItemNotFoundError, NotFoundError):
+            set_cached_content_not_found(location)
+            raise
+
+        # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
+        # because it's the default for memcached and also we don't want to do too much
+        # buffering in memory when we're serving an actual request.
+        if content.length is not None and content.length < MAX_CACHED_CONTENT_LENGTH:
+            content = content.copy_to_in_mem()
+            set_cached_content(content)
+        else:
+            set_cached_content_metadata(content)
 
         return content
 
 
+def etag_matches(header_value, content_digest):
+    """
+    Returns whether the given If-None-Match header value matches the entity tag
+    of content with the given digest.
+
+    See spec for details: https://tools.ietf.org/html/rfc7232#section-3.2
+    """
+    return header_value.strip() == '*' or content_digest in parse_etags(header_value)
+
+
+def stream_file_in_range(data_file, first_byte, last_byte):
+    """
+    Streams the data of the given file between first_byte and last_byte (included)
+    in blocks, and closes the file.
+    """
+    try:
+        data_file.seek(first_byte)
+        remaining_length = last_byte - first_byte + 1
+        while remaining_length > 0:
+            chunk = data_file.read(min(remaining_length, STREAMING_BLOCK_SIZE))
+            if not chunk:
+                break
+            remaining_length -= len(chunk)
+            yield chunk
+    finally:
+        data_file.close()
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
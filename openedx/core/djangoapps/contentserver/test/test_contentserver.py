@@ -6,10 +6,15 @@ import copy
 import datetime
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import FileResponse
 from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -27,6 +32,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
+from ..caching import _spill_cache_lock, del_cached_content
 from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
@@ -100,6 +106,7 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         cls.url_unlocked_versioned = get_versioned_asset_url(cls.url_unlocked)
         cls.url_unlocked_versioned_old_style = get_old_style_versioned_asset_url(cls.url_unlocked)
         cls.length_unlocked = cls.contentstore.get_attr(cls.unlocked_asset, 'length')
+        cls.digest_unlocked = cls.contentstore.get_attr(cls.unlocked_asset, 'md5')
 
     def setUp(self):
         """
@@ -294,6 +301,190 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEquals('Origin', resp['Vary'])
 
+    def test_etag_header_sent(self):
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['ETag'], '"{}"'.format(self.digest_unlocked))
+
+    @ddt.data(
+        ('"{digest}"', 304),
+        ('W/"{digest}"', 304),
+        ('"ffffffff", "{digest}"', 304),
+        ('*', 304),
+        ('"ffffffff"', 200),
+    )
+    @ddt.unpack
+    def test_if_none_match(self, header_value, expected_status_code):
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=header_value.format(digest=self.digest_unlocked))
+        self.assertEqual(resp.status_code, expected_status_code)
+
+    def test_if_none_match_precedes_if_modified_since(self):
+        resp = self.client.get(self.url_unlocked)
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_NONE_MATCH='"ffffffff"', HTTP_IF_MODIFIED_SINCE=resp['Last-Modified']
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    @ddt.data(None, 'bytes=10-20')
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    def test_uncached_asset_streamed(self, range_header):
+        """
+        Tests that assets that are too large to be cached are streamed from the contentstore.
+        """
+        expected_content = self.contentstore.find(self.unlocked_asset).data
+        extra = {'HTTP_RANGE': range_header} if range_header else {}
+        resp = self.client.get(self.url_unlocked, **extra)
+        self.assertTrue(resp.streaming)
+        if range_header:
+            expected_content = expected_content[10:21]
+        self.assertEqual(''.join(resp.streaming_content), expected_content)
+        self.assertEqual(resp['Content-Length'], str(len(expected_content)))
+
+    @ddt.data(None, 'bytes=10-20')
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    def test_spill_cache(self, range_header):
+        """
+        Tests that frequently requested assets that are too large to be cached are
+        stored in, and served from, the spill cache.
+        """
+        spill_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_cache_dir)
+        expected_content = self.contentstore.find(self.unlocked_asset).data
+        extra = {}
+        if range_header:
+            expected_content = expected_content[10:21]
+            extra['HTTP_RANGE'] = range_header
+
+        with override_settings(CONTENTSERVER_SPILL_CACHE_DIR=spill_cache_dir):
+            with patch(
+                'openedx.core.djangoapps.contentserver.middleware.record_spill_cache_hit',
+                side_effect=[False, True],
+            ):
+                # The asset is not yet requested often enough to be spilled.
+                resp = self.client.get(self.url_unlocked, **extra)
+                self.assertEqual(''.join(resp.streaming_content), expected_content)
+                self.assertEqual(os.listdir(spill_cache_dir), [])
+
+                # The asset is spilled and served from the spill cache from now on.
+                for __ in range(2):
+                    resp = self.client.get(self.url_unlocked, **extra)
+                    self.assertEqual(''.join(resp.streaming_content), expected_content)
+                    self.assertEqual(os.listdir(spill_cache_dir), [self.digest_unlocked])
+                    if not range_header:
+                        self.assertIsInstance(resp, FileResponse)
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    @patch('openedx.core.djangoapps.contentserver.middleware.record_spill_cache_hit', return_value=True)
+    def test_failed_spill_serves_whole_asset(self, _mock_record_spill_cache_hit):
+        """
+        Tests that an asset whose spill fails after it was partially read is
+        still served whole from the contentstore.
+        """
+        spill_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_cache_dir)
+        expected_content = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(CONTENTSERVER_SPILL_CACHE_DIR=spill_cache_dir):
+            with patch('openedx.core.djangoapps.contentserver.caching.os.rename', side_effect=OSError):
+                resp = self.client.get(self.url_unlocked)
+        self.assertEqual(''.join(resp.streaming_content), expected_content)
+        self.assertEqual(os.listdir(spill_cache_dir), [])
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    @patch('openedx.core.djangoapps.contentserver.middleware.record_spill_cache_hit', return_value=True)
+    def test_spill_cache_locked(self, _mock_record_spill_cache_hit):
+        """
+        Tests that assets are not spilled while another request is spilling one.
+        """
+        spill_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_cache_dir)
+        expected_content = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(CONTENTSERVER_SPILL_CACHE_DIR=spill_cache_dir):
+            with _spill_cache_lock(spill_cache_dir) as locked:
+                self.assertTrue(locked)
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(''.join(resp.streaming_content), expected_content)
+                self.assertEqual(os.listdir(spill_cache_dir), [])
+
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(''.join(resp.streaming_content), expected_content)
+            self.assertEqual(os.listdir(spill_cache_dir), [self.digest_unlocked])
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    @patch('openedx.core.djangoapps.contentserver.middleware.record_spill_cache_hit', return_value=True)
+    def test_spill_cache_max_size(self, _mock_record_spill_cache_hit):
+        """
+        Tests that the least recently served files are removed from the spill
+        cache to keep it within its maximum size, and that assets larger than
+        the spill cache are not spilled.
+        """
+        spill_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_cache_dir)
+        asset_length = len(self.contentstore.find(self.unlocked_asset).data)
+        for name, age in (('old', 200), ('recent', 100)):
+            path = os.path.join(spill_cache_dir, name)
+            with open(path, 'wb') as spilled_file:
+                spilled_file.write('x' * asset_length)
+            modified_time = os.path.getmtime(path) - age
+            os.utime(path, (modified_time, modified_time))
+
+        with override_settings(
+            CONTENTSERVER_SPILL_CACHE_DIR=spill_cache_dir,
+            CONTENTSERVER_SPILL_CACHE_MAX_SIZE=asset_length * 2,
+        ):
+            self.client.get(self.url_unlocked)
+            self.assertEqual(sorted(os.listdir(spill_cache_dir)), sorted(['recent', self.digest_unlocked]))
+
+        shutil.rmtree(spill_cache_dir)
+        with override_settings(
+            CONTENTSERVER_SPILL_CACHE_DIR=spill_cache_dir,
+            CONTENTSERVER_SPILL_CACHE_MAX_SIZE=asset_length - 1,
+        ):
+            self.client.get(self.url_unlocked)
+            self.assertFalse(os.path.exists(spill_cache_dir))
+
+    @patch('openedx.core.djangoapps.contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    def test_metadata_cached(self):
+        """
+        Tests that the metadata of assets that are too large to be cached is cached,
+        and that their data is only read from the contentstore when it is streamed.
+        """
+        expected_content = self.contentstore.find(self.unlocked_asset).data
+        with patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('test_assets', {})):
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(''.join(resp.streaming_content), expected_content)
+
+            with patch.object(AssetManager, 'find') as mock_find:
+                resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=resp['ETag'])
+                self.assertEqual(resp.status_code, 304)
+                self.assertFalse(mock_find.called)
+
+            with patch.object(AssetManager, 'find', wraps=AssetManager.find) as mock_find:
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(mock_find.call_count, 0)
+                self.assertEqual(''.join(resp.streaming_content), expected_content)
+                self.assertEqual(mock_find.call_count, 1)
+
+                del_cached_content(self.unlocked_asset)
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(mock_find.call_count, 2)
+
+    def test_not_found_cached(self):
+        """
+        Tests that locations at which no asset exists are cached until invalidated.
+        """
+        missing_asset = self.course_key.make_asset_key('asset', 'missing.txt')
+        with patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('test_assets', {})):
+            with patch.object(AssetManager, 'find', wraps=AssetManager.find) as mock_find:
+                for __ in range(2):
+                    resp = self.client.get(unicode(missing_asset))
+                    self.assertEqual(resp.status_code, 404)
+                self.assertEqual(mock_find.call_count, 1)
+
+                del_cached_content(missing_asset)
+                resp = self.client.get(unicode(missing_asset))
+                self.assertEqual(resp.status_code, 404)
+                self.assertEqual(mock_find.call_count, 2)
+
     @patch('openedx.core.djangoapps.contentserver.models.CourseAssetCacheTtlConfig.get_cache_ttl')
     def test_cache_headers_with_ttl_unlocked(self, mock_get_cache_ttl):
         """
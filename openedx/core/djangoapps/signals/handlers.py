@@ -6,7 +6,9 @@ import logging
 from django.dispatch import receiver
 
 from certificates.models import CertificateGenerationCourseSetting
+from openedx.core.lib.xblock_utils import reset_course_fragment_generation
 from signals import COURSE_PACING_CHANGED
+from xmodule.modulestore.django import SignalHandler
 
 log = logging.getLogger(__name__)
 
@@ -28,3 +30,12 @@ def toggle_self_generated_certs(course_key, course_self_paced):
     Enable or disable self-generated certificates for a course according to pacing.
     """
     CertificateGenerationCourseSetting.set_self_generatation_enabled_for_course(course_key, course_self_paced)
+
+
+@receiver(SignalHandler.course_published, dispatch_uid="reset_fragment_generation_on_course_publish")
+def _reset_fragment_generation_on_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Catches the signal that a course has been published, which Studio sends,
+    and invalidates the course's cached rendered fragments, which the LMS reads.
+    """
+    reset_course_fragment_generation(course_key)
@@ -18,6 +18,7 @@ from django.core.urlresolvers import reverse
 from pytz import UTC
 from django.utils.html import escape
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from edxmako.shortcuts import render_to_string
 from xblock.core import XBlock
 from xblock.exceptions import InvalidScopeError
@@ -252,6 +253,21 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(data_dir, course_id, jump_to_id_base_url, block, view, frag, context, static_asset_path=''):  # pylint: disable=unused-argument
+    """
+    Updates the supplied module with a new get_html function that wraps
+    the old get_html function and substitutes the urls that replace_static_urls,
+    replace_course_urls and replace_jump_to_id_urls substitute, in a single pass.
+    """
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        course_id,
+        jump_to_id_base_url,
+        data_directory=data_dir,
+        static_asset_path=static_asset_path
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.
@@ -472,3 +488,32 @@ def xblock_local_resource_url(block, uri):
             'block_type': block.scope_ids.block_type,
             'uri': uri,
         })
+
+
+def get_course_fragment_generation(course_key):
+    """
+    Returns the course's current generation of cached rendered fragments,
+    which changes whenever the course is published.
+
+    Studio resets the generation when it publishes the course, and the LMS
+    reads it, so it is kept in the default cache, which both share.  A
+    random value is used, rather than a counter, so that a generation
+    evicted from the cache is never reissued.
+    """
+    cache_key = _course_fragment_generation_cache_key(course_key)
+    generation = cache.get(cache_key)
+    if generation is None:
+        cache.add(cache_key, uuid.uuid4().hex, None)
+        generation = cache.get(cache_key)
+    return generation
+
+
+def reset_course_fragment_generation(course_key):
+    """
+    Starts a new generation of cached rendered fragments for the course.
+    """
+    cache.set(_course_fragment_generation_cache_key(course_key), uuid.uuid4().hex, None)
+
+
+def _course_fragment_generation_cache_key(course_key):
+    return u'xblock_utils.fragment_generation.{}'.format(course_key)